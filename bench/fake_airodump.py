@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Stand-in for airodump-ng that writes simulated CSV captures.
+
+Accepts the arguments oui-detect.py passes to airodump-ng (-w PREFIX,
+--output-format, --band, -c CHANNELS, interface) and rewrites PREFIX-01.csv
+in place every --interval seconds, as airodump-ng does. The CSV keeps every
+access point and station seen during the run (so it grows), with last-seen
+times, power and packet counts updated for those still in range. Stations
+come and go at --churn, get random MACs, and a --hit-rate share of them use
+one of the --targets OUIs. SIGTERM, SIGINT and SIGHUP write the CSV once more
+and exit 0; SIGKILL just kills it.
+
+    oui-detect.py ... --capture-command "python3 bench/fake_airodump.py --stations 100 --churn 0.05"
+"""
+
+import argparse
+import random
+import signal
+import sys
+import time
+
+DEFAULT_TARGETS = '60:3E:CA,4C:FC:AA,90:3A:E6'
+
+
+def random_mac(rng, oui=None):
+    if oui is None:
+        # Locally administered, like randomized client MACs
+        oui = f"{(rng.randrange(256) | 0x02) & 0xFE:02X}:{rng.randrange(256):02X}:{rng.randrange(256):02X}"
+    return f"{oui}:{rng.randrange(256):02X}:{rng.randrange(256):02X}:{rng.randrange(256):02X}"
+
+
+class Simulation:
+    def __init__(self, opts, channels):
+        self.opts = opts
+        self.rng = random.Random(opts.seed)
+        self.channels = channels
+        self.targets = [t.strip().upper() for t in opts.targets.split(',') if t.strip()]
+        self.aps = {}
+        self.stations = {}
+        self.present = set()
+        for _ in range(opts.aps):
+            self.add_ap()
+        for _ in range(opts.stations):
+            self.add_station()
+
+    def add_ap(self):
+        now = time.time()
+        bssid = random_mac(self.rng)
+        self.aps[bssid] = {
+            'first': now, 'last': now, 'channel': self.rng.choice(self.channels),
+            'power': -self.rng.randrange(30, 90), 'beacons': 0,
+            'essid': f"net-{self.rng.randrange(10000):04d}"
+        }
+
+    def add_station(self):
+        now = time.time()
+        hit = self.targets and self.rng.random() < self.opts.hit_rate
+        mac = random_mac(self.rng, self.rng.choice(self.targets) if hit else None)
+        self.stations[mac] = {
+            'first': now, 'last': now, 'power': -self.rng.randrange(30, 90), 'packets': 0,
+            'bssid': self.rng.choice(list(self.aps)) if self.aps and self.rng.random() < 0.5 else '(not associated)',
+            'probes': f"probe-{self.rng.randrange(1000)}" if self.rng.random() < 0.3 else ''
+        }
+        self.present.add(mac)
+
+    def step(self, elapsed):
+        """Advance by elapsed seconds: churn, then update what is in range"""
+        leaving = [mac for mac in self.present if self.rng.random() < self.opts.churn * elapsed]
+        for mac in leaving:
+            self.present.discard(mac)
+        for _ in range(len(leaving)):
+            self.add_station()
+        now = time.time()
+        for mac in self.present:
+            station = self.stations[mac]
+            station['last'] = now
+            station['packets'] += self.rng.randrange(1, 20)
+            station['power'] = max(-95, min(-20, station['power'] + self.rng.randrange(-3, 4)))
+        for ap in self.aps.values():
+            ap['last'] = now
+            ap['beacons'] += int(10 * elapsed)
+
+    def write(self, path):
+        fmt = lambda t: time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(t))
+        lines = ["", "BSSID, First time seen, Last time seen, channel, Speed, Privacy, Cipher, "
+                     "Authentication, Power, # beacons, # IV, LAN IP, ID-length, ESSID, Key"]
+        for bssid, ap in self.aps.items():
+            lines.append(f"{bssid}, {fmt(ap['first'])}, {fmt(ap['last'])}, {ap['channel']:>2}, 54, WPA2, CCMP, PSK, "
+                         f"{ap['power']:>3}, {ap['beacons']:>8}, 0, 0.  0.  0.  0, {len(ap['essid']):>3}, "
+                         f"{ap['essid']}, ")
+        lines += ["", "Station MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs"]
+        for mac, station in self.stations.items():
+            lines.append(f"{mac}, {fmt(station['first'])}, {fmt(station['last'])}, {station['power']:>3}, "
+                         f"{station['packets']:>8}, {station['bssid']}, {station['probes']}")
+        # In place, like airodump-ng (readers can see a partly written file)
+        with open(path, 'w') as f:
+            f.write('\r\n'.join(lines) + '\r\n\r\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-w', '--write', required=True, help='Output prefix (PREFIX-01.csv is written)')
+    parser.add_argument('-c', '--channel', default='1,6,11', help='Channels given to APs')
+    parser.add_argument('--output-format', help='Ignored (always csv)')
+    parser.add_argument('--band', help='Ignored')
+    parser.add_argument('--stations', type=int, default=50, help='Stations in range at any time')
+    parser.add_argument('--aps', type=int, default=10, help='Access points')
+    parser.add_argument('--churn', type=float, default=0.02, help='Share of stations leaving per second')
+    parser.add_argument('--hit-rate', type=float, default=0.05, help='Share of new stations on a target OUI')
+    parser.add_argument('--targets', default=DEFAULT_TARGETS, help='Comma-separated target OUIs')
+    parser.add_argument('--interval', type=float, default=1, help='Seconds between CSV writes')
+    parser.add_argument('--seed', type=int, help='Random seed')
+    parser.add_argument('interface', nargs='?', help='Ignored')
+    opts = parser.parse_args()
+
+    channels = [int(c) for c in opts.channel.split(',') if c.strip().isdigit()] or [1]
+    path = opts.write + '-01.csv'
+    sim = Simulation(opts, channels)
+
+    def finish(signum, frame):
+        sim.write(path)
+        sys.exit(0)
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, finish)
+
+    last = time.time()
+    while True:
+        now = time.time()
+        sim.step(now - last)
+        last = now
+        sim.write(path)
+        time.sleep(opts.interval)
+
+
+if __name__ == '__main__':
+    main()
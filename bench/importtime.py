@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Startup import cost of oui-detect.py, measured with `python -X importtime`.
+
+Each scenario runs in a fresh interpreter. The report shows total import time
+of top-level modules, the slowest ones, and whether the web stack was loaded.
+
+    python3 bench/importtime.py [-n RUNS]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(ROOT, 'oui-detect.py')
+LIST = os.path.join(ROOT, 'list', 'drones')
+
+LOAD_MODULE = (
+    "import importlib.util, sys; "
+    f"spec = importlib.util.spec_from_file_location('oui_detect', {SCRIPT!r}); "
+    "m = importlib.util.module_from_spec(spec); spec.loader.exec_module(m); "
+)
+
+SCENARIOS = {
+    'validate-lists': [SCRIPT, 'validate-lists', LIST],
+    'lookup': [SCRIPT, 'lookup', '60:3E:CA:00:00:01', '-m', LIST],
+    'daemon --help': [SCRIPT, '--help'],
+    'module import': ['-c', LOAD_MODULE],
+    'daemon web stack': ['-c', LOAD_MODULE + "m.create_app()"],
+}
+
+WEB_STACK = ('flask', 'flask_cors', 'colorama', 'logging.config')
+
+
+def run_once(argv):
+    """Run one scenario and return (wall seconds, {top-level module: cumulative us})"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime'] + argv,
+                            capture_output=True, text=True, cwd=ROOT)
+    wall = time.perf_counter() - start
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        # Top-level imports are not indented below the "|" separator
+        if not name.startswith('  '):
+            modules[name.strip()] = int(cumulative)
+    return wall, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--runs', type=int, default=5, help='Runs per scenario (best is reported)')
+    bench_args = parser.parse_args()
+
+    print(f"{'scenario':<18} {'wall ms':>8} {'imports ms':>11}  web stack  slowest imports")
+    for label, argv in SCENARIOS.items():
+        best = None
+        for _ in range(bench_args.runs):
+            wall, modules = run_once(argv)
+            if best is None or wall < best[0]:
+                best = (wall, modules)
+        wall, modules = best
+        total = sum(modules.values()) / 1000
+        web = [m for m in WEB_STACK if m in modules]
+        slowest = sorted(modules.items(), key=lambda item: item[1], reverse=True)[:3]
+        slowest = ', '.join(f"{name} {us / 1000:.1f}" for name, us in slowest)
+        print(f"{label:<18} {wall * 1000:>8.1f} {total:>11.1f}  {'yes' if web else 'no':<9}  {slowest}")
+
+
+if __name__ == '__main__':
+    main()
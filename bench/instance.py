@@ -0,0 +1,126 @@
+"""Throwaway local oui-detect.py instance for the load and soak benchmarks.
+
+The daemon runs in a child process with its lists, settings, logs, snapshot
+and capture directory in a temporary directory, and bench/fake_airodump.py
+as its capture command, so it needs neither a wireless card nor sudo.
+
+    with Instance(capture_time=5, fake_args=['--stations', '100']) as instance:
+        fetch(instance.base + '/api/status')
+"""
+
+import json
+import os
+import shlex
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT = os.path.join(os.path.dirname(BENCH_DIR), 'oui-detect.py')
+FAKE_AIRODUMP = os.path.join(BENCH_DIR, 'fake_airodump.py')
+WATCHED_OUIS = ['60:3E:CA', '4C:FC:AA', '90:3A:E6']
+
+
+def fetch(url, body=None, timeout=10):
+    """GET (or POST a JSON body) and decode the JSON response"""
+    data = json.dumps(body).encode() if body is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'} if data else {})
+    with urllib.request.urlopen(req, timeout=timeout) as response:
+        return json.loads(response.read() or b'null')
+
+
+def percentile(values, p):
+    """Nearest-rank percentile (same definition as the daemon's /api/latency)"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, max(0, -(-p * len(values) // 100) - 1))]
+
+
+def serve(workdir, port, capture_time, capture_command):
+    """Child process side: point the daemon at workdir and run it"""
+    import importlib.util
+    spec = importlib.util.spec_from_file_location('oui_detect', SCRIPT)
+    m = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(m)
+
+    m.LISTS_DIR = os.path.join(workdir, 'list')
+    m.LISTS_CONFIG_FILE = os.path.join(workdir, 'lists_config.json')
+    m.SETTINGS_FILE = os.path.join(workdir, 'settings.json')
+    m.LOG_FILE = os.path.join(workdir, 'detected_macs.log')
+    m.SNAPSHOT_FILE = os.path.join(workdir, 'state.snapshot')
+    m.SPOOL_FILE = os.path.join(workdir, 'uplink_spool.jsonl')
+    m.capture = m.CaptureManager(os.path.join(workdir, 'ram'))
+
+    os.makedirs(m.LISTS_DIR)
+    os.makedirs(m.capture.root)
+    for index, oui in enumerate(WATCHED_OUIS):
+        with open(os.path.join(m.LISTS_DIR, f'list{index}'), 'w') as f:
+            f.write(f'{oui} "Target {index}" \n')
+    with open(m.SETTINGS_FILE, 'w') as f:
+        json.dump(dict(m.DEFAULT_SETTINGS, capture_time=capture_time), f)
+
+    sys.argv = [SCRIPT, '-m'] + [os.path.join(m.LISTS_DIR, f'list{i}') for i in range(len(WATCHED_OUIS))]
+    sys.argv += ['-2', '-5', '-p', str(port), '--capture-command', capture_command]
+    # Exit normally on terminate so cleanup_on_exit stops the capture
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    m.run_daemon()
+
+
+class Instance:
+    """Context manager running a daemon on a temporary directory"""
+
+    def __init__(self, capture_time=5, fake_args=(), port=None, show_log=False):
+        self.capture_time = capture_time
+        self.capture_command = shlex.join([sys.executable, FAKE_AIRODUMP] + [str(arg) for arg in fake_args])
+        self.port = port
+        self.show_log = show_log
+        self.process = None
+        self.workdir = None
+
+    def __enter__(self):
+        if self.port is None:
+            with socket.socket() as s:
+                s.bind(('127.0.0.1', 0))
+                self.port = s.getsockname()[1]
+        self.base = f'http://127.0.0.1:{self.port}'
+        self.workdir = tempfile.TemporaryDirectory(prefix='oui-bench-')
+        output = None if self.show_log else subprocess.DEVNULL
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), self.workdir.name, str(self.port),
+             str(self.capture_time), self.capture_command],
+            stdout=output, stderr=output)
+        for _ in range(100):
+            try:
+                fetch(self.base + '/api/status', timeout=1)
+                return self
+            except (OSError, urllib.error.URLError):
+                if self.process.poll() is not None:
+                    break
+                time.sleep(0.2)
+        self.__exit__(None, None, None)
+        raise RuntimeError('instance did not start (run with --show-log)')
+
+    def __exit__(self, *exc):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.workdir is not None:
+            self.workdir.cleanup()
+
+    def cycles_between(self, start, end):
+        """Detection cycles that ran entirely within [start, end]"""
+        cycles = fetch(self.base + '/api/capture')['cycles']
+        return [c for c in cycles if start <= c['start'] and c['start'] + c['duration'] <= end]
+
+
+if __name__ == '__main__':
+    serve(sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4])
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""API load test against a local oui-detect.py instance with a simulated capture.
+
+Starts a throwaway instance (bench/instance.py) whose capture is
+bench/fake_airodump.py, with some stations on the watched OUIs. After a
+quiet baseline, dashboard-like clients poll /api/status and /api/devices while
+others post /api/ignore and toggle lists, each at a fixed rate. The report
+gives API latency percentiles and the detection loop's per-cycle overhead
+(cycle time minus capture time) with and without load.
+
+    python3 bench/loadtest.py [--duration S] [--dashboards N] [--status R] ...
+"""
+
+import argparse
+import random
+import sys
+import threading
+import time
+import urllib.error
+
+from instance import Instance, fetch, percentile
+
+
+class Client(threading.Thread):
+    """Issues one kind of request at a fixed rate (open loop, no catch-up bursts)"""
+
+    def __init__(self, base, kind, rate, stop):
+        super().__init__(daemon=True)
+        self.base = base
+        self.kind = kind
+        self.interval = 1 / rate
+        self.stop = stop
+        self.latencies = []
+        self.errors = 0
+        self.cursor = None
+        self.active = True
+        self.rng = random.Random()
+
+    def request(self):
+        if self.kind == 'status':
+            fetch(self.base + '/api/status')
+        elif self.kind == 'devices':
+            # Like the dashboard: full load once, then incremental polls
+            more = True
+            while more:
+                page = fetch(f"{self.base}/api/devices?since={self.cursor or ''}")
+                self.cursor, more = page['cursor'], page['more']
+        elif self.kind == 'ignore':
+            mac = ':'.join(f'{self.rng.randrange(256):02X}' for _ in range(6))
+            fetch(self.base + '/api/ignore', {'mac': mac, 'duration': 1})
+        elif self.kind == 'toggle':
+            self.active = not self.active
+            fetch(self.base + '/api/toggle-list', {'name': 'list2', 'active': self.active})
+
+    def run(self):
+        next_at = time.monotonic() + self.rng.random() * self.interval
+        while not self.stop.is_set():
+            delay = next_at - time.monotonic()
+            if delay > 0 and self.stop.wait(delay):
+                break
+            next_at = max(next_at + self.interval, time.monotonic())
+            start = time.perf_counter()
+            try:
+                self.request()
+                self.latencies.append(time.perf_counter() - start)
+            except (OSError, ValueError, KeyError, urllib.error.URLError):
+                self.errors += 1
+
+
+def cycle_summary(cycles):
+    overhead = [c['overhead'] for c in cycles]
+    if not overhead:
+        return 'no complete cycles'
+    return (f"{len(cycles)} cycles, overhead p50 {percentile(overhead, 50) * 1000:.0f} ms, "
+            f"p90 {percentile(overhead, 90) * 1000:.0f} ms, max {max(overhead) * 1000:.0f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=60, help='Seconds under load')
+    parser.add_argument('--baseline', type=float, default=30, help='Seconds without load first')
+    parser.add_argument('--capture-time', type=int, default=5, help='Capture window of the instance')
+    parser.add_argument('--dashboards', type=int, default=5, help='Dashboards polling status and devices')
+    parser.add_argument('--status', type=float, default=1, help='/api/status requests/s per dashboard')
+    parser.add_argument('--devices', type=float, default=0.5, help='/api/devices requests/s per dashboard')
+    parser.add_argument('--ignore', type=float, default=1, help='/api/ignore requests/s')
+    parser.add_argument('--toggle', type=float, default=0.2, help='/api/toggle-list requests/s')
+    parser.add_argument('--stations', type=int, default=50, help='Simulated stations in range')
+    parser.add_argument('--port', type=int, help='Port for the instance (default: a free one)')
+    parser.add_argument('--show-log', action='store_true', help="Show the instance's output")
+    bench_args = parser.parse_args()
+
+    fake_args = ['--stations', str(bench_args.stations), '--churn', '0.1']
+    with Instance(bench_args.capture_time, fake_args, bench_args.port, bench_args.show_log) as instance:
+        base = instance.base
+        print(f"baseline: {bench_args.baseline:.0f}s without API load")
+        baseline_start = time.time()
+        time.sleep(bench_args.baseline)
+        baseline_end = time.time()
+
+        stop = threading.Event()
+        clients = []
+        for _ in range(bench_args.dashboards):
+            clients.append(Client(base, 'status', bench_args.status, stop))
+            clients.append(Client(base, 'devices', bench_args.devices, stop))
+        if bench_args.ignore > 0:
+            clients.append(Client(base, 'ignore', bench_args.ignore, stop))
+        if bench_args.toggle > 0:
+            clients.append(Client(base, 'toggle', bench_args.toggle, stop))
+        print(f"load: {bench_args.duration:.0f}s, {bench_args.dashboards} dashboards, "
+              f"{bench_args.ignore}/s ignore, {bench_args.toggle}/s toggle")
+        load_start = time.time()
+        for client in clients:
+            client.start()
+        time.sleep(bench_args.duration)
+        stop.set()
+        for client in clients:
+            client.join()
+        load_end = time.time()
+
+        print(f"\n{'endpoint':<10} {'requests':>9} {'errors':>7} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8}")
+        for kind in ('status', 'devices', 'ignore', 'toggle'):
+            latencies = [t for c in clients if c.kind == kind for t in c.latencies]
+            errors = sum(c.errors for c in clients if c.kind == kind)
+            if not latencies and not errors:
+                continue
+            row = [percentile(latencies, p) for p in (50, 90, 99)]
+            row = ''.join(f"{v * 1000:>9.1f}" if v is not None else f"{'-':>9}" for v in row)
+            print(f"{kind:<10} {len(latencies):>9} {errors:>7} {len(latencies) / bench_args.duration:>7.1f}{row}")
+
+        print(f"\ndetection loop, baseline: {cycle_summary(instance.cycles_between(baseline_start, baseline_end))}")
+        print(f"detection loop, loaded:   {cycle_summary(instance.cycles_between(load_start, load_end))}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
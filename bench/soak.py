@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""Soak test: many short detection cycles on a simulated capture, watching for leaks.
+
+Runs a throwaway instance (bench/instance.py) with bench/fake_airodump.py
+and a short capture window, so a day's worth of cycles (about 3300 at the
+default 25 s window) takes a few hours instead of a day. Every
+--sample seconds it records the daemon's RSS, open fds, threads and child
+processes (from /proc), the sizes from /api/debug/runtime and the cycle
+overhead from /api/capture. After --warmup cycles each series gets a least
+squares fit against the cycle count; a series is flagged when it grows
+steadily and the fit projects more than its allowance over one real day.
+
+    python3 bench/soak.py [--cycles N] [--capture-time S] [--stations N] [--churn R]
+"""
+
+import argparse
+import os
+import sys
+import time
+import urllib.error
+
+from instance import Instance, fetch, percentile
+
+# Growth over one real day that is still acceptable, per series
+ALLOWANCE = {
+    'rss_kb': 8192,
+    'fds': 2,
+    'threads': 2,
+    'children': 1,
+    'overhead_ms': 50,
+    'queue_log': 100,
+    'queue_action': 100,
+    'queue_shell': 20,
+    'queue_uplink': 100,
+    'last_alerts': 500,
+    'ignored_devices': 100,
+    'proximity_state': 500,
+    'latency_groups': 10,
+}
+
+
+def process_sample(pid):
+    """RSS, open fds, threads and children of a process, from /proc"""
+    sample = {'rss_kb': 0, 'fds': len(os.listdir(f'/proc/{pid}/fd')), 'threads': 0, 'children': 0}
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                sample['rss_kb'] = int(line.split()[1])
+            elif line.startswith('Threads:'):
+                sample['threads'] = int(line.split()[1])
+    for task in os.listdir(f'/proc/{pid}/task'):
+        try:
+            with open(f'/proc/{pid}/task/{task}/children') as f:
+                sample['children'] += len(f.read().split())
+        except OSError:
+            pass
+    return sample
+
+
+def fit(points):
+    """Least squares slope and r^2 of (x, y) points"""
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    syy = sum((y - mean_y) ** 2 for _, y in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    if not sxx:
+        return 0.0, 0.0
+    slope = sxy / sxx
+    return slope, (sxy * sxy / (sxx * syy) if syy else 0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--cycles', type=int, default=300, help='Detection cycles to run')
+    parser.add_argument('--warmup', type=int, default=30, help='Cycles left out of the fits')
+    parser.add_argument('--capture-time', type=int, default=1, help='Capture window of the instance')
+    parser.add_argument('--real-capture-time', type=float, default=25,
+                        help='Window of a real deployment, for projecting to one day')
+    parser.add_argument('--stations', type=int, default=200, help='Simulated stations in range')
+    parser.add_argument('--churn', type=float, default=0.2, help='Share of stations replaced per second')
+    parser.add_argument('--hit-rate', type=float, default=0.1, help='Share of new stations on a watched OUI')
+    parser.add_argument('--sample', type=float, default=5, help='Seconds between samples')
+    parser.add_argument('--port', type=int, help='Port for the instance (default: a free one)')
+    parser.add_argument('--show-log', action='store_true', help="Show the instance's output")
+    bench_args = parser.parse_args()
+
+    fake_args = ['--stations', str(bench_args.stations), '--churn', str(bench_args.churn),
+                 '--hit-rate', str(bench_args.hit_rate), '--interval', '0.5']
+    samples = []
+    with Instance(bench_args.capture_time, fake_args, bench_args.port, bench_args.show_log) as instance:
+        pid = instance.process.pid
+        print(f"soak: {bench_args.cycles} cycles of {bench_args.capture_time}s, "
+              f"{bench_args.stations} stations, churn {bench_args.churn}/s")
+        started = time.time()
+        while True:
+            try:
+                sample = process_sample(pid)
+                runtime = fetch(instance.base + '/api/debug/runtime')
+                for name, depth in runtime.pop('queues').items():
+                    sample[f'queue_{name}'] = depth
+                sample.update(runtime)
+                cycles = fetch(instance.base + '/api/capture')['cycles']
+            except (OSError, ValueError, urllib.error.URLError) as e:
+                print(f"instance stopped responding: {e}")
+                return 1
+            if cycles:
+                recent = [c['overhead'] for c in cycles[-5:]]
+                sample['overhead_ms'] = percentile(recent, 50) * 1000
+            samples.append(sample)
+            done = sample['cycle_count']
+            print(f"{done:>6}/{bench_args.cycles} cycles  rss {sample['rss_kb'] / 1024:6.1f} MB  "
+                  f"fds {sample['fds']:>3}  threads {sample['threads']:>3}  "
+                  f"last_alerts {sample['last_alerts']:>6}  log queue {sample['queue_log']:>5}",
+                  end='\r' if sys.stdout.isatty() else '\n', flush=True)
+            if done >= bench_args.cycles:
+                break
+            time.sleep(bench_args.sample)
+        elapsed = time.time() - started
+    print()
+
+    per_day = 86400 / (bench_args.real_capture_time + 1)
+    fitted = [s for s in samples if s['cycle_count'] >= bench_args.warmup]
+    if len(fitted) < 3:
+        print('too few samples after warmup (raise --cycles or lower --sample)')
+        return 1
+    print(f"\n{len(samples)} samples over {elapsed / 60:.1f} min; projecting to {per_day:.0f} cycles/day "
+          f"({bench_args.real_capture_time:.0f}s windows)\n")
+    print(f"{'series':<16} {'first':>10} {'last':>10} {'per 1k cycles':>14} {'r^2':>5} {'per day':>10}")
+    flagged = []
+    for key in ALLOWANCE:
+        points = [(s['cycle_count'], s[key]) for s in fitted if key in s]
+        if len(points) < 3:
+            continue
+        slope, r2 = fit(points)
+        day = slope * per_day
+        grows = slope > 0 and r2 >= 0.5 and day > ALLOWANCE[key]
+        if grows:
+            flagged.append(key)
+        print(f"{key:<16} {points[0][1]:>10.0f} {points[-1][1]:>10.0f} {slope * 1000:>14.1f} {r2:>5.2f} "
+              f"{day:>10.0f}{'  GROWS' if grows else ''}")
+    if flagged:
+        print(f"\nunbounded growth suspected: {', '.join(flagged)}")
+        return 2
+    print('\nno growth beyond allowances')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,26 +4,26 @@ import subprocess
 import time
 import os
 import signal
+import socket
+import struct
 import sys
 from datetime import datetime, timedelta
+from collections import deque
 import argparse
-from colorama import init, Fore, Style
-from flask import Flask, jsonify, request, send_from_directory
-from flask_cors import CORS
 import threading
 import queue
 import re
+import fnmatch
 import atexit
-import logging
-from logging.config import dictConfig
+import functools
+import hashlib
+import itertools
 import json
 from typing import List, Dict
 
+LISTS_DIR = '/home/pi/oui/list'
 LISTS_CONFIG_FILE = '/home/pi/oui/lists_config.json'
 
-# Make sure the config directory exists
-os.makedirs(os.path.dirname(LISTS_CONFIG_FILE), exist_ok=True)
-
 SETTINGS_FILE = '/home/pi/oui/settings.json'
 DEFAULT_SETTINGS = {
     'interface': 'wlan0',
@@ -31,20 +31,124 @@ DEFAULT_SETTINGS = {
     'band2G': True,
     'band5G': True,
     'channels2G': [1, 6, 11],
-    'channels5G': [44, 52, 100, 149, 157, 161]
+    'channels5G': [44, 52, 100, 149, 157, 161],
+    'auto_capture': False,
+    'capture_min': 8,
+    'capture_max': 60,
+    'cycle_gap_max': 5,
+    'capture_budget_mb': 16,
+    'allow_shell_commands': False,
+    'pipeline': {}
 
 }
 
-# Initialize colorama and Flask
-init(autoreset=True)
-app = Flask(__name__, static_folder='static')
-CORS(app)
+
+class Fore:
+    """ANSI colours used by print_status (same codes as colorama.Fore)"""
+    RED = '\033[31m'
+    GREEN = '\033[32m'
+    YELLOW = '\033[33m'
+    CYAN = '\033[36m'
+    WHITE = '\033[37m'
+
+
+class Style:
+    RESET_ALL = '\033[0m'
+
+
+# Flask, flask_cors, colorama and logging.config are only imported by the
+# daemon (see load_web_stack). Sub-commands run without them.
+app = None
+request = None
+jsonify = None
+send_from_directory = None
+make_response = None
+ROUTES = []
+
+
+def route(rule, **options):
+    """Record a Flask route; it is registered on the app by create_app()"""
+    def decorator(func):
+        ROUTES.append((rule, options, func))
+        return func
+    return decorator
+
+# Versioned state for conditional GETs. Anything that changes what a polled
+# endpoint returns calls bump_state() with the matching name; the endpoint
+# turns the versions it depends on into an ETag and answers 304 when the
+# client already has them, without running the view (and its file I/O).
+# State that also changes outside the daemon (list files edited by hand) adds
+# the mtime of its files to the validator.
+STATE_EPOCH = int(time.time())
+state_versions = {}
+state_modified = {}
+
+
+def bump_state(*names):
+    """Mark the named pieces of state as changed"""
+    now = time.time()
+    for name in names:
+        state_versions[name] = state_versions.get(name, 0) + 1
+        state_modified[name] = now
+
+def path_mtime(path: str) -> float:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0
+
+def conditional(*names, mtime=None):
+    """Serve a GET with ETag/Last-Modified derived from the named state
+    versions, and from mtime() (a file's modification time) if given"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*func_args, **func_kwargs):
+            versions = '-'.join(str(state_versions.get(name, 0)) for name in names)
+            modified = [state_modified.get(name, STATE_EPOCH) for name in names]
+            if mtime is not None:
+                changed = mtime()
+                versions += f"-{changed:.6f}"
+                modified.append(changed)
+            etag = f"{STATE_EPOCH}-{versions}-{request.query_string.decode()}"
+            if request.if_none_match.contains(etag):
+                response = make_response('', 304)
+            else:
+                response = make_response(func(*func_args, **func_kwargs))
+                body = response.get_json(silent=True)
+                if response.status_code != 200 or (isinstance(body, dict) and body.get('status') == 'error'):
+                    return response  # never let a client cache an error
+            response.set_etag(etag)
+            response.last_modified = max(modified)
+            response.cache_control.no_cache = True
+            return response
+        return wrapper
+    return decorator
+
+def ttl_cache(seconds: float):
+    """Memoize a function's result per arguments for a few seconds"""
+    def decorator(func):
+        cache = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*func_args):
+            now = time.monotonic()
+            with lock:
+                hit = cache.get(func_args)
+                if hit and now - hit[0] < seconds:
+                    return hit[1]
+            result = func(*func_args)
+            with lock:
+                cache[func_args] = (now, result)
+            return result
+        wrapper.cache_clear = cache.clear
+        return wrapper
+    return decorator
 
 # Global variables and constants
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 LOG_FILE = os.path.join(SCRIPT_DIR, 'detected_macs.log')
-device_queue = queue.Queue()
-stop_flag = False
+shutdown = threading.Event()  # set once, when the process exits
 is_paused = False
 cycle_count = 0
 interface_status = True
@@ -80,7 +184,7 @@ def load_lists_config():
         print_status(f"Error accessing config file: {e}", Fore.RED)
 
     # Create new configuration from current args
-    lists_dir = '/home/pi/oui/list'
+    lists_dir = LISTS_DIR
     all_lists = get_all_available_lists()
     active_lists = [os.path.basename(path) for path in args.mac_list]
     inactive_lists = list(set(all_lists) - set(active_lists))
@@ -100,9 +204,18 @@ def load_lists_config():
     
     return new_config
 
+_saved_lists_config = None
+
 def save_lists_config(config):
+    global _saved_lists_config
+    # /api/lists-status calls this on every poll; only write (and bump the
+    # version) when something actually changed
+    if config == _saved_lists_config:
+        return
     with open(LISTS_CONFIG_FILE, 'w') as f:
         json.dump(config, f)
+    _saved_lists_config = {key: list(value) for key, value in config.items()}
+    bump_state('lists')
 
 def load_settings():
     """Load settings from file or return defaults"""
@@ -119,80 +232,365 @@ def save_settings(settings):
     try:
         with open(SETTINGS_FILE, 'w') as f:
             json.dump(settings, f, indent=4)
+        bump_state('settings')
         return True
     except Exception as e:
         print_status(f"Error saving settings: {e}", Fore.RED)
         return False
 
+# Interface state comes from sysfs instead of forking iwconfig:
+#   /sys/class/net/<if>/phy80211   exists for wireless interfaces
+#   /sys/class/net/<if>/type       803 (ARPHRD_IEEE80211_RADIOTAP) in monitor mode
+#   /sys/class/net/<if>/flags      IFF_UP bit
+# InterfaceMonitor caches it and re-reads it when the kernel reports a link
+# change over rtnetlink, so a radio leaving monitor mode is seen at once.
+
+SYSFS_NET = '/sys/class/net'
+ARPHRD_IEEE80211_RADIOTAP = 803
+IFF_UP = 0x1
+RTMGRP_LINK = 0x1
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+IFLA_IFNAME = 3
+
+
+def read_interface_state(interface: str) -> Dict[str, bool]:
+    """Read an interface's up / monitor state from sysfs"""
+    base = os.path.join(SYSFS_NET, interface)
+    try:
+        with open(os.path.join(base, 'type')) as f:
+            if_type = int(f.read())
+        with open(os.path.join(base, 'flags')) as f:
+            flags = int(f.read(), 16)
+    except (OSError, ValueError):
+        return {'exists': False, 'isUp': False, 'isMonitor': False}
+    return {
+        'exists': True,
+        'isUp': bool(flags & IFF_UP),
+        'isMonitor': if_type == ARPHRD_IEEE80211_RADIOTAP
+    }
+
+def parse_link_events(data: bytes) -> list:
+    """Interface names from RTM_NEWLINK/RTM_DELLINK messages in a netlink datagram"""
+    names = []
+    offset = 0
+    while offset + 16 <= len(data):
+        msg_len, msg_type = struct.unpack_from('=IH', data, offset)
+        if msg_len < 16:
+            break
+        if msg_type in (RTM_NEWLINK, RTM_DELLINK):
+            # nlmsghdr (16 bytes) + ifinfomsg (16 bytes), then rtattrs
+            attr = offset + 32
+            end = offset + msg_len
+            while attr + 4 <= end:
+                attr_len, attr_type = struct.unpack_from('=HH', data, attr)
+                if attr_len < 4:
+                    break
+                if attr_type == IFLA_IFNAME:
+                    names.append(data[attr + 4:attr + attr_len].split(b'\0', 1)[0].decode(errors='replace'))
+                    break
+                attr += (attr_len + 3) & ~3
+        offset += (msg_len + 3) & ~3
+    return names
+
+
+class InterfaceMonitor:
+    """Cached interface state, refreshed on rtnetlink link events.
+
+    Without netlink (or before start()) the state is polled from sysfs
+    every poll_interval seconds. Changes set the `changed` event and bump
+    the 'status' version so pollers and the capture loop see them.
+    """
+
+    def __init__(self, poll_interval: float = 5):
+        self.poll_interval = poll_interval
+        self.lock = threading.Lock()
+        self.states = {}
+        self.changed = threading.Event()
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def status(self, interface: str) -> Dict[str, bool]:
+        """Current state of an interface; read from sysfs on first query, and
+        whenever the monitor thread is not running to keep the cache fresh"""
+        with self.lock:
+            state = self.states.get(interface)
+        if state is None or self.thread is None or not self.thread.is_alive():
+            state = self._refresh(interface)
+        return dict(state)
+
+    def wait_for_change(self, timeout: float) -> bool:
+        """Sleep up to timeout seconds; True if some interface changed meanwhile"""
+        changed = self.changed.wait(timeout)
+        self.changed.clear()
+        return changed
+
+    def _refresh(self, interface: str) -> Dict[str, bool]:
+        state = read_interface_state(interface)
+        with self.lock:
+            previous = self.states.get(interface)
+            self.states[interface] = state
+        if previous is not None and previous != state:
+            print_status(f"Interface {interface} changed: {state}", Fore.YELLOW)
+            bump_state('status')
+            self.changed.set()
+        return state
+
+    def _refresh_all(self, names=None):
+        with self.lock:
+            watched = list(self.states)
+        for interface in watched:
+            if names is None or interface in names:
+                self._refresh(interface)
+
+    def _run(self):
+        sock = None
+        try:
+            sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+            sock.bind((0, RTMGRP_LINK))
+            sock.settimeout(self.poll_interval)
+        except (AttributeError, OSError) as e:
+            print_status(f"Netlink unavailable ({e}), polling interface state", Fore.YELLOW)
+            sock = None
+
+        while not shutdown.is_set():
+            if sock is None:
+                shutdown.wait(self.poll_interval)
+                self._refresh_all()
+                continue
+            try:
+                self._refresh_all(set(parse_link_events(sock.recv(65536))))
+            except socket.timeout:
+                self._refresh_all()
+            except OSError:
+                # Receive buffer overrun (ENOBUFS): we may have missed events
+                self._refresh_all()
+
+interface_monitor = InterfaceMonitor()
+
+@ttl_cache(5)
 def get_wireless_interfaces() -> List[str]:
     """Get list of available wireless interfaces"""
     try:
-        result = subprocess.run(['iwconfig'], capture_output=True, text=True)
-        interfaces = []
-        for line in result.stdout.split('\n'):
-            if 'IEEE 802.11' in line:
-                interfaces.append(line.split()[0])
-        return interfaces
+        return sorted(name for name in os.listdir(SYSFS_NET)
+                      if os.path.exists(os.path.join(SYSFS_NET, name, 'phy80211')))
     except Exception as e:
         print_status(f"Error getting wireless interfaces: {e}", Fore.RED)
         return ['wlan0']  # Return default if error
 
 def check_interface_status(interface: str) -> Dict[str, bool]:
     """Check if interface is up and in monitor mode"""
-    try:
-        result = subprocess.run(['iwconfig', interface], capture_output=True, text=True)
-        is_up = 'ESSID' in result.stdout or 'Mode:Monitor' in result.stdout
-        is_monitor = 'Mode:Monitor' in result.stdout
-        return {'isUp': is_up, 'isMonitor': is_monitor}
-    except Exception:
-        return {'isUp': False, 'isMonitor': False}
+    return interface_monitor.status(interface)
 
 
+# Console and debug logging
+#
+# In the daemon and the aggregator, print_status hands its line to a writer
+# thread instead of writing and flushing stdout itself. The writer takes
+# whatever has queued up, writes it at once and flushes once per batch. If the
+# console falls LOG_QUEUE_SIZE lines behind, further lines are dropped and
+# counted rather than holding up detection. Sub-commands print directly.
+#
+# Debug events (what -v used to print for every row and pattern) go through
+# debug_event(kind, fmt, *args), which does nothing unless debug logging is on
+# (-v, or POST /api/debug/log). Events are %-formatted only when read and kept
+# in a ring of the last DEBUG_RING_SIZE for GET /api/debug/log. Each kind may
+# record DEBUG_RATE events per second (bursts of DEBUG_BURST); beyond that one
+# in DEBUG_SAMPLE is kept and the rest are only counted. With -v, kept events
+# are printed as well.
+
+LOG_QUEUE_SIZE = 10000
+DEBUG_RING_SIZE = 2000
+DEBUG_RATE = 20
+DEBUG_BURST = 100
+DEBUG_SAMPLE = 100
+
+
+class ConsoleWriter:
+    """Writes console lines from a background thread, one flush per batch"""
+
+    def __init__(self):
+        self.queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        self.lock = threading.Lock()
+        self.thread = None
+        self.written = 0
+        self.dropped = 0
+        self.reported = 0
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name='console', daemon=True)
+            self.thread.start()
+            atexit.register(self.drain)
+
+    def write(self, text: str):
+        if self.thread is None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+        try:
+            self.queue.put_nowait(text)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self):
+        while True:
+            self._emit([self.queue.get()])
+
+    def drain(self):
+        """Write out what is still queued (at exit)"""
+        self._emit([])
+
+    def _emit(self, batch: list):
+        with self.lock:
+            try:
+                while len(batch) < 1000:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            if self.dropped > self.reported:
+                batch.append(f"\r\033[K{Fore.YELLOW}({self.dropped - self.reported} console lines dropped){Style.RESET_ALL}\n")
+                self.reported = self.dropped
+            if batch:
+                sys.stdout.write(''.join(batch))
+                sys.stdout.flush()
+                self.written += len(batch)
+
+    def info(self) -> dict:
+        return {'queued': self.queue.qsize(), 'written': self.written, 'dropped': self.dropped}
+
+
+class DebugLog:
+    """Rate-limited, sampled ring of debug events"""
+
+    def __init__(self):
+        self.enabled = False
+        self.echo = False
+        self.lock = threading.Lock()
+        self.ring = deque(maxlen=DEBUG_RING_SIZE)
+        self.kinds = {}
+        self.seq = 0
+
+    def event(self, kind: str, fmt: str, args: tuple):
+        now = time.time()
+        with self.lock:
+            state = self.kinds.get(kind)
+            if state is None:
+                state = self.kinds[kind] = {'tokens': DEBUG_BURST, 'refilled': now, 'seen': 0, 'kept': 0}
+            state['seen'] += 1
+            state['tokens'] = min(DEBUG_BURST, state['tokens'] + (now - state['refilled']) * DEBUG_RATE)
+            state['refilled'] = now
+            if state['tokens'] >= 1:
+                state['tokens'] -= 1
+            elif state['seen'] % DEBUG_SAMPLE:
+                return
+            state['kept'] += 1
+            self.seq += 1
+            self.ring.append((self.seq, now, kind, fmt, args))
+        if self.echo:
+            print_status(f"DEBUG: {fmt % args}", Fore.CYAN)
+
+    def events(self, since: int = 0, kind: str = None, limit: int = DEBUG_RING_SIZE) -> list:
+        with self.lock:
+            events = [e for e in self.ring if e[0] > since and (kind is None or e[2] == kind)]
+        return [{'seq': seq, 'time': round(when, 3), 'kind': event_kind, 'message': fmt % event_args}
+                for seq, when, event_kind, fmt, event_args in events[-limit:]]
+
+    def counters(self) -> dict:
+        with self.lock:
+            return {kind: {'seen': state['seen'], 'kept': state['kept'], 'suppressed': state['seen'] - state['kept']}
+                    for kind, state in self.kinds.items()}
+
+
+console = ConsoleWriter()
+debug_log = DebugLog()
+
+def debug_event(kind: str, fmt: str, *args):
+    """Record a debug event (no-op unless debug logging is on)"""
+    if debug_log.enabled:
+        debug_log.event(kind, fmt, args)
+
 def clear_line():
     """Clear the current line in terminal"""
-    print('\r\033[K', end='', flush=True)
+    console.write('\r\033[K')
 
 def print_status(message, color=Fore.WHITE):
     """Print status message with proper formatting"""
-    clear_line()
-    print(f"{color}{message}{Style.RESET_ALL}", flush=True)
+    console.write(f"\r\033[K{color}{message}{Style.RESET_ALL}\n")
 
 def cleanup_on_exit():
     """Cleanup function to be called on script exit"""
-    cleanup_files()
-    subprocess.run(['sudo', 'pkill', '-f', 'airodump-ng'], check=False)
-atexit.register(cleanup_on_exit)
-
-def log_detection(mac: str, name: str, source_file: str, channel: str = "unknown"):
-    """Log detected device with specified format including channel"""
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-    list_name = os.path.basename(source_file)
-    
-    log_entry = f"[{timestamp}] | {mac} | {name} | Ch: {channel} | List: {list_name}"
-    
+    shutdown.set()
+    try:
+        write_snapshot()
+    except OSError as e:
+        print_status(f"Error writing snapshot: {e}", Fore.RED)
+    drain_pipeline()
+    action_dispatcher.close()
+    evidence.stop()
+    capture.close()
+
+def log_detection(mac: str, name: str, source_file: str, channel: str = "unknown", trace: dict = None,
+                  latency: tuple = None):
+    """Log detected device with specified format including channel (through the
+    log stage when the pipeline runs). latency=(capture_time, channel_count)
+    records the trace once logged"""
+    pipeline['log'].put({
+        'time': time.time(),
+        'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M'),
+        'mac': mac,
+        'name': name,
+        'channel': channel,
+        'list': os.path.basename(source_file),
+        'trace': trace,
+        'latency': latency
+    })
+
+def log_detections(detections: list):
+    """log stage: append detections to the log in one write, then count them and pass them on"""
+    entries = [f"[{d['timestamp']}] | {d['mac']} | {d['name']} | Ch: {d['channel']} | List: {d['list']}"
+               for d in detections]
     try:
         with open(LOG_FILE, 'a') as f:
-            f.write(log_entry + "\n")
-        
-        device_queue.put({
-            'timestamp': timestamp,
-            'mac': mac,
-            'name': name,
-            'channel': channel,
-            'list': list_name
-        })
-        
-        clear_line()
-        print_status(log_entry, Fore.GREEN)
-        
+            f.write(''.join(entry + "\n" for entry in entries))
     except Exception as e:
         clear_line()
         print_status(f"Error logging detection: {e}", Fore.RED)
+        return
+    logged = time.time()
+    for detection, entry in zip(detections, entries):
+        detection_stats.add(detection['time'], detection['list'], detection['mac'], detection['channel'])
+        latency = detection.pop('latency', None)
+        trace = detection['trace']
+        if trace is not None:
+            trace['logged'] = logged
+            if latency is not None:
+                record_trace(trace, detection['list'], *latency)
+        pipeline['uplink'].put(detection)
+        evidence.note(detection['mac'])
+        print_status(entry, Fore.GREEN)
+    bump_state('devices')
 
-def extract_channel(csv_line: str) -> str:
-    """Extract channel number from CSV line"""
+def extract_channel(csv_line: str, csv_content: list = ()) -> str:
+    """Extract channel number from CSV line. Station rows have Power in
+    column 3; their channel is that of the associated AP's row in
+    csv_content, or unknown"""
     try:
         parts = csv_line.split(',')
+        if is_station_row(parts):
+            bssid = parts[5].strip().upper()
+            if not MAC_REGEX.fullmatch(bssid):
+                return "unknown"
+            for row in csv_content:
+                if row.upper().startswith(bssid):
+                    ap_parts = row.split(',')
+                    if not is_station_row(ap_parts):
+                        return extract_channel(row)
+            return "unknown"
         if len(parts) >= 4:
             channel = parts[3].strip()
             return channel if channel else "unknown"
@@ -200,29 +598,472 @@ def extract_channel(csv_line: str) -> str:
         pass
     return "unknown"
 
-def check_wlan0_exists() -> bool:
-    """Check if wlan0 interface exists and is in monitor mode"""
+def check_monitor_mode(interface: str) -> bool:
+    """Check if the interface exists and is in monitor mode"""
+    if check_interface_status(interface)['isMonitor']:
+        print_status(f"{interface} interface exists in monitor mode", Fore.GREEN)
+        return True
+    return False
+
+# Capture process management
+#
+# airodump-ng runs in its own session (process group) and writes into a
+# directory owned by this daemon, /mnt/ram/oui-prox-<pid>. Stopping a capture
+# signals only that group and reaps it with waitpid; capture files are
+# unlinked in-process. Other airodump-ng processes on the box are left alone.
+# Consecutive captures alternate between two window subdirectories, so one
+# window can still be parsed while the next is being written.
+#
+# The run directory is held to the capture_budget_mb setting while airodump-ng
+# runs: if its files outgrow the budget (or the RAM disk itself runs low) the
+# capture is rotated, i.e. ended early so the next one starts in an empty
+# window. Files are never truncated under the writer, and the other window may
+# still be being parsed, so rotation is the only remedy. Sizes are the blocks
+# allocated, which is what the RAM disk runs out of.
+
+CAPTURE_ROOT = '/mnt/ram'
+CAPTURE_COMMAND = ['airodump-ng']
+CAPTURE_PREFIX = 'OUI-Prox'
+CAPTURE_WINDOWS = 2
+CAPTURE_DIR_REGEX = re.compile(r'oui-prox-(\d+)$')
+CAPTURE_FS_RESERVE = 4 * 1024 * 1024  # free bytes to leave on the RAM disk
+
+
+def signal_group(pgid: int, sig: int):
     try:
-        result = subprocess.run(['iwconfig', 'wlan0'], capture_output=True, text=True)
-        if "Mode:Monitor" in result.stdout:
-            print_status("wlan0 interface exists in monitor mode", Fore.GREEN)
+        os.killpg(pgid, sig)
+    except ProcessLookupError:
+        pass
+    except PermissionError:
+        # sudo runs as root, so signal our own group through it (sudo
+        # relays SIGTERM to its child)
+        subprocess.run(['sudo', '-n', 'kill', f'-{int(sig)}', '--', f'-{pgid}'],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+def terminate_group(process, name: str, timeout: float = 3):
+    """SIGTERM a child started with start_new_session, SIGKILL it after timeout, reap it"""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        if process.poll() is not None:
+            return
+        signal_group(process.pid, sig)
+        try:
+            process.wait(timeout)
+            return
+        except subprocess.TimeoutExpired:
+            pass
+    print_status(f"{name} (pid {process.pid}) did not exit", Fore.RED)
+
+
+class CaptureManager:
+    """Owns the airodump-ng child process and its output directory"""
+
+    def __init__(self, root: str = CAPTURE_ROOT):
+        self.root = root
+        self.run_dir = os.path.join(root, f'oui-prox-{os.getpid()}')
+        self.command = list(CAPTURE_COMMAND)
+        self.window = 0
+        self.process = None
+        self.lock = threading.RLock()
+        self.budget = DEFAULT_SETTINGS['capture_budget_mb'] * 1024 * 1024
+        self.rotations = 0
+        self.last_rotation = None
+
+    @property
+    def simulated(self) -> bool:
+        """True when a stand-in replaces airodump-ng (no radio to manage)"""
+        return self.command != CAPTURE_COMMAND
+
+    def window_dir(self, window: int = None) -> str:
+        return os.path.join(self.run_dir, f'w{self.window if window is None else window}')
+
+    @property
+    def prefix(self) -> str:
+        return os.path.join(self.window_dir(), CAPTURE_PREFIX)
+
+    @property
+    def csv_path(self) -> str:
+        return self.prefix + '-01.csv'
+
+    def start(self, airodump_args: list):
+        """Start airodump-ng in the next, emptied window; -w is added here"""
+        with self.lock:
+            self.stop()
+            self.window = (self.window + 1) % CAPTURE_WINDOWS
+            os.makedirs(self.window_dir(), exist_ok=True)
+            remove_dir_files(self.window_dir())
+            cmd = ['sudo'] if os.geteuid() != 0 and self.command == CAPTURE_COMMAND else []
+            cmd += self.command + ['-w', self.prefix] + airodump_args
+            self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                            start_new_session=True)
+            return self.process
+
+    def running(self) -> bool:
+        with self.lock:
+            return self.process is not None and self.process.poll() is None
+
+    def stop(self, timeout: float = 3):
+        """SIGTERM the capture's process group, SIGKILL it after timeout, reap it"""
+        with self.lock:
+            process, self.process = self.process, None
+            if process is not None:
+                terminate_group(process, 'airodump-ng', timeout)
+
+    def remove_files(self, window: int = None):
+        """Unlink the files of one window, or of all of them"""
+        with self.lock:
+            if window is None:
+                remove_dir_files(self.run_dir)
+            else:
+                remove_dir_files(self.window_dir(window))
+
+    def usage(self) -> dict:
+        """Size of the run directory's files and of the RAM disk"""
+        files = {}
+        for window in range(CAPTURE_WINDOWS):
+            try:
+                for entry in os.scandir(self.window_dir(window)):
+                    try:
+                        files[f'w{window}/{entry.name}'] = entry.stat().st_blocks * 512
+                    except FileNotFoundError:
+                        pass
+            except FileNotFoundError:
+                pass
+        usage = {
+            'dir': self.run_dir,
+            'bytes': sum(files.values()),
+            'budget': self.budget,
+            'files': files,
+            'filesystem': None,
+            'rotations': self.rotations,
+            'last_rotation': self.last_rotation
+        }
+        try:
+            st = os.statvfs(self.root)
+            usage['filesystem'] = {'total': st.f_blocks * st.f_frsize, 'free': st.f_bavail * st.f_frsize}
+        except OSError:
+            pass
+        return usage
+
+    def enforce_budget(self, budget_bytes: int) -> bool:
+        """True if the capture must rotate: its files take more than
+        budget_bytes, or the RAM disk is running low"""
+        self.budget = budget_bytes
+        usage = self.usage()
+        total = usage['bytes']
+        reason = None
+        if total > budget_bytes:
+            reason = f"capture output {total // 1024} KB over budget {budget_bytes // 1024} KB"
+        elif usage['filesystem'] and usage['filesystem']['free'] < CAPTURE_FS_RESERVE:
+            reason = f"RAM disk has {usage['filesystem']['free'] // 1024} KB free"
+        if reason:
+            self.rotations += 1
+            self.last_rotation = {'time': datetime.now().isoformat(), 'reason': reason}
             return True
         return False
-    except subprocess.CalledProcessError:
-        return False
 
-def cleanup_files():
-    """Clean up temporary files"""
-    subprocess.run(['sudo', 'rm', '-f', '/mnt/ram/OUI-Prox-01.csv'], check=True)
-    subprocess.run(['sudo', 'rm', '-f', '/mnt/ram/OUI-Prox-*.csv'], check=True)
-    subprocess.run(['sudo', 'rm', '-f', '/mnt/ram/OUI-Prox-*.cap'], check=True)
+    def remove_stale(self):
+        """Remove run directories left by daemons that are no longer running"""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        for name in names:
+            match = CAPTURE_DIR_REGEX.match(name)
+            if not match or int(match.group(1)) == os.getpid():
+                continue
+            try:
+                os.kill(int(match.group(1)), 0)
+                continue
+            except ProcessLookupError:
+                pass
+            except PermissionError:
+                continue
+            path = os.path.join(self.root, name)
+            remove_dir_files(path)
+            try:
+                os.rmdir(path)
+            except OSError:
+                pass
+
+    def close(self):
+        """Stop the capture and remove the run directory"""
+        with self.lock:
+            self.stop()
+            remove_dir_files(self.run_dir)
+            try:
+                os.rmdir(self.run_dir)
+            except OSError:
+                pass
+
+
+def remove_dir_files(path: str):
+    """Unlink everything below path; subdirectories are emptied and removed"""
+    try:
+        entries = list(os.scandir(path))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                remove_dir_files(entry.path)
+                os.rmdir(entry.path)
+            else:
+                os.unlink(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+capture = CaptureManager()
+
+# Evidence capture
+#
+# With --evidence DIR a tcpdump sidecar runs on the monitor interface next to
+# airodump-ng and keeps only frames to or from watched devices, in a ring of
+# EVIDENCE_FILES pcaps sized to --evidence-mb. Its capture filter is generated
+# from the MAC patterns of mac_entries and compiled by libpcap into the
+# kernel's socket filter, so other frames are dropped before they are copied
+# to user space. Patterns test the 802.11 receiver (addr1, offset 4) and
+# transmitter (addr2, offset 10) address: whole bytes are compared with
+# 1, 2 or 4 byte loads, partial bytes through a mask.
+#
+# All addr1 tests come before the addr2 tests: a load past the end of a frame
+# rejects it, and ACK and CTS frames end after addr1. MACs that were detected
+# through an SSID pattern or a watchlist are added as exact addresses for
+# EVIDENCE_EXTRA_TTL seconds. Above EVIDENCE_MAX_TERMS patterns, longer ones
+# are widened to their OUI, to keep the program under the kernel's limit of
+# 4096 instructions. The filter is regenerated when the lists change, at most
+# every EVIDENCE_REFILTER seconds. The sidecar is optional: if tcpdump fails,
+# it is retried after EVIDENCE_RETRY seconds and the detection loop goes on.
+
+EVIDENCE_COMMAND = ['tcpdump']
+EVIDENCE_FILES = 8
+EVIDENCE_EXTRA = 64
+EVIDENCE_EXTRA_TTL = 600
+EVIDENCE_MAX_TERMS = 120
+EVIDENCE_REFILTER = 30
+EVIDENCE_RETRY = 60
+EVIDENCE_SNAPLEN = 4096
+WLAN_ADDR_OFFSETS = (4, 10)  # addr1, addr2 in the 802.11 header
+
+
+def pattern_bytes(nibbles: list) -> tuple:
+    """(mask, value) per address byte of a parse_pattern nibble list,
+    without trailing bytes that match anything"""
+    masks, values = [], []
+    for allowed in nibbles:
+        low = min(allowed)
+        varying = 0
+        for n in allowed:
+            varying |= n ^ low
+        masks.append(0xF & ~varying)
+        values.append(low & masks[-1])
+    masks += [0] * (len(masks) % 2)
+    values += [0] * (len(values) % 2)
+    pairs = [(masks[i] << 4 | masks[i + 1], values[i] << 4 | values[i + 1]) for i in range(0, len(masks), 2)]
+    while pairs and not pairs[-1][0]:
+        pairs.pop()
+    return tuple(pairs)
+
+def bpf_address_test(pairs: tuple, offset: int) -> str:
+    """pcap-filter expression comparing one address field against (mask, value) pairs"""
+    tests = []
+    i = 0
+    while i < len(pairs):
+        left = len(pairs) - i
+        width = 4 if left >= 3 and i + 4 <= 6 else (2 if left >= 2 else 1)
+        chunk = list(pairs[i:i + width]) + [(0, 0)] * (width - left if width > left else 0)
+        mask = value = 0
+        for byte_mask, byte_value in chunk:
+            mask = mask << 8 | byte_mask
+            value = value << 8 | byte_value
+        load = f"wlan[{offset + i}:{width}]" if width > 1 else f"wlan[{offset + i}]"
+        if mask != (1 << 8 * width) - 1:
+            load += f" & 0x{mask:0{2 * width}x}"
+        tests.append(f"{load} = 0x{value:0{2 * width}x}")
+        i += width
+    return ' and '.join(tests)
+
+def term_covers(general: tuple, term: tuple) -> bool:
+    """True if every address matching term also matches general"""
+    return len(general) <= len(term) and all(
+        mask & term_mask == mask and term_value & mask == value
+        for (mask, value), (term_mask, term_value) in zip(general, term))
+
+def evidence_terms(mac_entries: dict, extra_macs=()) -> tuple:
+    """Byte patterns for the filter: MAC patterns of mac_entries plus extra
+    exact MACs; returns (terms, widened)"""
+    terms = set()
+    for key in mac_entries:
+        try:
+            kind, nibbles = parse_pattern(key)
+        except ValueError:
+            continue
+        if kind == 'mac':
+            terms.add(pattern_bytes(nibbles))
+    for mac in extra_macs:
+        terms.add(tuple((0xFF, b) for b in mac_bytes(mac)))
+    widened = False
+    if len(terms) > EVIDENCE_MAX_TERMS:
+        terms = {term[:3] for term in terms}
+        widened = True
+    # Trailing bytes that match anything add no test; a pattern left with
+    # none (all wildcards) cannot narrow the capture, so it is left out
+    terms = {term[:max([i + 1 for i, (mask, _) in enumerate(term) if mask], default=0)] for term in terms}
+    terms.discard(())
+    # A pattern that a shorter (or looser) one already matches adds nothing
+    kept = sorted(terms, key=len)
+    terms = [term for index, term in enumerate(kept)
+             if not any(term_covers(general, term) for general in kept[:index])]
+    return sorted(terms)[:EVIDENCE_MAX_TERMS], widened
+
+def bpf_filter(terms: list) -> str:
+    """One pcap-filter expression matching terms on addr1, then on addr2"""
+    return ' or '.join(f"({bpf_address_test(term, offset)})"
+                       for offset in WLAN_ADDR_OFFSETS for term in terms)
+
+
+class EvidenceCapture:
+    """Owns the tcpdump sidecar and its ring of pcap files"""
+
+    def __init__(self):
+        self.directory = None  # disabled
+        self.budget_mb = 32
+        self.command = list(EVIDENCE_COMMAND)
+        self.process = None
+        self.filter = None
+        self.terms = 0
+        self.widened = False
+        self.interface = None
+        self.started = 0
+        self.starts = 0
+        self.error = None
+        self.extra = {}  # MAC -> last detection, for MACs no MAC pattern covers
+        self.lock = threading.RLock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    def note(self, mac: str):
+        """Keep frames of a detected MAC (cheap; the filter catches up in ensure)"""
+        if self.enabled:
+            self.extra[mac.upper()] = time.time()
+
+    def _extra_macs(self, mac_entries: dict) -> list:
+        now = time.time()
+        matcher = get_matcher(mac_entries)
+        for mac, seen in list(self.extra.items()):
+            if now - seen > EVIDENCE_EXTRA_TTL or matcher.match_mac(mac) or not EXACT_MAC_REGEX.fullmatch(
+                    MAC_SEPARATORS.sub('', mac)):
+                self.extra.pop(mac, None)
+        if len(self.extra) > EVIDENCE_EXTRA:
+            for mac in sorted(self.extra, key=self.extra.get)[:-EVIDENCE_EXTRA]:
+                self.extra.pop(mac, None)
+        return sorted(self.extra)
+
+    def ensure(self, interface: str, mac_entries: dict):
+        """Keep the sidecar running on interface with a filter for mac_entries
+        (called once per cycle)"""
+        with self.lock:
+            terms, widened = evidence_terms(mac_entries, self._extra_macs(mac_entries))
+            expression = bpf_filter(terms)
+            now = time.time()
+            if self.process is not None and self.process.poll() is not None:
+                self.error = f"{self.command[0]} exited (status {self.process.returncode})"
+                reason = self._last_error()
+                if reason:
+                    self.error += f": {reason}"
+                print_status(f"Evidence capture stopped: {self.error}", Fore.RED)
+                self.process = None
+            if self.process is not None:
+                if interface == self.interface and (expression == self.filter or
+                                                    now - self.started < EVIDENCE_REFILTER):
+                    return
+                self.stop()
+            elif now - self.started < EVIDENCE_RETRY:
+                return
+            self.terms, self.widened = len(terms), widened
+            if terms:
+                self.start(interface, expression)
+            else:
+                self.filter = None
+
+    def start(self, interface: str, expression: str):
+        with self.lock:
+            os.makedirs(self.directory, exist_ok=True)
+            file_mb = max(1, self.budget_mb // EVIDENCE_FILES)
+            cmd = ['sudo'] if os.geteuid() != 0 and self.command == EVIDENCE_COMMAND else []
+            cmd += self.command + ['-i', interface, '-n', '-U', '-s', str(EVIDENCE_SNAPLEN), '-Z', 'root',
+                                   '-C', str(file_mb), '-W', str(EVIDENCE_FILES),
+                                   '-w', os.path.join(self.directory, 'evidence.pcap'), expression]
+            self.started = time.time()
+            self.interface = interface
+            self.filter = expression
+            try:
+                with open(os.path.join(self.directory, 'tcpdump.log'), 'w') as stderr:
+                    self.process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=stderr,
+                                                    start_new_session=True)
+            except OSError as e:
+                self.error = f"could not start {self.command[0]}: {e}"
+                print_status(f"Evidence capture: {self.error}", Fore.RED)
+                return
+            self.starts += 1
+            self.error = None
+            print_status(f"Evidence capture on {interface}: {self.terms} patterns"
+                         f"{' (widened to OUIs)' if self.widened else ''}", Fore.CYAN)
+
+    def stop(self, timeout: float = 3):
+        with self.lock:
+            process, self.process = self.process, None
+            if process is not None:
+                terminate_group(process, 'tcpdump', timeout)
+
+    def _last_error(self) -> str:
+        try:
+            with open(os.path.join(self.directory, 'tcpdump.log')) as f:
+                lines = [line.strip() for line in f if line.strip()]
+        except OSError:
+            return ''
+        return lines[-1] if lines else ''
+
+    def info(self) -> dict:
+        files = {}
+        if self.enabled:
+            try:
+                for entry in os.scandir(self.directory):
+                    if entry.name.startswith('evidence.pcap'):
+                        try:
+                            files[entry.name] = entry.stat().st_size
+                        except FileNotFoundError:
+                            pass
+            except FileNotFoundError:
+                pass
+        with self.lock:
+            return {
+                'enabled': self.enabled,
+                'directory': self.directory,
+                'running': self.process is not None and self.process.poll() is None,
+                'interface': self.interface,
+                'budget_mb': self.budget_mb,
+                'patterns': self.terms,
+                'widened': self.widened,
+                'extra_macs': sorted(self.extra),
+                'filter': self.filter,
+                'starts': self.starts,
+                'error': self.error,
+                'files': dict(sorted(files.items())),
+                'bytes': sum(files.values())
+            }
+
+
+evidence = EvidenceCapture()
 
 def setup_interface(interface="wlan0"):
     """Setup wireless interface in monitor mode"""
-    if not check_wlan0_exists():
+    if not check_monitor_mode(interface):
         print_status(f"Setting up {interface}...", Fore.YELLOW)
         subprocess.run(['sudo', 'ifconfig', interface, 'down'], check=True)
-        subprocess.run(['sudo', 'airmon-ng', 'start', 'wlan0'], check=True)
+        subprocess.run(['sudo', 'airmon-ng', 'start', interface], check=True)
         time.sleep(2)
 
 def find_full_mac(oui: str, csv_content: list) -> str:
@@ -238,12 +1079,10 @@ def find_full_mac(oui: str, csv_content: list) -> str:
         
         if len(csv_mac) >= 6 and csv_mac.startswith(oui_clean[:6]):
             formatted_mac = ':'.join([csv_mac[i:i+2] for i in range(0, 12, 2)])
-            if verbose_mode:
-                print_status(f"DEBUG: OUI match found - OUI: {oui}, Full MAC: {formatted_mac}", Fore.CYAN)
+            debug_event('oui', "OUI match found - OUI: %s, Full MAC: %s", oui, formatted_mac)
             return formatted_mac
     
-    if verbose_mode:
-        print_status(f"DEBUG: No full MAC found for OUI: {oui}", Fore.YELLOW)
+    debug_event('oui', "No full MAC found for OUI: %s", oui)
     return None
 
 def execute_command(command: str):
@@ -256,6 +1095,185 @@ def execute_command(command: str):
         clear_line()
         print_status(f"Command execution error: {e}", Fore.RED)
 
+# Built-in notification actions
+#
+# A list entry's command may name a built-in action instead of a shell
+# command:
+#
+#   unix:/mnt/ram/message_socket 2|0| {name} Detected |red|black|0.07||0
+#   fifo:/mnt/ram/alerts {mac} {name} ch {channel}
+#   webhook:http://127.0.0.1:8080/alert {name} seen on {list}
+#
+# {mac}, {name}, {channel} and {list} are filled in per detection. Actions
+# are queued while a CSV pass runs and delivered together at the end of it:
+# one write per socket or FIFO (one line per detection) and one JSON POST per
+# webhook. Sockets, FIFOs and HTTP connections stay open between cycles.
+# Anything else in the command column still runs through the shell.
+
+ACTION_KINDS = ('unix', 'fifo', 'webhook')
+TEMPLATE_FIELDS = re.compile(r'\{(mac|name|channel|list)\}')
+
+
+def parse_action(command: str):
+    """(kind, target, template) for a built-in action, None for a shell command"""
+    kind, sep, rest = command.strip().partition(':')
+    if not sep or kind not in ACTION_KINDS:
+        return None
+    target, _, template = rest.strip().partition(' ')
+    if not target:
+        raise ValueError(f"{kind} action without a target: {command}")
+    if kind == 'webhook' and not target.startswith(('http://', 'https://')):
+        raise ValueError(f"webhook target must be an http(s) URL: {target}")
+    return kind, target, template.strip()
+
+def render_template(template: str, detection: dict) -> str:
+    """Fill {mac}, {name}, {channel} and {list}; other braces are left alone"""
+    return TEMPLATE_FIELDS.sub(lambda m: str(detection.get(m.group(1), '')), template)
+
+
+class ActionDispatcher:
+    """Batches built-in actions per CSV pass over persistent connections"""
+
+    def __init__(self):
+        self.lock = threading.Lock()  # guards pending only; never held during I/O
+        self.send_lock = threading.Lock()  # one delivery at a time over the connections
+        self.pending = []
+        self.unix_sockets = {}
+        self.fifos = {}
+        self.http = {}
+
+    def queue(self, command: str, detection: dict, trace: dict = None) -> bool:
+        """Queue a built-in action; False if command is a shell command"""
+        try:
+            action = parse_action(command)
+        except ValueError as e:
+            print_status(f"Action error: {e}", Fore.RED)
+            return True
+        if action is None:
+            return False
+        with self.lock:
+            self.pending.append((action, detection, trace))
+        return True
+
+    def flush(self):
+        """Deliver everything queued since the last flush"""
+        with self.lock:
+            pending, self.pending = self.pending, []
+        batches = {}
+        for (kind, target, template), detection, trace in pending:
+            batches.setdefault((kind, target), []).append((template, detection, trace))
+        with self.send_lock:
+            for (kind, target), items in batches.items():
+                start = time.time()
+                try:
+                    if kind == 'webhook':
+                        self._post_webhook(target, items)
+                    else:
+                        data = ''.join(render_template(template, detection) + '\n'
+                                       for template, detection, _ in items).encode()
+                        if kind == 'unix':
+                            self._send_unix(target, data)
+                        else:
+                            self._write_fifo(target, data)
+                    debug_event('action', "%s action %s: %d detection(s)", kind, target, len(items))
+                except (OSError, ValueError) as e:
+                    clear_line()
+                    print_status(f"{kind} action {target} failed: {e}", Fore.RED)
+                end = time.time()
+                for _, _, trace in items:
+                    if trace is not None:
+                        trace['command_start'] = start
+                        trace['command_end'] = end
+
+    def _send_unix(self, path: str, data: bytes):
+        # The peer may close after each message; reconnect once on failure
+        for attempt in (0, 1):
+            sock = self.unix_sockets.get(path)
+            try:
+                if sock is None:
+                    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+                    sock.settimeout(2)
+                    sock.connect(path)
+                    self.unix_sockets[path] = sock
+                sock.sendall(data)
+                return
+            except OSError:
+                self.unix_sockets.pop(path, None)
+                if sock is not None:
+                    sock.close()
+                if attempt:
+                    raise
+
+    def _write_fifo(self, path: str, data: bytes):
+        # O_NONBLOCK: with no reader the open fails (ENXIO) instead of hanging
+        for attempt in (0, 1):
+            fd = self.fifos.get(path)
+            try:
+                if fd is None:
+                    fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK | os.O_APPEND)
+                    self.fifos[path] = fd
+                os.write(fd, data)
+                return
+            except OSError:
+                self.fifos.pop(path, None)
+                if fd is not None:
+                    os.close(fd)
+                if attempt:
+                    raise
+
+    def _post_webhook(self, url: str, items: list):
+        import http.client
+        from urllib.parse import urlsplit
+        parts = urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        detections = []
+        for template, detection, _ in items:
+            payload = dict(detection)
+            if template:
+                payload['message'] = render_template(template, detection)
+            detections.append(payload)
+        body = json.dumps({'sensor': socket.gethostname(), 'detections': detections}).encode()
+        headers = {'Content-Type': 'application/json'}
+        for attempt in (0, 1):
+            conn = self.http.get(url)
+            try:
+                if conn is None:
+                    conn_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                  else http.client.HTTPConnection)
+                    conn = conn_class(parts.netloc, timeout=5)
+                    self.http[url] = conn
+                conn.request('POST', path, body, headers)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                self.http.pop(url, None)
+                if conn is not None:
+                    conn.close()
+                if attempt:
+                    raise OSError(str(e) or type(e).__name__) from e
+                continue
+            if response.status >= 400:
+                raise OSError(f"HTTP {response.status}")
+            return
+
+    def close(self):
+        with self.send_lock:
+            for sock in self.unix_sockets.values():
+                sock.close()
+            for fd in self.fifos.values():
+                os.close(fd)
+            for conn in self.http.values():
+                conn.close()
+            self.unix_sockets.clear()
+            self.fifos.clear()
+            self.http.clear()
+
+
+action_dispatcher = ActionDispatcher()
+
+
 def add_ignore(mac: str, duration_minutes: int):
     """Add a device to ignore list"""
     until_time = datetime.now() + timedelta(minutes=duration_minutes)
@@ -281,9 +1299,378 @@ def can_alert(mac: str) -> bool:
         if (now - last_alerts[mac]).total_seconds() < ALERT_COOLDOWN:
             return False
     last_alerts[mac] = now
+
+    # Cooldowns that ran out are as good as absent; keep the dict bounded
+    if len(last_alerts) > 10000:
+        cutoff = now - timedelta(seconds=ALERT_COOLDOWN)
+        for old_mac in [m for m, when in last_alerts.items() if when < cutoff]:
+            del last_alerts[old_mac]
+    return True
+
+HEX_DIGITS = '0123456789ABCDEF'
+MAC_SEPARATORS = re.compile(r'[:\-.]')
+MAC_REGEX = re.compile(r'(?:[0-9A-F]{2}[:-]){5}(?:[0-9A-F]{2})')
+
+
+def parse_pattern(pattern: str):
+    """Parse a list pattern into ('ssid', glob) or ('mac', nibbles).
+
+    MAC patterns become a list of allowed-value sets, one per hex nibble,
+    with trailing wildcards dropped so that any prefix length works:
+
+        60:3E:CA                  OUI (MA-L, /24)
+        70:B3:D5:1                MA-M /28
+        70:B3:D5:12:3             MA-S /36 (or any other prefix)
+        70:B3:D5:12:30:00/28      prefix length in bits
+        00:11:22:00:00:00/FF:FF:F0:00:00:00   explicit mask
+        60:3E:?A:*                ? or X for any nibble, * for "any rest"
+        ssid:DJI-*                glob on probed/beaconed ESSIDs
+
+    Raises ValueError for anything else.
+    """
+    if pattern[:5].lower() == 'ssid:':
+        glob = pattern[5:]
+        if not glob:
+            raise ValueError(f"empty SSID pattern: {pattern}")
+        return 'ssid', glob
+
+    pattern = pattern.upper()
+    address, _, suffix = pattern.partition('/')
+    address = MAC_SEPARATORS.sub('', address)
+    if address.endswith('*'):
+        address = address[:-1]
+    if not address or len(address) > 12 or not all(c in HEX_DIGITS or c in '?X' for c in address):
+        raise ValueError(f"not a MAC pattern: {pattern}")
+
+    mask = [0xF if c in HEX_DIGITS else 0 for c in address] + [0] * (12 - len(address))
+    value = [HEX_DIGITS.index(c) if c in HEX_DIGITS else 0 for c in address] + [0] * (12 - len(address))
+
+    if suffix.isdigit():
+        bits = int(suffix)
+        if not 1 <= bits <= 48:
+            raise ValueError(f"prefix length out of range: {pattern}")
+        mask = [min(max(bits - 4 * i, 0), 4) for i in range(12)]
+        mask = [(0xF0 >> m) & 0xF for m in mask]
+    elif suffix:
+        suffix = MAC_SEPARATORS.sub('', suffix)
+        if len(suffix) != 12 or not all(c in HEX_DIGITS for c in suffix):
+            raise ValueError(f"bad mask in pattern: {pattern}")
+        mask = [HEX_DIGITS.index(c) for c in suffix]
+
+    nibbles = [frozenset(n for n in range(16) if n & m == v & m) for v, m in zip(value, mask)]
+    while nibbles and len(nibbles[-1]) == 16:
+        nibbles.pop()
+    if not nibbles:
+        raise ValueError(f"pattern matches every MAC: {pattern}")
+    return 'mac', nibbles
+
+
+class PatternMatcher:
+    """All list patterns compiled into one nibble trie plus one SSID regex.
+
+    A MAC is matched by walking its 12 nibbles once, so the cost does not
+    grow with the number of patterns. Wildcard nibbles are stored on a
+    separate '?' edge and followed alongside the exact one.
+    """
+
+    WILDCARD = '?'
+
+    def __init__(self, mac_entries: dict):
+        self.root = {}
+        self.ssid_keys = []
+        self.ssid_regex = None
+        self.invalid = []
+        ssid_parts = []
+
+        for key in mac_entries:
+            try:
+                kind, value = parse_pattern(key)
+            except ValueError:
+                self.invalid.append(key)
+                continue
+            if kind == 'ssid':
+                ssid_parts.append(f"(?P<p{len(self.ssid_keys)}>{fnmatch.translate(value)})")
+                self.ssid_keys.append(key)
+            else:
+                self._insert(key, value)
+
+        if ssid_parts:
+            self.ssid_regex = re.compile('|'.join(ssid_parts), re.IGNORECASE)
+
+    def _insert(self, key, nibbles):
+        nodes = [self.root]
+        for allowed in nibbles:
+            edges = [self.WILDCARD] if len(allowed) == 16 else [HEX_DIGITS[n] for n in sorted(allowed)]
+            nodes = [node.setdefault(edge, {}) for node in nodes for edge in edges]
+        for node in nodes:
+            # '' holds (specificity, key) for patterns ending at this node
+            node.setdefault('', []).append((len(nibbles), key))
+
+    def match_mac(self, mac: str) -> list:
+        """Return keys of all patterns matching a MAC, most specific first"""
+        found = []
+        nodes = [self.root]
+        for c in MAC_SEPARATORS.sub('', mac.upper())[:12]:
+            nodes = [child for node in nodes
+                     for child in (node.get(c), node.get(self.WILDCARD)) if child is not None]
+            if not nodes:
+                break
+            for node in nodes:
+                found.extend(node.get('', ()))
+        found.sort(reverse=True)
+        return [key for _, key in found]
+
+    def match_ssid(self, ssid: str):
+        """Return the key of the first SSID pattern matching, or None"""
+        if self.ssid_regex is None or not ssid:
+            return None
+        m = self.ssid_regex.match(ssid)
+        if m is None:
+            return None
+        return self.ssid_keys[int(m.lastgroup[1:])]
+
+
+_compiled_matcher = (None, None)
+
+def get_matcher(mac_entries: dict) -> PatternMatcher:
+    """Return the compiled matcher for mac_entries, building it on first use"""
+    global _compiled_matcher
+    entries, matcher = _compiled_matcher
+    if entries is not mac_entries:
+        matcher = PatternMatcher(mac_entries)
+        for key in matcher.invalid:
+            print_status(f"Ignoring unsupported pattern: {key}", Fore.YELLOW)
+        _compiled_matcher = (mac_entries, matcher)
+    return matcher
+
+# Exact-MAC watchlists
+#
+# Very large lists of exact MACs are compiled offline ("oui-detect.py
+# compile-watchlist") into one file that is mmap'd at runtime instead of
+# being loaded through read_mac_list:
+#
+#   header      magic, entry count, Bloom filter bits, hash count, metadata length
+#   metadata    JSON (name, command, false-positive rate), padded to 8 bytes
+#   bloom       Bloom filter bit array
+#   entries     sorted 6-byte big-endian MACs
+#
+# A lookup tests the Bloom filter first; only its hits (real entries plus the
+# configured false-positive rate) binary-search the packed array. Pages are
+# read on demand, so a million-entry list needs a few MB of RAM.
+
+WATCHLIST_MAGIC = b'OUIWL\x00\x01\x00'
+WATCHLIST_HEADER = struct.Struct('<8sQQII')
+WATCHLIST_ENTRY = 6
+EXACT_MAC_REGEX = re.compile(r'[0-9A-F]{12}')
+watchlists = []
+
+
+def mac_bytes(mac: str):
+    """6-byte form of an exact MAC (any of : - or no separators), None otherwise"""
+    digits = mac.replace(':', '').replace('-', '').upper()
+    if not EXACT_MAC_REGEX.fullmatch(digits):
+        return None
+    return bytes.fromhex(digits)
+
+def bloom_positions(key: bytes, bits: int, hashes: int):
+    """Bit positions of key (double hashing over one blake2b digest)"""
+    h1, h2 = struct.unpack('<QQ', hashlib.blake2b(key, digest_size=16).digest())
+    h2 |= 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+def bloom_size(count: int, fp_rate: float) -> tuple:
+    """(bits, hashes) for count entries at the given false-positive rate"""
+    import math
+    bits = max(64, math.ceil(-count * math.log(fp_rate) / math.log(2) ** 2))
+    bits = (bits + 63) // 64 * 64
+    hashes = max(1, round(bits / max(count, 1) * math.log(2)))
+    return bits, hashes
+
+def write_watchlist(path: str, macs: set, fp_rate: float, name: str, command: str = ''):
+    """Write a compiled watchlist of 6-byte MACs"""
+    bits, hashes = bloom_size(len(macs), fp_rate)
+    bloom = bytearray(bits // 8)
+    for mac in macs:
+        for pos in bloom_positions(mac, bits, hashes):
+            bloom[pos >> 3] |= 1 << (pos & 7)
+    metadata = json.dumps({'name': name, 'command': command, 'fp_rate': fp_rate}).encode()
+    metadata += b' ' * (-(WATCHLIST_HEADER.size + len(metadata)) % 8)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(WATCHLIST_HEADER.pack(WATCHLIST_MAGIC, len(macs), bits, hashes, len(metadata)))
+        f.write(metadata)
+        f.write(bloom)
+        f.write(b''.join(sorted(macs)))
+    os.replace(tmp_path, path)
+
+
+class Watchlist:
+    """A compiled watchlist, mmap'd read-only"""
+
+    def __init__(self, path: str):
+        import mmap
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.map) < WATCHLIST_HEADER.size:
+            raise ValueError(f"{path}: not a compiled watchlist")
+        magic, self.count, self.bits, self.hashes, meta_len = WATCHLIST_HEADER.unpack_from(self.map, 0)
+        if magic != WATCHLIST_MAGIC:
+            raise ValueError(f"{path}: not a compiled watchlist")
+        metadata = json.loads(self.map[WATCHLIST_HEADER.size:WATCHLIST_HEADER.size + meta_len])
+        self.name = metadata['name']
+        self.command = metadata.get('command', '')
+        self.fp_rate = metadata.get('fp_rate')
+        self.bloom_offset = WATCHLIST_HEADER.size + meta_len
+        self.entries_offset = self.bloom_offset + self.bits // 8
+        if len(self.map) != self.entries_offset + self.count * WATCHLIST_ENTRY:
+            raise ValueError(f"{path}: truncated watchlist")
+        self.lookups = 0
+        self.bloom_hits = 0
+        self.confirmed = 0
+
+    def __contains__(self, mac: str) -> bool:
+        key = mac_bytes(mac)
+        if key is None:
+            return False
+        self.lookups += 1
+        for pos in bloom_positions(key, self.bits, self.hashes):
+            if not self.map[self.bloom_offset + (pos >> 3)] >> (pos & 7) & 1:
+                return False
+        self.bloom_hits += 1
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self.entries_offset + mid * WATCHLIST_ENTRY
+            value = self.map[start:start + WATCHLIST_ENTRY]
+            if value == key:
+                self.confirmed += 1
+                return True
+            if value < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return False
+
+    def info(self) -> dict:
+        return {
+            'name': self.name,
+            'path': self.path,
+            'entries': self.count,
+            'fp_rate': self.fp_rate,
+            'bloom_bytes': self.bits // 8,
+            'lookups': self.lookups,
+            'bloom_hits': self.bloom_hits,
+            'confirmed': self.confirmed
+        }
+
+
+def load_watchlists(paths: list) -> list:
+    """Open compiled watchlists, skipping (and reporting) unreadable ones"""
+    loaded = []
+    for path in paths or []:
+        try:
+            loaded.append(Watchlist(path))
+        except (OSError, ValueError, KeyError) as e:
+            print_status(f"Error loading watchlist {path}: {e}", Fore.RED)
+    return loaded
+
+def csv_ssids(parts: list) -> list:
+    """ESSIDs in an airodump-ng CSV row: probed ESSIDs for stations, the
+    ESSID column for access points"""
+    if len(parts) < 7:
+        return []
+    if is_station_row(parts):
+        return [p for p in parts[6:] if p]
+    if len(parts) >= 14:
+        return [parts[13]] if parts[13] else []
+    return []
+
+# Proximity rules
+#
+# A list file can carry one directive line with rules on the airodump-ng
+# power column, applied to every entry of that list:
+#
+#     #! min_rssi=-70 rising=3 dwell=2
+#
+#   min_rssi  power (dBm) must be at least this; unknown power (-1) fails
+#   rising    power must have risen by this many dB over the last readings
+#   dwell     the device must have been seen in this many updates in a row
+#
+# Rules are checked in check_mac_match before the alert cooldown, so rows
+# that fail them cost no logging, command or cooldown.
+
+LIST_RULES = {'min_rssi': int, 'rising': int, 'dwell': int}
+PROXIMITY_READINGS = 5
+PROXIMITY_GAP = 120  # seconds without an update that restarts dwell counting
+proximity_state = {}
+
+
+def parse_rules_line(line: str) -> dict:
+    """Parse a '#! key=value ...' directive; raises ValueError on bad rules"""
+    rules = {}
+    for item in line.strip()[2:].split():
+        key, _, value = item.partition('=')
+        if key not in LIST_RULES:
+            raise ValueError(f"unknown rule: {key}")
+        try:
+            rules[key] = LIST_RULES[key](value)
+        except ValueError:
+            raise ValueError(f"bad value for {key}: {value}")
+    return rules
+
+def format_rules_line(rules: dict) -> str:
+    return '#! ' + ' '.join(f"{key}={rules[key]}" for key in LIST_RULES if key in rules) + '\n'
+
+def is_station_row(parts: list) -> bool:
+    """Station rows have a BSSID or "(not associated)" in column 5"""
+    if len(parts) < 6:
+        return False
+    bssid = parts[5].strip()
+    return bssid.lower() == '(not associated)' or MAC_REGEX.fullmatch(bssid.upper()) is not None
+
+def row_power(parts: list):
+    """Power column of an airodump-ng CSV row, None if missing or unknown (-1)"""
+    column = 3 if is_station_row(parts) else 8
+    try:
+        power = int(parts[column])
+    except (IndexError, ValueError):
+        return None
+    return None if power == -1 else power
+
+def proximity_ok(mac: str, rules: dict, parts: list) -> bool:
+    """Record this sighting and check it against a list's proximity rules"""
+    if not rules:
+        return True
+    now = time.time()
+    power = row_power(parts)
+
+    state = proximity_state.get(mac)
+    if state is None or now - state['last'] > PROXIMITY_GAP:
+        state = proximity_state[mac] = {'seen': 0, 'last': now, 'powers': deque(maxlen=PROXIMITY_READINGS)}
+    state['seen'] += 1
+    state['last'] = now
+    if power is not None:
+        state['powers'].append(power)
+
+    if len(proximity_state) > 10000:
+        for old_mac in [m for m, s in proximity_state.items() if now - s['last'] > PROXIMITY_GAP]:
+            del proximity_state[old_mac]
+
+    if 'min_rssi' in rules and (power is None or power < rules['min_rssi']):
+        return False
+    if 'dwell' in rules and state['seen'] < rules['dwell']:
+        return False
+    if 'rising' in rules:
+        powers = state['powers']
+        if len(powers) < 2 or powers[-1] - min(powers) < rules['rising']:
+            return False
     return True
 
-def check_mac_match(line: str, mac_entries: dict, csv_content: list) -> list:
+def check_mac_match(line: str, mac_entries: dict, csv_content: list, apply_rules: bool = True,
+                    seen: set = None) -> list:
+    """Matches of one CSV row that may alert now. MACs that matched (and
+    passed the proximity rules) are added to seen even during their cooldown"""
     matches = []
     line = line.upper()
     
@@ -294,145 +1681,1181 @@ def check_mac_match(line: str, mac_entries: dict, csv_content: list) -> list:
         if mac in line or data['oui'] in line:
             return []
             
+    matcher = get_matcher(mac_entries)
+    found_macs = [mac.upper() for mac in MAC_REGEX.findall(line)]
     
-    parts = [part.strip() for part in re.split(r'[,\s]+', line) if part.strip()]
-    
-    mac_pattern = re.compile(r'(?:[0-9A-F]{2}[:-]){5}(?:[0-9A-F]{2})')
-    found_macs = [mac.upper() for mac in mac_pattern.findall(line)]
+    debug_event('row', "Found MACs in line: %s", found_macs)
     
-    if verbose_mode:
-        print_status(f"DEBUG: Found MACs in line: {found_macs}", Fore.CYAN)
-    
-    for mac_pattern, entry in mac_entries.items():
-        mac_pattern = mac_pattern.upper()
-        if verbose_mode:
-            print_status(f"DEBUG: Checking pattern: {mac_pattern}", Fore.CYAN)
-        
-        if len(mac_pattern) == 17:
-            if mac_pattern in found_macs:
-                if verbose_mode:
-                    print_status(f"DEBUG: Full MAC match found: {mac_pattern}", Fore.CYAN)
-                if can_alert(mac_pattern):
-                    matches.append((entry['name'], mac_pattern, entry['command'], entry['source_file']))
-        
-        elif len(mac_pattern) == 8:
-            oui_clean = mac_pattern[:8].replace(':', '').upper()
-            for found_mac in found_macs:
-                found_mac_clean = found_mac.replace(':', '').upper()
-                if found_mac_clean.startswith(oui_clean[:6]):
-                    if can_alert(found_mac):
-                        if verbose_mode:
-                            print_status(f"DEBUG: OUI match found - Pattern: {mac_pattern}, MAC: {found_mac}", Fore.CYAN)
-                        matches.append((entry['name'], found_mac, entry['command'], entry['source_file']))
+    parts = [part.strip() for part in line.split(',')]
+    for found_mac in found_macs:
+        keys = matcher.match_mac(found_mac)
+        if not keys:
+            continue
+        entry = mac_entries[keys[0]]
+        if apply_rules and not proximity_ok(found_mac, entry.get('rules'), parts):
+            debug_event('proximity', "%s matched %s but failed proximity rules", found_mac, keys[0])
+            continue
+        if seen is not None:
+            seen.add(found_mac)
+        if can_alert(found_mac):
+            debug_event('match', "Pattern match found - Pattern: %s, MAC: %s", keys[0], found_mac)
+            matches.append((entry['name'], found_mac, entry['command'], entry['source_file']))
+
+    for found_mac in found_macs:
+        for watchlist in watchlists:
+            if found_mac not in watchlist:
+                continue
+            if seen is not None:
+                seen.add(found_mac)
+            if can_alert(found_mac):
+                debug_event('match', "Watchlist match found - %s: %s", watchlist.name, found_mac)
+                matches.append((watchlist.name, found_mac, watchlist.command, watchlist.path))
+                break
+
+    if matcher.ssid_regex is not None and found_macs:
+        for ssid in csv_ssids(parts):
+            key = matcher.match_ssid(ssid)
+            if not key:
+                continue
+            entry = mac_entries[key]
+            if apply_rules and not proximity_ok(found_macs[0], entry.get('rules'), parts):
+                break
+            if seen is not None:
+                seen.add(found_macs[0])
+            if can_alert(found_macs[0]):
+                debug_event('match', "SSID match found - Pattern: %s, SSID: %s", key, ssid)
+                matches.append((entry['name'], found_macs[0], entry['command'], entry['source_file']))
+                break
     
     return matches
 
+def parse_list_line(line: str):
+    """Parse one list file line into (mac, name, command), or None if it is
+    blank, a comment, or malformed"""
+    line = line.strip()
+    if not line or line.startswith('#'):
+        return None
+
+    # Find the first space for MAC
+    first_space_idx = line.find(' ')
+    if first_space_idx == -1:
+        return None
+
+    mac = line[:first_space_idx]
+    if mac[:5].lower() != 'ssid:':  # SSID patterns keep their case
+        mac = mac.upper()
+    rest = line[first_space_idx + 1:].lstrip()
+
+    # Find the closing quote of the name
+    if rest.startswith('"'):
+        name_end = rest[1:].find('"')
+        if name_end == -1:
+            return None
+        name = rest[1:name_end + 1]
+        command = rest[name_end + 2:].lstrip()
+    else:
+        # Find the next space for non-quoted names
+        next_space_idx = rest.find(' ')
+        if next_space_idx == -1:
+            return None
+        name = rest[:next_space_idx]
+        command = rest[next_space_idx + 1:].lstrip()
+
+    return mac, name, command
+
 def read_mac_list(filenames: list) -> dict:
     """Read MAC/OUI entries from files with proper space handling"""
     mac_entries = {}
     for filename in filenames:
         try:
+            # One rules dict per file, shared by its entries (see parse_rules_line)
+            rules = {}
             with open(filename, 'r') as f:
                 for line in f:
-                    line = line.strip()
-                    if line and not line.startswith('#'):
-                        # Find the first space for MAC
-                        first_space_idx = line.find(' ')
-                        if first_space_idx == -1:
-                            continue
-                            
-                        mac = line[:first_space_idx].upper()
-                        rest = line[first_space_idx + 1:].lstrip()
-                        
-                        # Find the closing quote of the name
-                        if rest.startswith('"'):
-                            name_end = rest[1:].find('"')
-                            if name_end == -1:
-                                continue
-                            name = rest[1:name_end + 1]
-                            command = rest[name_end + 2:].lstrip()
-                        else:
-                            # Find the next space for non-quoted names
-                            next_space_idx = rest.find(' ')
-                            if next_space_idx == -1:
-                                continue
-                            name = rest[:next_space_idx]
-                            command = rest[next_space_idx + 1:].lstrip()
-                        
-                        mac_entries[mac] = {
-                            'name': name,
-                            'command': command,
-                            'source_file': filename
-                        }
+                    if line.startswith('#!'):
+                        try:
+                            rules.update(parse_rules_line(line))
+                        except ValueError as e:
+                            print_status(f"{filename}: {e}", Fore.RED)
+                        continue
+                    parsed = parse_list_line(line)
+                    if parsed is None:
+                        continue
+                    mac, name, command = parsed
+                    mac_entries[mac] = {
+                        'name': name,
+                        'command': command,
+                        'source_file': filename,
+                        'rules': rules
+                    }
                         
         except FileNotFoundError:
             print_status(f"File not found: {filename}", Fore.RED)
     
     return mac_entries
 
-def process_csv(mac_entries: dict):
-    """Process CSV file for matches with channel information"""
+# Detection latency tracing
+#
+# Every detection made by process_csv carries a trace of wall-clock times:
+# first_seen (airodump "First time seen"), csv_flush (CSV mtime), parsed,
+# matched, logged, command_start and command_end. Latencies relative to
+# first_seen are kept per list and capture setting for /api/latency.
+
+TRACE_STAGES = ['csv_flush', 'parsed', 'matched', 'logged', 'command_start', 'command_end']
+TRACE_SAMPLES = 1000
+latency_samples = {}
+
+
+def csv_first_seen(csv_line: str):
+    """Return the "First time seen" column of an airodump-ng CSV row as epoch seconds"""
+    parts = csv_line.split(',')
+    if len(parts) < 2:
+        return None
     try:
-        if not os.path.exists('/mnt/ram/OUI-Prox-01.csv'):
+        return time.mktime(time.strptime(parts[1].strip(), '%Y-%m-%d %H:%M:%S'))
+    except ValueError:
+        return None
+
+def record_trace(trace: dict, list_name: str, capture_time, channel_count: int):
+    """Store the stage latencies of one finished detection trace"""
+    first_seen = trace.get('first_seen')
+    if first_seen is None:
+        return
+    sample = {stage: trace[stage] - first_seen for stage in TRACE_STAGES if stage in trace}
+    key = (list_name, capture_time, channel_count)
+    samples = latency_samples.get(key)
+    if samples is None:
+        samples = latency_samples.setdefault(key, deque(maxlen=TRACE_SAMPLES))
+    samples.append(sample)
+
+def percentiles(values: list, points=(50, 90, 99)) -> dict:
+    """Nearest-rank percentiles of values"""
+    if not values:
+        return {}
+    values = sorted(values)
+    return {f"p{p}": round(values[min(len(values) - 1, max(0, -(-p * len(values) // 100) - 1))], 3)
+            for p in points}
+
+# Detection statistics
+#
+# log_detection feeds every detection into fixed-size rings of per-minute
+# (last 24 hours) and per-hour (last 30 days) buckets. Each bucket holds a
+# total and counts by list, OUI and channel, so /api/stats answers from at
+# most a few hundred buckets however long the log is. The rings are seeded
+# from the detection log at startup.
+
+STATS_RESOLUTIONS = {'minute': (60, 24 * 60), 'hour': (3600, 30 * 24)}
+STATS_DIMENSIONS = ('list', 'oui', 'channel')
+LOG_LINE_REGEX = re.compile(r'^\[(\d{4}-\d\d-\d\d \d\d:\d\d)\] \| ([0-9A-Fa-f:]{17}) \| .* \| '
+                            r'Ch: ([^|]*) \| List: (\S+)')
+
+
+class DetectionStats:
+    """Bucketed detection counts by list, OUI and channel"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.rings = {resolution: deque(maxlen=slots) for resolution, (_, slots) in STATS_RESOLUTIONS.items()}
+
+    def add(self, when: float, list_name: str, mac: str, channel):
+        keys = {'list': list_name, 'oui': mac[:8].upper(), 'channel': str(channel).strip()}
+        with self.lock:
+            for resolution, (seconds, slots) in STATS_RESOLUTIONS.items():
+                ring = self.rings[resolution]
+                start = int(when // seconds * seconds)
+                if ring and ring[-1]['start'] == start:
+                    bucket = ring[-1]
+                elif ring and start < ring[-1]['start']:
+                    # Out of order (log seeding, aggregator batches): find the
+                    # bucket, or insert it in place while within the horizon
+                    index = next(i for i, b in enumerate(ring) if b['start'] >= start)
+                    if ring[index]['start'] == start:
+                        bucket = ring[index]
+                    else:
+                        if start <= ring[-1]['start'] - slots * seconds:
+                            continue
+                        if len(ring) == ring.maxlen:
+                            if index == 0:
+                                continue  # older than every bucket kept
+                            ring.popleft()
+                            index -= 1
+                        bucket = self._bucket(start)
+                        ring.insert(index, bucket)
+                else:
+                    bucket = self._bucket(start)
+                    ring.append(bucket)
+                bucket['total'] += 1
+                for dimension, key in keys.items():
+                    bucket[dimension][key] = bucket[dimension].get(key, 0) + 1
+
+    @staticmethod
+    def _bucket(start: int) -> dict:
+        return {'start': start, 'total': 0, **{d: {} for d in STATS_DIMENSIONS}}
+
+    def query(self, resolution: str, dimension: str = None, key: str = None, since: float = None) -> list:
+        """Buckets oldest first as {'start', 'count'[, 'keys']}; empty buckets are omitted"""
+        with self.lock:
+            ring = list(self.rings[resolution])
+        series = []
+        for bucket in ring:
+            if since is not None and bucket['start'] < since:
+                continue
+            if dimension is None:
+                series.append({'start': bucket['start'], 'count': bucket['total']})
+            elif key is not None:
+                count = bucket[dimension].get(key, 0)
+                if count:
+                    series.append({'start': bucket['start'], 'count': count})
+            else:
+                series.append({'start': bucket['start'], 'count': bucket['total'],
+                               'keys': dict(bucket[dimension])})
+        return series
+
+    def load_log(self, path: str):
+        """Seed the rings from an existing detection log"""
+        oldest = time.time() - max(seconds * slots for seconds, slots in STATS_RESOLUTIONS.values())
+        try:
+            with open(path, 'r', errors='ignore') as f:
+                for line in f:
+                    match = LOG_LINE_REGEX.match(line)
+                    if not match:
+                        continue
+                    when = datetime.strptime(match.group(1), '%Y-%m-%d %H:%M').timestamp()
+                    if when >= oldest:
+                        self.add(when, match.group(4), match.group(2), match.group(3))
+        except FileNotFoundError:
+            pass
+
+
+def stats_heatmap(series: list) -> list:
+    """7x24 matrix (Monday first, local hours) of counts from hourly buckets"""
+    grid = [[0] * 24 for _ in range(7)]
+    for bucket in series:
+        moment = datetime.fromtimestamp(bucket['start'])
+        grid[moment.weekday()][moment.hour] += bucket['count']
+    return grid
+
+
+detection_stats = DetectionStats()
+
+# Co-occurrence analytics
+#
+# Which watched devices are seen together. Each CSV pass collects the MACs
+# of rows that matched a pattern or watchlist (before the alert cooldown, so
+# a device counts in every cycle it is in range, not only when it alerts),
+# and the final pass of a capture window adds that set as one cycle to each
+# of the COOCCUR_WINDOWS. A window is a ring of buckets holding exact cycle
+# counts per device and the sketch cells its pairs touched, plus totals over
+# the ring; a bucket leaving the ring is subtracted from the totals, so the
+# window slides without rescanning anything.
+#
+# Pair counts live in a count-min sketch (COOCCUR_DEPTH rows of
+# COOCCUR_WIDTH counters), which covers the long tail of pairs with no
+# per-pair memory and overestimates by at most e/COOCCUR_WIDTH of all pair
+# counts (with high probability). From the sketch estimates, each device
+# keeps its COOCCUR_TOP_K strongest partners and each window its strongest
+# pairs, heavy-hitter style, as pairs are added. A query reads one top list
+# or COOCCUR_DEPTH counters, however many cycles and devices were seen.
+# Pairs are not counted for cycles with more than COOCCUR_MAX_SET devices
+# (a crowd says little about who travels together).
+
+COOCCUR_WINDOWS = {'hour': (300, 12), 'day': (3600, 24), 'week': (86400, 7)}  # bucket seconds, buckets
+COOCCUR_TOP_K = 10
+COOCCUR_DEPTH = 4
+COOCCUR_WIDTH = 2048
+COOCCUR_MAX_SET = 64
+
+
+def pair_cells(pair: tuple) -> list:
+    """Sketch counter indexes of a (MAC, MAC) pair, one per row (double
+    hashing over one blake2b digest, like bloom_positions)"""
+    h1, h2 = struct.unpack('<QQ', hashlib.blake2b(' '.join(pair).encode(), digest_size=16).digest())
+    h2 |= 1
+    return [row * COOCCUR_WIDTH + (h1 + row * h2) % COOCCUR_WIDTH for row in range(COOCCUR_DEPTH)]
+
+def offer_top(top: dict, key, count: int):
+    """Keep key in a top list of at most COOCCUR_TOP_K if it beats the weakest"""
+    if key in top or len(top) < COOCCUR_TOP_K:
+        top[key] = count
+        return
+    weakest = min(top, key=top.get)
+    if count > top[weakest]:
+        del top[weakest]
+        top[key] = count
+
+
+class CoOccurrenceWindow:
+    """Sliding-window cycle counts per device and per device pair"""
+
+    def __init__(self, seconds: int, slots: int):
+        self.seconds = seconds
+        self.slots = slots
+        self.buckets = deque()
+        self.cycles = 0
+        self.pair_total = 0
+        self.devices = {}  # MAC -> cycles seen
+        self.sketch = [0] * (COOCCUR_DEPTH * COOCCUR_WIDTH)
+        self.top = {}  # MAC -> {partner: cycles together}
+        self.top_pairs = {}  # (MAC, MAC) -> cycles together
+
+    def estimate(self, cells: list) -> int:
+        return min(self.sketch[cell] for cell in cells)
+
+    def add(self, when: float, devices: list, pairs: list):
+        """Count one cycle's devices and (pair, cells) pairs"""
+        self.expire(when)
+        start = int(when // self.seconds * self.seconds)
+        if not self.buckets or self.buckets[-1]['start'] < start:
+            self.buckets.append({'start': start, 'cycles': 0, 'pairs': 0, 'devices': {}, 'cells': {}})
+        bucket = self.buckets[-1]
+        bucket['cycles'] += 1
+        self.cycles += 1
+        for mac in devices:
+            bucket['devices'][mac] = bucket['devices'].get(mac, 0) + 1
+            self.devices[mac] = self.devices.get(mac, 0) + 1
+        bucket['pairs'] += len(pairs)
+        self.pair_total += len(pairs)
+        cells_touched = bucket['cells']
+        for pair, cells in pairs:
+            for cell in cells:
+                self.sketch[cell] += 1
+                cells_touched[cell] = cells_touched.get(cell, 0) + 1
+            count = self.estimate(cells)
+            offer_top(self.top.setdefault(pair[0], {}), pair[1], count)
+            offer_top(self.top.setdefault(pair[1], {}), pair[0], count)
+            offer_top(self.top_pairs, pair, count)
+
+    def expire(self, now: float):
+        """Subtract buckets that have left the window, then re-estimate the top lists"""
+        oldest = int(now // self.seconds * self.seconds) - (self.slots - 1) * self.seconds
+        if not self.buckets or self.buckets[0]['start'] >= oldest:
             return
+        while self.buckets and self.buckets[0]['start'] < oldest:
+            bucket = self.buckets.popleft()
+            self.cycles -= bucket['cycles']
+            self.pair_total -= bucket['pairs']
+            for mac, count in bucket['devices'].items():
+                self.devices[mac] -= count
+                if not self.devices[mac]:
+                    del self.devices[mac]
+                    self.top.pop(mac, None)
+            for cell, count in bucket['cells'].items():
+                self.sketch[cell] -= count
+        for mac, partners in self.top.items():
+            for partner in list(partners):
+                count = self.estimate(pair_cells(tuple(sorted((mac, partner)))))
+                if count and partner in self.devices:
+                    partners[partner] = count
+                else:
+                    del partners[partner]
+        for pair in list(self.top_pairs):
+            count = self.estimate(pair_cells(pair))
+            if count and pair[0] in self.devices and pair[1] in self.devices:
+                self.top_pairs[pair] = count
+            else:
+                del self.top_pairs[pair]
+
+
+class CoOccurrence:
+    """Co-occurrence of detected devices over each of COOCCUR_WINDOWS"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.windows = {name: CoOccurrenceWindow(seconds, slots)
+                        for name, (seconds, slots) in COOCCUR_WINDOWS.items()}
+
+    def add_cycle(self, when: float, macs):
+        """Count the devices matched in one capture window"""
+        devices = sorted(set(macs))
+        pairs = []
+        if len(devices) <= COOCCUR_MAX_SET:
+            pairs = [(pair, pair_cells(pair)) for pair in itertools.combinations(devices, 2)]
+        with self.lock:
+            for window in self.windows.values():
+                window.add(when, devices, pairs)
+
+    def _window(self, name: str) -> CoOccurrenceWindow:
+        window = self.windows[name]
+        window.expire(time.time())
+        return window
+
+    def partners(self, name: str, mac: str) -> dict:
+        """A device's strongest partners, with the share of its cycles spent together"""
+        with self.lock:
+            window = self._window(name)
+            cycles = window.devices.get(mac, 0)
+            # Neither device can have been seen together more often than alone
+            partners = sorted(((partner, min(together, cycles, window.devices.get(partner, 0)))
+                               for partner, together in window.top.get(mac, {}).items()),
+                              key=lambda item: (-item[1], item[0]))
+        return {
+            'mac': mac,
+            'cycles': cycles,
+            'partners': [{'mac': partner, 'together': together, 'share': round(together / cycles, 3)}
+                         for partner, together in partners]
+        }
+
+    def pair(self, name: str, mac: str, other: str) -> dict:
+        """Estimated cycles two devices were seen together (never an underestimate)"""
+        import math
+        pair = tuple(sorted((mac, other)))
+        cells = pair_cells(pair)
+        with self.lock:
+            window = self._window(name)
+            together = window.estimate(cells) if mac != other else 0
+            cycles = {mac: window.devices.get(mac, 0), other: window.devices.get(other, 0)}
+            pair_total = window.pair_total
+        return {
+            'macs': list(pair),
+            'together': min([together] + list(cycles.values())),
+            'cycles': cycles,
+            'max_overestimate': int(math.e * pair_total / COOCCUR_WIDTH)
+        }
+
+    def summary(self, name: str) -> dict:
+        """Cycle and device counts of a window and its strongest pairs"""
+        with self.lock:
+            window = self._window(name)
+            top_pairs = sorted(((pair, min(together, window.devices.get(pair[0], 0), window.devices.get(pair[1], 0)))
+                                for pair, together in window.top_pairs.items()),
+                               key=lambda item: (-item[1], item[0]))
+            return {
+                'cycles': window.cycles,
+                'devices': len(window.devices),
+                'pair_counts': window.pair_total,
+                'top_pairs': [{'macs': list(pair), 'together': together} for pair, together in top_pairs]
+            }
+
+
+cooccurrence = CoOccurrence()
+
+# Detection pipeline
+#
+# process_csv, in the CSV worker thread, parses and matches; de-duplication
+# is the alert cooldown in check_mac_match. What follows a match runs in
+# stages, each a bounded queue drained in batches by its own worker threads:
+#
+#   log      appends to the detection log (one write per batch), updates the
+#            statistics and passes detections on to uplink
+#   action   built-in actions of a CSV pass, delivered over persistent connections
+#   shell    shell commands from list entries
+#   uplink   batches for the aggregator (consumed by uplink_loop, --aggregator only)
+#
+# When a stage's queue is full its overflow policy applies: 'block' makes the
+# producer wait up to PIPELINE_BLOCK_TIMEOUT seconds (backpressure on the CSV
+# worker, not on the capture) and then drops the item, 'drop_newest' drops the
+# item, 'drop_oldest' drops the oldest queued one. Sizes, policies and worker
+# counts can be overridden per stage in settings.json, read at startup:
+#
+#   "pipeline": {"shell": {"size": 20, "overflow": "drop_newest", "workers": 4}}
+#
+# A stage that was never started (sub-commands, uplink without an aggregator)
+# runs its handler inline, or drops items if it has none. Depths and counters
+# are at /api/pipeline.
+
+PIPELINE_OVERFLOW = ('block', 'drop_newest', 'drop_oldest')
+PIPELINE_BLOCK_TIMEOUT = 5
+PIPELINE_STAGES = {
+    'log': {'size': 1000, 'overflow': 'block', 'workers': 1},
+    'action': {'size': 200, 'overflow': 'drop_oldest', 'workers': 1},
+    'shell': {'size': 50, 'overflow': 'drop_oldest', 'workers': 2},
+    'uplink': {'size': 5000, 'overflow': 'drop_oldest', 'workers': 0},
+}
+
+
+class Stage:
+    """A bounded queue drained in batches by the stage's worker threads"""
+
+    def __init__(self, name: str, handler=None, batch: int = 100):
+        self.name = name
+        self.handler = handler
+        self.batch = batch
+        self.lock = threading.Lock()
+        self.active = False
+        self.configure(**PIPELINE_STAGES[name])
+
+    def configure(self, size: int, overflow: str, workers: int):
+        if overflow not in PIPELINE_OVERFLOW:
+            raise ValueError(f"{self.name}: overflow must be one of {', '.join(PIPELINE_OVERFLOW)}")
+        if size < 1 or workers < (1 if self.handler else 0):
+            raise ValueError(f"{self.name}: bad size or worker count")
+        self.queue = queue.Queue(maxsize=size)
+        self.overflow = overflow
+        self.workers = workers
+        self.busy = 0
+        self.high_water = 0
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.blocked = 0.0
+
+    def start(self):
+        self.active = True
+        for index in range(self.workers if self.handler else 0):
+            threading.Thread(target=self._run, name=f'{self.name}-{index}', daemon=True).start()
+
+    def put(self, item) -> bool:
+        """Queue an item under the stage's overflow policy; False if it was dropped"""
+        if not self.active:
+            if self.handler is None:
+                return False
+            self.handler([item])
+            return True
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            if self.overflow == 'block':
+                start = time.monotonic()
+                try:
+                    self.queue.put(item, timeout=PIPELINE_BLOCK_TIMEOUT)
+                except queue.Full:
+                    with self.lock:
+                        self.dropped += 1
+                    return False
+                finally:
+                    with self.lock:
+                        self.blocked += time.monotonic() - start
+            elif self.overflow == 'drop_oldest':
+                with self.lock:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+                    try:
+                        self.queue.put_nowait(item)
+                    except queue.Full:
+                        self.dropped += 1
+                        return False
+            else:
+                with self.lock:
+                    self.dropped += 1
+                return False
+        depth = self.queue.qsize()
+        if depth > self.high_water:
+            self.high_water = depth
+        return True
+
+    def get(self, timeout: float = None):
+        """Take one item (for a stage drained by its own loop)"""
+        item = self.queue.get(timeout=timeout)
+        with self.lock:
+            self.processed += 1
+        return item
+
+    def _run(self):
+        while True:
+            items = [self.queue.get()]
+            try:
+                while len(items) < self.batch:
+                    items.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            with self.lock:
+                self.busy += 1
+            try:
+                self.handler(items)
+            except Exception as e:
+                with self.lock:
+                    self.errors += 1
+                clear_line()
+                print_status(f"Pipeline {self.name} stage error: {e}", Fore.RED)
+            finally:
+                with self.lock:
+                    self.busy -= 1
+                    self.processed += len(items)
+
+    def drain(self, timeout: float):
+        """Wait until the queue is empty and no worker is busy, up to timeout"""
+        deadline = time.monotonic() + timeout
+        while self.active and time.monotonic() < deadline:
+            with self.lock:
+                if self.queue.empty() and not self.busy:
+                    return True
+            time.sleep(0.05)
+        return not self.active
+
+    def info(self) -> dict:
+        with self.lock:
+            return {
+                'active': self.active,
+                'depth': self.queue.qsize(),
+                'capacity': self.queue.maxsize,
+                'high_water': self.high_water,
+                'overflow': self.overflow,
+                'workers': self.workers,
+                'busy': self.busy,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'errors': self.errors,
+                'blocked_seconds': round(self.blocked, 3)
+            }
+
+
+def deliver_actions(passes: list):
+    """action stage: built-in actions, one delivery per target for everything queued"""
+    delivered = []
+    for actions in passes:
+        for command, detection, trace, latency in actions:
+            action_dispatcher.queue(command, detection, trace)
+            delivered.append((trace, detection['list'], latency))
+    action_dispatcher.flush()
+    for trace, list_name, latency in delivered:
+        record_trace(trace, list_name, *latency)
+
+def run_shell_commands(commands: list):
+    """shell stage: run list entries' shell commands"""
+    for command, trace, list_name, latency in commands:
+        trace['command_start'] = time.time()
+        execute_command(command)
+        trace['command_end'] = time.time()
+        record_trace(trace, list_name, *latency)
+
+def start_pipeline(settings: dict, uplink: bool = False):
+    """Apply settings overrides and start the stages' workers"""
+    overrides = settings.get('pipeline') or {}
+    for name, stage in pipeline.items():
+        if name in overrides:
+            stage.configure(**dict(PIPELINE_STAGES[name], **overrides[name]))
+        if name != 'uplink' or uplink:
+            stage.start()
+
+def drain_pipeline(timeout: float = 5):
+    """Let queued detections reach the log and actions before exit"""
+    deadline = time.monotonic() + timeout
+    for name in ('log', 'action', 'shell'):
+        pipeline[name].drain(max(0, deadline - time.monotonic()))
+
+
+pipeline = {
+    'log': Stage('log', log_detections),
+    'action': Stage('action', deliver_actions),
+    'shell': Stage('shell', run_shell_commands, batch=1),
+    'uplink': Stage('uplink'),
+}
+
+class CsvDelta:
+    """Row-level change tracking for one airodump-ng CSV.
+
+    airodump-ng rewrites the whole file every few seconds with cumulative
+    rows. The delta remembers a fingerprint per row (MAC, last time seen,
+    packet/beacon count), so a re-read yields only rows that are new or
+    updated. It also collects the per-cycle statistics process_csv returns.
+    Use one instance per capture and reset() it when a new capture starts.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.fingerprints = {}
+        self.stats = {'first_seen': {}, 'match_first_seen': []}
+        self.seen = set()  # matched MACs, whether or not they alerted
+        self.match_count = 0
+        self.rows_evaluated = 0
+
+    def changed(self, csv_content: list) -> list:
+        """Return the complete rows that differ from the previous read"""
+        rows = []
+        for line in csv_content:
+            if not line.endswith('\n'):
+                continue  # partially written row; it will be complete next time
+            parts = line.split(',', 11)
+            if len(parts) < 6:
+                continue
+            # Stations have packets in column 4; APs have beacons / #IV in 9 and 10
+            is_station = is_station_row(parts)
+            counts = parts[4] if is_station else ','.join(parts[9:11])
+            key = (parts[0], is_station)
+            fingerprint = (parts[2], counts)
+            if self.fingerprints.get(key) != fingerprint:
+                self.fingerprints[key] = fingerprint
+                rows.append(line)
+        return rows
+
+def process_csv(mac_entries: dict, settings: dict = None, delta: CsvDelta = None, quiet: bool = False,
+                csv_path: str = None):
+    """Process CSV file for matches with channel information.
+
+    With a CsvDelta only rows that are new or changed since the delta's last
+    read are matched, so the CSV can be re-read cheaply while airodump-ng is
+    still running (pass quiet=True for those interim reads). csv_path
+    defaults to the current capture's CSV. Matches are handed to the log,
+    action and shell stages of the pipeline.
+
+    Returns per-cycle statistics for autotuning: first-seen time per station
+    MAC and the first-seen times of matched rows, or None without a CSV.
+    Anything that goes wrong reading or matching the CSV is raised as a
+    CaptureFailure of kind 'parse' for the supervisor.
+    """
+    if settings is None:
+        settings = load_settings()
+    if delta is None:
+        delta = CsvDelta()
+    capture_time = settings.get('capture_time')
+    channel_count = ((len(settings.get('channels2G', [])) if settings.get('band2G') else 0) +
+                     (len(settings.get('channels5G', [])) if settings.get('band5G') else 0))
+    try:
+        if csv_path is None:
+            csv_path = capture.csv_path
+        if not os.path.exists(csv_path):
+            return None
             
-        clear_line()
-        print_status("Scanning CSV for matches...", Fore.CYAN)
-                # Build dynamic channel monitoring message
-        channels_msg = "Currently monitoring channels:"
-        if args.band_2:
-            channels_msg += " 1, 6, 11 (2.4GHz)"
-        if args.band_5:
+        if not quiet:
+            clear_line()
+            print_status("Scanning CSV for matches...", Fore.CYAN)
+            # Build dynamic channel monitoring message
+            channels_msg = "Currently monitoring channels:"
             if args.band_2:
-                channels_msg += ","
-            channels_msg += " 44, 52 (5GHz lower), 100 (5GHz middle), 149, 157, 161 (5GHz upper)"
-        print_status(channels_msg, Fore.CYAN)
+                channels_msg += " 1, 6, 11 (2.4GHz)"
+            if args.band_5:
+                if args.band_2:
+                    channels_msg += ","
+                channels_msg += " 44, 52 (5GHz lower), 100 (5GHz middle), 149, 157, 161 (5GHz upper)"
+            print_status(channels_msg, Fore.CYAN)
         
-        with open('/mnt/ram/OUI-Prox-01.csv', 'r', errors='ignore') as f:
+        csv_flush = os.path.getmtime(csv_path)
+        with open(csv_path, 'r', errors='ignore') as f:
             csv_content = f.readlines()
+        rows = delta.changed(csv_content)
+        parsed = time.time()
+        stats = delta.stats
+        delta.rows_evaluated += len(rows)
+        latency = (capture_time, channel_count)
+        actions = []
             
-        found_matches = False
-        for line in csv_content:
-            matches = check_mac_match(line, mac_entries, csv_content)
+        for line in rows:
+            row_mac = MAC_REGEX.match(line.upper())
+            if row_mac:
+                stats['first_seen'][row_mac.group()] = csv_first_seen(line)
+            matches = check_mac_match(line, mac_entries, csv_content, seen=delta.seen)
             if matches:
-                found_matches = True
-                channel = extract_channel(line)
+                matched = time.time()
+                delta.match_count += len(matches)
+                channel = extract_channel(line, csv_content)
+                first_seen = csv_first_seen(line)
+                stats['match_first_seen'].append(first_seen)
                 for name, full_mac, command, source_file in matches:
-                    log_detection(full_mac, name, source_file, channel)
-                    time.sleep(0.1)
-                    if command:
-                        execute_command(command)
-                        time.sleep(1)
+                    trace = {
+                        'first_seen': first_seen,
+                        'csv_flush': csv_flush,
+                        'parsed': parsed,
+                        'matched': matched
+                    }
+                    list_name = os.path.basename(source_file)
+                    try:
+                        action = parse_action(command) if command else None
+                    except ValueError as e:
+                        print_status(f"Action error: {e}", Fore.RED)
+                        command = action = None
+                    # The trace is recorded by whichever stage finishes it
+                    log_detection(full_mac, name, source_file, channel, trace, None if command else latency)
+                    if action is not None:
+                        detection = {'mac': full_mac, 'name': name, 'channel': channel, 'list': list_name}
+                        actions.append((command, detection, trace, latency))
+                    elif command:
+                        pipeline['shell'].put((command, trace, list_name, latency))
+        
+        # Built-in actions of one pass are delivered together
+        if actions:
+            pipeline['action'].put(actions)
         
-        if not found_matches:
+        debug_event('csv', "%d of %d CSV rows new or changed", len(rows), len(csv_content))
+        if not quiet:
+            # The final pass of a window: its matched devices count as one cycle
+            cooccurrence.add_cycle(time.time(), delta.seen)
+        if not quiet and not delta.match_count:
             clear_line()
             print_status("No matches found in this scan cycle", Fore.YELLOW)
+        return stats
             
     except Exception as e:
-        clear_line()
-        print_status(f"Error processing CSV: {e}", Fore.RED)
+        raise CaptureFailure('parse', f"error processing {csv_path}: {e}") from e
+
+# Capture-time autotuning
+#
+# With auto_capture enabled the capture length and the pause between cycles
+# are chosen per cycle from what the last capture saw: the share of stations
+# first seen late in the window, the time to the first match, and the rate
+# of stations not seen in the previous cycle. Every decision is logged.
+
+CHANNEL_HOP_SECONDS = 0.25  # airodump-ng default hop interval
+AUTOTUNE_MIN_SWEEPS = 8
+AUTOTUNE_LATE_WINDOW = 0.25  # last quarter of the capture counts as "late"
+AUTOTUNE_LATE_HIGH = 0.25
+AUTOTUNE_LATE_LOW = 0.05
+AUTOTUNE_GROW = 1.25
+AUTOTUNE_SHRINK = 0.85
+AUTOTUNE_BUSY_RATE = 0.5  # new stations per second
+autotune_state = {'capture_time': None, 'gap': 1, 'known_macs': set()}
+autotune_decisions = deque(maxlen=100)
+
+
+def capture_bounds(settings: dict, channel_count: int) -> tuple:
+    """(min, max) capture seconds; the floor allows a few sweeps of every channel"""
+    upper = max(1, int(settings.get('capture_max', DEFAULT_SETTINGS['capture_max'])))
+    sweeps = int(channel_count * CHANNEL_HOP_SECONDS * AUTOTUNE_MIN_SWEEPS + 0.999)
+    lower = max(int(settings.get('capture_min', DEFAULT_SETTINGS['capture_min'])), sweeps)
+    return min(lower, upper), upper
+
+def autotune_capture(stats: dict, capture_start: float, capture_time: float,
+                     channel_count: int, settings: dict) -> dict:
+    """Pick the next capture length and cycle gap from one cycle's statistics"""
+    lower, upper = capture_bounds(settings, channel_count)
+    gap_max = settings.get('cycle_gap_max', DEFAULT_SETTINGS['cycle_gap_max'])
+
+    first_seen = [t for t in stats['first_seen'].values() if t is not None]
+    late_from = capture_start + capture_time * (1 - AUTOTUNE_LATE_WINDOW)
+    late_share = sum(1 for t in first_seen if t >= late_from) / len(first_seen) if first_seen else 0.0
+    macs = set(stats['first_seen'])
+    new_count = len(macs - autotune_state['known_macs'])
+    new_rate = new_count / capture_time if capture_time else 0.0
+    autotune_state['known_macs'] = macs
+    matched = [t for t in stats['match_first_seen'] if t is not None]
+    first_match = min(matched) - capture_start if matched else None
+
+    next_time = capture_time
+    if late_share > AUTOTUNE_LATE_HIGH:
+        next_time, reason = capture_time * AUTOTUNE_GROW, "stations still arriving late"
+    elif first_match is not None and first_match > capture_time * (1 - AUTOTUNE_LATE_WINDOW):
+        next_time, reason = capture_time * AUTOTUNE_GROW, "first match came late"
+    elif late_share < AUTOTUNE_LATE_LOW and (first_match is None or first_match < capture_time / 2):
+        next_time, reason = capture_time * AUTOTUNE_SHRINK, "few late arrivals"
+    else:
+        reason = "steady"
+    next_time = int(min(max(round(next_time), lower), upper))
+
+    if new_rate >= AUTOTUNE_BUSY_RATE or late_share > AUTOTUNE_LATE_HIGH:
+        gap = 0
+    elif new_count == 0 and not matched:
+        gap = gap_max
+    else:
+        gap = min(1, gap_max)
+
+    decision = {
+        'time': datetime.now().isoformat(),
+        'capture_time': capture_time,
+        'next_capture_time': next_time,
+        'gap': gap,
+        'reason': reason,
+        'stations': len(macs),
+        'new_stations_per_s': round(new_rate, 3),
+        'late_share': round(late_share, 3),
+        'time_to_first_match': round(first_match, 1) if first_match is not None else None,
+        'bounds': [lower, upper]
+    }
+    autotune_decisions.append(decision)
+    autotune_state['capture_time'] = next_time
+    autotune_state['gap'] = gap
+    bump_state('status')
+    first_match_msg = f"first match at {first_match:.1f}s" if first_match is not None else "no match"
+    print_status(f"Autotune: capture {capture_time}s -> {next_time}s, gap {gap}s ({reason}; "
+                 f"{len(macs)} stations, {new_rate:.2f} new/s, {late_share:.0%} late, {first_match_msg})", Fore.CYAN)
+    return decision
+
+# Warm-restart snapshot
+#
+# The ignore list, alert cooldowns, proximity readings, cycle count and
+# autotune state are checkpointed to a small binary file every
+# SNAPSHOT_INTERVAL seconds and at exit, and restored at startup. Entries are
+# stored with wall-clock times, so whatever expired while the daemon was down
+# is dropped on restore and the rest keeps its remaining TTL.
+#
+#   header      magic, written at, cycle count, autotune capture time and gap,
+#               record counts
+#   ignored     key, OUI, until
+#   alerts      key, last alert
+#   proximity   key, sightings, last update, power readings (signed bytes)
+#
+# Keys are length-prefixed ASCII.
 
-def process_cleanup(process):
-    """Clean up airodump process with better error handling"""
+SNAPSHOT_FILE = os.path.join(SCRIPT_DIR, 'state.snapshot')
+SNAPSHOT_INTERVAL = 30
+SNAPSHOT_MAGIC = b'OUISNAP1'
+SNAPSHOT_HEADER = struct.Struct('<8sdQddIII')
+
+
+def _pack_key(key: str) -> bytes:
+    data = key.encode('ascii', 'replace')[:255]
+    return bytes([len(data)]) + data
+
+def _unpack_key(data: bytes, offset: int) -> tuple:
+    length = data[offset]
+    return data[offset + 1:offset + 1 + length].decode('ascii'), offset + 1 + length
+
+def write_snapshot(path: str = None):
+    """Checkpoint runtime state (atomically replaces path, default SNAPSHOT_FILE)"""
+    path = path or SNAPSHOT_FILE
+    now = datetime.now()
+    ignored = list(ignored_devices.items())
+    alerts = [(mac, when) for mac, when in list(last_alerts.items())
+              if (now - when).total_seconds() < ALERT_COOLDOWN]
+    proximity = [(mac, state) for mac, state in list(proximity_state.items())
+                 if now.timestamp() - state['last'] <= PROXIMITY_GAP]
+    body = bytearray(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, time.time(), cycle_count,
+                                          autotune_state['capture_time'] or 0, autotune_state['gap'],
+                                          len(ignored), len(alerts), len(proximity)))
+    for mac, data in ignored:
+        body += _pack_key(mac) + _pack_key(data['oui']) + struct.pack('<d', data['until'].timestamp())
+    for mac, when in alerts:
+        body += _pack_key(mac) + struct.pack('<d', when.timestamp())
+    for mac, state in proximity:
+        powers = [max(-128, min(127, p)) for p in list(state['powers'])]
+        body += _pack_key(mac) + struct.pack('<IdB', state['seen'], state['last'], len(powers))
+        body += struct.pack(f'<{len(powers)}b', *powers)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(body)
+    os.replace(tmp_path, path)
+
+def restore_snapshot(path: str = None) -> bool:
+    """Load a snapshot written by write_snapshot, dropping expired entries"""
+    global cycle_count
+    path = path or SNAPSHOT_FILE
     try:
-        # First attempt: Normal termination
-        if process.poll() is None:
-            process.terminate()
-            time.sleep(1)
-        
-        # Second attempt: SIGTERM
-        if process.poll() is None:
-            process.kill()
-            time.sleep(1)
-        
-        # Final attempt: Force kill any remaining processes
-        subprocess.run(['sudo', 'pkill', '-9', '-f', 'airodump-ng'], check=False)
-        
-    except Exception as e:
-        print_status(f"Error during process cleanup: {e}", Fore.RED)
-        # Ensure processes are killed even if there's an error
-        subprocess.run(['sudo', 'pkill', '-9', '-f', 'airodump-ng'], check=False)
+        with open(path, 'rb') as f:
+            data = f.read()
+        magic, written, cycles, capture_time, gap, n_ignored, n_alerts, n_proximity = \
+            SNAPSHOT_HEADER.unpack_from(data, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("not a snapshot file")
+        now = time.time()
+        offset = SNAPSHOT_HEADER.size
+        ignored = {}
+        for _ in range(n_ignored):
+            mac, offset = _unpack_key(data, offset)
+            oui, offset = _unpack_key(data, offset)
+            until, = struct.unpack_from('<d', data, offset)
+            offset += 8
+            if until > now:
+                ignored[mac] = {'until': datetime.fromtimestamp(until), 'oui': oui}
+        alerts = {}
+        for _ in range(n_alerts):
+            mac, offset = _unpack_key(data, offset)
+            when, = struct.unpack_from('<d', data, offset)
+            offset += 8
+            if now - when < ALERT_COOLDOWN:
+                alerts[mac] = datetime.fromtimestamp(when)
+        proximity = {}
+        for _ in range(n_proximity):
+            mac, offset = _unpack_key(data, offset)
+            seen, last, count = struct.unpack_from('<IdB', data, offset)
+            offset += 13
+            powers = struct.unpack_from(f'<{count}b', data, offset)
+            offset += count
+            if now - last <= PROXIMITY_GAP:
+                proximity[mac] = {'seen': seen, 'last': last,
+                                  'powers': deque(powers, maxlen=PROXIMITY_READINGS)}
+    except FileNotFoundError:
+        return False
+    except (OSError, ValueError, struct.error, IndexError, UnicodeDecodeError) as e:
+        print_status(f"Ignoring unreadable snapshot {path}: {e}", Fore.YELLOW)
+        return False
+
+    ignored_devices.update(ignored)
+    last_alerts.update(alerts)
+    proximity_state.update(proximity)
+    cycle_count = cycles
+    if capture_time:
+        autotune_state['capture_time'] = capture_time
+    autotune_state['gap'] = gap
+    print_status(f"Restored state from {int(now - written)}s ago: {len(ignored)} ignored, "
+                 f"{len(alerts)} cooling down, {len(proximity)} in range, cycle {cycles}", Fore.CYAN)
+    return True
+
+def snapshot_loop():
+    """Checkpoint runtime state every SNAPSHOT_INTERVAL seconds"""
+    while True:
+        time.sleep(SNAPSHOT_INTERVAL)
+        try:
+            write_snapshot()
+        except OSError as e:
+            print_status(f"Error writing snapshot: {e}", Fore.RED)
+
+# Capture supervision
+#
+# The orchestrator reports every failed cycle to the supervisor as one of
+#
+#   interface   the radio is missing or could not be put into monitor mode
+#   capture     airodump-ng could not be started or exited on its own
+#   parse       anything raised while matching a window's CSV
+#
+# Each kind backs off on its own schedule (doubling from its base delay up to
+# its cap, with jitter over the upper half so restarts of several sensors
+# spread out). Interface failures restart the interface; so does every
+# SUPERVISOR_ESCALATE'th capture failure in a row. After SUPERVISOR_TRIP failures in a
+# row of any kind the circuit breaker opens and no capture is attempted for
+# SUPERVISOR_OPEN_TIME seconds (doubling per trip up to SUPERVISOR_OPEN_MAX);
+# then one trial cycle decides whether it closes or opens again.
+#
+# The supervisor also accounts for where the monitor thread's time goes
+# (capturing, processing between windows, idle gaps, paused, recovery, backoff,
+# breaker open) and keeps outages: from a failure to the start of the next
+# capture that lasts a whole cycle, summed per kind of the first failure.
+# /api/supervisor reports both as blind time.
+
+SUPERVISOR_KINDS = ('interface', 'capture', 'parse')
+SUPERVISOR_BACKOFF = {'interface': (5, 120), 'capture': (2, 60), 'parse': (1, 30)}  # base, cap seconds
+SUPERVISOR_ESCALATE = 3
+SUPERVISOR_TRIP = 6
+SUPERVISOR_OPEN_TIME = 60
+SUPERVISOR_OPEN_MAX = 900
+SUPERVISOR_ACTIVITIES = ('starting', 'capturing', 'processing', 'idle', 'paused', 'recovery', 'backoff', 'open')
+
+
+class CaptureFailure(Exception):
+    """A failed cycle the supervisor should handle as the given kind"""
+
+    def __init__(self, kind: str, message: str):
+        super().__init__(message)
+        self.kind = kind
+
+
+def failure_kind(error: Exception) -> str:
+    if isinstance(error, CaptureFailure):
+        return error.kind
+    return 'parse'
+
+
+class CaptureSupervisor:
+    """Backoff, circuit breaker and blind-time accounting for the capture loop"""
+
+    def __init__(self):
+        import random
+        self.random = random.Random()
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.activity = 'starting'
+        self.since = self.started
+        self.seconds = dict.fromkeys(SUPERVISOR_ACTIVITIES, 0.0)
+        self.failures = dict.fromkeys(SUPERVISOR_KINDS, 0)
+        self.streak = dict.fromkeys(SUPERVISOR_KINDS, 0)
+        self.downtime = dict.fromkeys(SUPERVISOR_KINDS, 0.0)
+        self.consecutive = 0
+        self.breaker = 'closed'
+        self.trips = 0
+        self.resume_at = 0.0
+        self.outage = None
+        self.outages = deque(maxlen=50)
+        self.last_failed_cycle = 0
 
+    def _enter(self, activity: str, now: float):
+        self.seconds[self.activity] += now - self.since
+        self.activity, self.since = activity, now
+
+    def enter(self, activity: str):
+        with self.lock:
+            if activity != self.activity:
+                self._enter(activity, time.monotonic())
+
+    def capture_started(self):
+        """A capture is running again; the outage in progress ends here if the cycle succeeds"""
+        with self.lock:
+            now = time.monotonic()
+            if self.outage is not None:
+                # Kept if a later capture starts before this cycle is finished
+                self.outage.setdefault('ended', now)
+            self._enter('capturing', now)
+
+    def succeeded(self, cycle: int):
+        """A whole cycle completed, including its final CSV pass: close the
+        outage, reset the streaks and close the breaker. Ignored for a cycle
+        older than the last failed one (windows are finished while the next
+        capture runs)"""
+        with self.lock:
+            if cycle < self.last_failed_cycle:
+                return
+            if self.outage is not None:
+                duration = self.outage.pop('ended', time.monotonic()) - self.outage.pop('began')
+                self.outage['duration'] = round(duration, 3)
+                self.downtime[self.outage['kind']] += duration
+                self.outages.append(self.outage)
+                self.outage = None
+            self.streak = dict.fromkeys(SUPERVISOR_KINDS, 0)
+            self.consecutive = 0
+            if self.breaker != 'closed':
+                print_status("Capture recovered, circuit breaker closed", Fore.GREEN)
+            self.breaker = 'closed'
+            self.trips = 0
+
+    def failed(self, kind: str, error: Exception, cycle: int) -> bool:
+        """Record a failure of a cycle and schedule the retry; True if the
+        interface should be restarted"""
+        with self.lock:
+            now = time.monotonic()
+            self.last_failed_cycle = max(self.last_failed_cycle, cycle)
+            self.failures[kind] += 1
+            self.streak[kind] += 1
+            self.consecutive += 1
+            if self.outage is None:
+                self.outage = {'kind': kind, 'error': str(error), 'cycle': cycle, 'start': round(time.time(), 3),
+                               'began': now}
+            else:
+                # Still down: the capture started since did not last a cycle
+                self.outage.pop('ended', None)
+                self.outage['failures'] = self.outage.get('failures', 1) + 1
+            if self.breaker == 'half_open' or self.consecutive >= SUPERVISOR_TRIP:
+                self.trips += 1
+                self.breaker = 'open'
+                delay = min(SUPERVISOR_OPEN_TIME * 2 ** (self.trips - 1), SUPERVISOR_OPEN_MAX)
+                print_status(f"{self.consecutive} capture failures in a row, pausing capture for {delay}s", Fore.RED)
+            else:
+                base, cap = SUPERVISOR_BACKOFF[kind]
+                delay = min(cap, base * 2 ** (self.streak[kind] - 1))
+                delay = delay / 2 + self.random.uniform(0, delay / 2)
+            self.resume_at = time.time() + delay
+            return kind == 'interface' or (kind == 'capture' and self.streak[kind] % SUPERVISOR_ESCALATE == 0)
+
+    def retry_due(self) -> bool:
+        """True once the backoff or open period is over (half-opens the breaker)"""
+        with self.lock:
+            if time.time() < self.resume_at:
+                return False
+            if self.breaker == 'open':
+                self.breaker = 'half_open'
+            return True
+
+    def reset(self):
+        """Close the breaker and retry now (after fixing the radio, say)"""
+        with self.lock:
+            self.streak = dict.fromkeys(SUPERVISOR_KINDS, 0)
+            self.consecutive = 0
+            self.breaker = 'closed'
+            self.trips = 0
+            self.resume_at = 0.0
+            self.last_failed_cycle = 0
+
+    def info(self) -> dict:
+        with self.lock:
+            now = time.monotonic()
+            seconds = dict(self.seconds)
+            seconds[self.activity] += now - self.since
+            downtime = dict(self.downtime)
+            outage = None
+            if self.outage is not None:
+                duration = self.outage.get('ended', now) - self.outage['began']
+                downtime[self.outage['kind']] += duration
+                outage = {k: v for k, v in self.outage.items() if k not in ('began', 'ended')}
+                outage['duration'] = round(duration, 3)
+            uptime = now - self.started
+            blind = uptime - seconds['capturing'] - seconds['paused']
+            return {
+                'activity': self.activity,
+                'breaker': self.breaker,
+                'trips': self.trips,
+                'resume_at': round(self.resume_at, 3) if self.resume_at > time.time() else None,
+                'uptime': round(uptime, 3),
+                'blind_seconds': round(blind, 3),
+                'blind_ratio': round(blind / (uptime - seconds['paused']), 4) if uptime > seconds['paused'] else 0,
+                'seconds': {k: round(v, 3) for k, v in seconds.items()},
+                'failures': {kind: {'total': self.failures[kind], 'streak': self.streak[kind],
+                                    'downtime': round(downtime[kind], 3)} for kind in SUPERVISOR_KINDS},
+                'outage': outage,
+                'outages': list(self.outages)
+            }
+
+
+supervisor = CaptureSupervisor()
 
 def get_band_and_channels(args):
     """Determine band mode and channels based on command line arguments"""
@@ -455,196 +2878,434 @@ def get_band_and_channels(args):
         
     return band_mode, ','.join(channels)
 
-def monitoring_loop(args):
-    global stop_flag, is_paused, cycle_count, interface_status, mac_entries
-    
-    max_retries = 3
-    retry_delay = 5
-    error_count = 0
-    last_error_time = None
-    
-    while not stop_flag:
-        if not is_paused:
-            try:
-                cycle_count += 1
-                print_status(f"Starting cycle {cycle_count}", Fore.CYAN)
-                
-                # Load fresh settings for each cycle
-                settings = load_settings()
-                
-                # Verify interface status periodically
-                if cycle_count % 10 == 0:
-                    interface_status = check_interface_status(settings['interface'])
-                    if not interface_status.get('isMonitor', False):
-                        print_status("Interface not in monitor mode, attempting to restore...", Fore.YELLOW)
-                        setup_wireless_interface()
-                        time.sleep(2)
-                
-                # Build channel list from current settings
-                channels = []
-                if settings['band2G']:
-                    channels.extend(map(str, settings['channels2G']))
-                if settings['band5G']:
-                    channels.extend(map(str, settings['channels5G']))
-                
-                if not channels:
-                    print_status("No channels selected, waiting...", Fore.YELLOW)
-                    time.sleep(5)
+# Asyncio orchestrator
+#
+# monitoring_loop runs one asyncio event loop in the monitor thread. A capture
+# window sleeps until inotify reports a CSV rewrite, the airodump-ng process
+# exits (pidfd), the interface health task sees monitor mode lost, or the
+# window ends. At the end of a window the capture is stopped while what it
+# has written so far is parsed; the final pass over that window (and
+# autotuning from it) then runs in the CSV worker thread while the next
+# capture is already running. Logging and actions run in the pipeline's
+# stages, so neither they nor the parsing hold up the next capture.
+
+IN_MODIFY = 0x2
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+CSV_PARSE_INTERVAL = 1.0  # at most one interim CSV pass per second
+INTERFACE_HEALTH_INTERVAL = 5
+cycle_times = deque(maxlen=100)  # recent cycles: capture length vs. time until the next could start
+
+
+class DirectoryWatcher:
+    """Wakes a coroutine when files in a directory change (inotify, else polling)"""
+
+    def __init__(self, loop):
+        import asyncio
+        import ctypes
+        self.loop = loop
+        self.event = asyncio.Event()
+        self.fd = None
+        self.wd = None
+        try:
+            self.libc = ctypes.CDLL(None, use_errno=True)
+            fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        except (OSError, AttributeError) as e:
+            print_status(f"inotify unavailable ({e}), polling capture files", Fore.YELLOW)
+            return
+        self.fd = fd
+        loop.add_reader(fd, self._readable)
+
+    def watch(self, directory: str):
+        """Watch directory instead of the previous one"""
+        self.event.clear()
+        if self.fd is None:
+            return
+        if self.wd is not None:
+            self.libc.inotify_rm_watch(self.fd, self.wd)
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory),
+                                         IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE)
+        self.wd = wd if wd >= 0 else None
+
+    def _readable(self):
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        self.event.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """True once something changed; without a watch, after at most a second"""
+        import asyncio
+        if self.wd is None:
+            await asyncio.sleep(min(timeout, 1))
+            return True
+        try:
+            await asyncio.wait_for(self.event.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self.event.clear()
+        return True
+
+    def close(self):
+        if self.fd is not None:
+            self.loop.remove_reader(self.fd)
+            os.close(self.fd)
+            self.fd = None
+
+
+async def wait_process_exit(process):
+    """Wait for a Popen child to exit (pidfd where available, else polling)"""
+    import asyncio
+    try:
+        fd = os.pidfd_open(process.pid)
+    except (AttributeError, OSError):
+        while process.poll() is None:
+            await asyncio.sleep(1)
+        return
+    loop = asyncio.get_running_loop()
+    exited = loop.create_future()
+    try:
+        loop.add_reader(fd, lambda: exited.done() or exited.set_result(None))
+        await exited
+    finally:
+        loop.remove_reader(fd)
+        os.close(fd)
+
+async def interface_health(watched: dict, lost):
+    """Set lost whenever the capture interface is seen out of monitor mode"""
+    import asyncio
+    global interface_status
+    while True:
+        changed = await asyncio.to_thread(interface_monitor.wait_for_change, INTERFACE_HEALTH_INTERVAL)
+        interface = watched.get('interface')
+        if changed and interface and not capture.simulated:
+            interface_status = check_interface_status(interface)
+            if not interface_status['isMonitor']:
+                lost.set()
+
+
+# Settings changes restart the capture: the orchestrator ends its current
+# window and starts the next one with the saved settings. Handlers that
+# reconfigure the interface hold capture_hold so no capture starts meanwhile.
+capture_hold = threading.Lock()
+restart_events = []  # (loop, asyncio.Event) of each running orchestrator
+
+def restart_capture(timeout: float = 0):
+    """End the current capture window early; waits up to timeout seconds
+    for the capture to stop"""
+    for loop, event in list(restart_events):
+        loop.call_soon_threadsafe(event.set)
+    deadline = time.time() + timeout
+    while capture.running() and time.time() < deadline:
+        time.sleep(0.1)
+
+def wait_capture_hold():
+    with capture_hold:
+        pass
+
+
+class Orchestrator:
+    """One monitoring run: capture windows, CSV passes, actions and health"""
+
+    def __init__(self, args):
+        import asyncio
+        from concurrent.futures import ThreadPoolExecutor
+        self.args = args
+        self.loop = asyncio.get_running_loop()
+        self.watcher = DirectoryWatcher(self.loop)
+        # One worker keeps CSV passes (interim and final) in order
+        self.csv_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='csv')
+        self.interface_lost = asyncio.Event()
+        self.restart = asyncio.Event()
+        self.watched = {}
+        self.finishing = {}  # window -> task finishing it
+
+    def parse(self, delta, cycle_settings: dict, csv_path: str, quiet: bool):
+        return self.loop.run_in_executor(self.csv_executor, functools.partial(
+            process_csv, mac_entries, cycle_settings, delta, quiet, csv_path))
+
+    async def run(self):
+        import asyncio
+        health = self.loop.create_task(interface_health(self.watched, self.interface_lost))
+        restart_events.append((self.loop, self.restart))
+        try:
+            while not shutdown.is_set():
+                if is_paused:
+                    supervisor.enter('paused')
+                    await asyncio.sleep(1)
                     continue
-                    
-                channel_str = ','.join(channels)
-                
-                # Clean up before starting new scan
-                cleanup_files()
-                subprocess.run(['sudo', 'pkill', '-f', 'airodump-ng'], check=False)
-                time.sleep(1)
-                
-                # Build airodump command
-                cmd = [
-                    'sudo', 'airodump-ng',
-                    '--output-format', 'csv',
-                    '-w', '/mnt/ram/OUI-Prox',
-                    '--band', 'abg' if settings['band2G'] and settings['band5G'] else ('a' if settings['band5G'] else 'g'),
-                    '-c', channel_str,
-                    settings['interface']
-                ]
-                
-                process = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-                
-                # Monitor the process while waiting
-                start_time = time.time()
-                while time.time() - start_time < settings['capture_time']:
-                    if process.poll() is not None:
-                        raise Exception("airodump-ng process terminated unexpectedly")
-                    time.sleep(1)
-                
-                process_cleanup(process)
-                process_csv(mac_entries)
-                
-                # Reset error count on successful cycle
-                error_count = 0
-                last_error_time = None
-                
-            except Exception as e:
-                error_count += 1
-                current_time = time.time()
-                
-                # If this is a new error after a period of stability, reset the count
-                if last_error_time and current_time - last_error_time > 300:  # 5 minutes
-                    error_count = 1
-                
-                last_error_time = current_time
-                
-                print_status(f"Error in monitoring loop (attempt {error_count}): {e}", Fore.RED)
-                
-                if error_count >= max_retries:
-                    print_status("Multiple errors detected, attempting recovery...", Fore.YELLOW)
+                if not supervisor.retry_due():
+                    await asyncio.sleep(min(1, max(0.05, supervisor.resume_at - time.time())))
+                    continue
+                try:
+                    # Success is reported by finish_window, after the final CSV pass
+                    cycle_gap = await self.cycle()
+                except Exception as e:
+                    kind = failure_kind(e)
+                    restart = supervisor.failed(kind, e, cycle_count)
+                    print_status(f"Capture {kind} failure (cycle {cycle_count}): {e}", Fore.RED)
+                    supervisor.enter('recovery')
                     try:
-                        # Kill any hanging processes
-                        subprocess.run(['sudo', 'pkill', '-f', 'airodump-ng'], check=False)
-                        cleanup_files()
-                        
-                        # Restart wireless interface
-                        restart_wireless_interface()
-                        
-                        # Reset error count after recovery attempt
-                        error_count = 0
-                        
+                        # Stop our capture if it is still hanging around
+                        await asyncio.to_thread(capture.close)
+                        if restart and not capture.simulated:
+                            await asyncio.to_thread(restart_wireless_interface, self.watched.get('interface'))
                     except Exception as recovery_error:
                         print_status(f"Recovery failed: {recovery_error}", Fore.RED)
-                
-                time.sleep(retry_delay)
-                
-        time.sleep(1)
+                    supervisor.enter('open' if supervisor.breaker == 'open' else 'backoff')
+                    continue
+
+                supervisor.enter('idle')
+                try:
+                    await asyncio.wait_for(self.restart.wait(), cycle_gap)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            restart_events.remove((self.loop, self.restart))
+            health.cancel()
+            await asyncio.gather(*self.finishing.values(), return_exceptions=True)
+            self.watcher.close()
+            self.csv_executor.shutdown(wait=False)
+
+    async def cycle(self) -> float:
+        """One capture window; returns the pause before the next one"""
+        import asyncio
+        global cycle_count, interface_status
+        cycle_count += 1
+        cycle_start = time.time()
+        bump_state('status')
+        print_status(f"Starting cycle {cycle_count}", Fore.CYAN)
+        supervisor.enter('processing')
+        await asyncio.to_thread(wait_capture_hold)
+        self.restart.clear()
+
+        # Load fresh settings for each cycle
+        settings = load_settings()
+        self.watched['interface'] = settings['interface']
+
+        # Verify interface status (cached, updated from netlink events)
+        interface_status = check_interface_status(settings['interface'])
+        if not interface_status.get('isMonitor', False) and not capture.simulated:
+            print_status("Interface not in monitor mode, attempting to restore...", Fore.YELLOW)
+            if not await asyncio.to_thread(setup_wireless_interface, None, settings['interface']):
+                raise CaptureFailure('interface', f"{settings['interface']} is not in monitor mode")
+            await asyncio.sleep(2)
+
+        # Build channel list from current settings
+        channels = []
+        if settings['band2G']:
+            channels.extend(map(str, settings['channels2G']))
+        if settings['band5G']:
+            channels.extend(map(str, settings['channels5G']))
+
+        if not channels:
+            print_status("No channels selected, waiting...", Fore.YELLOW)
+            supervisor.succeeded(cycle_count)
+            await asyncio.sleep(5)
+            return 1
+
+        auto_capture = settings.get('auto_capture') or getattr(self.args, 'auto_capture', False)
+        lower, upper = capture_bounds(settings, len(channels))
+
+        def window_length():
+            # Re-read every wake-up: the previous window's autotune decision
+            # may land after this capture has started
+            if auto_capture:
+                return min(max(autotune_state['capture_time'] or settings['capture_time'], lower), upper)
+            return settings['capture_time']
+
+        # The capture manager stops the last capture, empties the next window
+        # directory and adds -w
+        airodump_args = [
+            '--output-format', 'csv',
+            '--band', 'abg' if settings['band2G'] and settings['band5G'] else ('a' if settings['band5G'] else 'g'),
+            '-c', ','.join(channels),
+            settings['interface']
+        ]
+        # The window about to be reused must be fully processed; the one
+        # just captured is still being finished while this capture runs
+        reused = self.finishing.pop((capture.window + 1) % CAPTURE_WINDOWS, None)
+        if reused is not None:
+            await reused
+        try:
+            process = await asyncio.to_thread(capture.start, airodump_args)
+        except OSError as e:
+            raise CaptureFailure('capture', f"could not start {capture.command[0]}: {e}")
+        supervisor.capture_started()
+        if evidence.enabled and not capture.simulated:
+            await asyncio.to_thread(evidence.ensure, settings['interface'], mac_entries)
+        start_time = time.time()
+        window = capture.window
+        csv_path = capture.csv_path
+        self.watcher.watch(capture.window_dir())
+        self.interface_lost.clear()
+
+        cycle_settings = dict(settings, capture_time=window_length())
+        delta = CsvDelta()
+        await self.capture_window(process, delta, cycle_settings, csv_path, settings, start_time, window_length)
+        supervisor.enter('processing')
+        capture_time = window_length()
+        captured = time.time() - start_time
+
+        # Stop airodump-ng while parsing what it has written so far
+        await asyncio.gather(asyncio.to_thread(capture.stop), self.parse(delta, cycle_settings, csv_path, True))
+        duration = time.time() - cycle_start
+        cycle_times.append({
+            'cycle': cycle_count,
+            'start': round(cycle_start, 3),
+            'capture': round(captured, 3),
+            'duration': round(duration, 3),
+            'overhead': round(duration - captured, 3)
+        })
+        self.finishing[window] = self.loop.create_task(self.finish_window(
+            cycle_count, delta, cycle_settings, csv_path, window, start_time, capture_time,
+            len(channels), settings, auto_capture))
+        return autotune_state['gap'] if auto_capture else 1
+
+    async def capture_window(self, process, delta, cycle_settings: dict, csv_path: str,
+                             settings: dict, start_time: float, window_length):
+        """Match the CSV as airodump-ng rewrites it until the window is over"""
+        import asyncio
+        exited = self.loop.create_task(wait_process_exit(process))
+        lost = self.loop.create_task(self.interface_lost.wait())
+        restart = self.loop.create_task(self.restart.wait())
+        csv_mtime = None
+        last_parse = 0
+        try:
+            while not shutdown.is_set():
+                remaining = start_time + window_length() - time.time()
+                if remaining <= 0:
+                    break
+                changed = self.loop.create_task(self.watcher.wait(remaining))
+                await asyncio.wait({changed, exited, lost, restart}, timeout=remaining,
+                                   return_when=asyncio.FIRST_COMPLETED)
+                changed.cancel()
+                if restart.done():
+                    # Checked first: the handler may stop the capture itself
+                    print_status("Settings changed, restarting capture", Fore.YELLOW)
+                    break
+                if exited.done():
+                    raise CaptureFailure('capture', f"airodump-ng exited unexpectedly (status {process.poll()})")
+                if lost.done():
+                    # Keep what was captured so far; the next cycle restores monitor mode
+                    print_status("Interface left monitor mode, ending capture early", Fore.YELLOW)
+                    break
+                # airodump-ng rewrites the CSV every few seconds; match what changed
+                try:
+                    mtime = os.path.getmtime(csv_path)
+                except OSError:
+                    mtime = None
+                if mtime is None or mtime == csv_mtime:
+                    continue
+                await asyncio.sleep(max(0, last_parse + CSV_PARSE_INTERVAL - time.time()))
+                csv_mtime = mtime
+                last_parse = time.time()
+                await self.parse(delta, cycle_settings, csv_path, True)
+                budget_mb = settings.get('capture_budget_mb', DEFAULT_SETTINGS['capture_budget_mb'])
+                if capture.enforce_budget(int(budget_mb * 1024 * 1024)):
+                    print_status(f"Rotating capture: {capture.last_rotation['reason']}", Fore.YELLOW)
+                    break
+        finally:
+            exited.cancel()
+            lost.cancel()
+            restart.cancel()
+
+    async def finish_window(self, cycle: int, delta, cycle_settings: dict, csv_path: str, window: int,
+                            start_time: float, capture_time: float, channel_count: int,
+                            settings: dict, auto_capture: bool):
+        """Final CSV pass and autotuning for a stopped capture, then free its
+        files. The outcome is reported to the supervisor for the capture's own
+        cycle, while the next capture is already running"""
+        try:
+            stats = await self.parse(delta, cycle_settings, csv_path, False)
+            if auto_capture and stats is not None:
+                await self.loop.run_in_executor(self.csv_executor, autotune_capture, stats, start_time,
+                                                capture_time, channel_count, settings)
+        except Exception as e:
+            kind = failure_kind(e)
+            supervisor.failed(kind, e, cycle)
+            print_status(f"Capture {kind} failure (cycle {cycle}): {e}", Fore.RED)
+        else:
+            supervisor.succeeded(cycle)
+        finally:
+            capture.remove_files(window)
+
+
+def monitoring_loop(args):
+    """Run the monitoring orchestrator until shutdown is set"""
+    import asyncio
 
-def restart_wireless_interface():
-    """Restart wireless interface"""
+    async def main():
+        await Orchestrator(args).run()
+
+    asyncio.run(main())
+
+def restart_wireless_interface(interface: str = None):
+    """Restart the wireless interface (default: the one in settings)"""
+    interface = interface or load_settings()['interface']
     try:
-        print_status("Restarting wireless interface...", Fore.YELLOW)
-        subprocess.run(['sudo', 'airmon-ng', 'stop', 'wlan0'], check=True)
+        print_status(f"Restarting wireless interface {interface}...", Fore.YELLOW)
+        subprocess.run(['sudo', 'airmon-ng', 'stop', interface], check=True)
         time.sleep(2)
-        subprocess.run(['sudo', 'airmon-ng', 'start', 'wlan0'], check=True)
+        subprocess.run(['sudo', 'airmon-ng', 'start', interface], check=True)
         time.sleep(2)
-        print_status("Wireless interface restarted successfully", Fore.GREEN)
+        print_status(f"Wireless interface {interface} restarted successfully", Fore.GREEN)
         return True
     except subprocess.CalledProcessError as e:
         print_status(f"Error restarting wireless interface: {e}", Fore.RED)
         return False
 
-def setup_wireless_interface(custom_mac: str = None):
-    """Setup wireless interface with optional custom MAC"""
-    if check_wlan0_exists():
-        print_status("Using existing wlan0 interface", Fore.GREEN)
+def setup_wireless_interface(custom_mac: str = None, interface: str = None):
+    """Setup wireless interface (default: the one in settings) with optional custom MAC"""
+    interface = interface or load_settings()['interface']
+    if check_monitor_mode(interface):
+        print_status(f"Using existing {interface} interface", Fore.GREEN)
         return True
     
     try:
-        # Check if wlan0 exists
-        result = subprocess.run(['iwconfig', 'wlan0'], capture_output=True, text=True)
-        if "no such device" in result.stderr.lower():
-            error_msg = "4|Wireless Monitor Mode Failed on wlan0... |red|0.1||0"
+        if not check_interface_status(interface)['exists']:
+            error_msg = f"4|Wireless Monitor Mode Failed on {interface}... |red|0.1||0"
             subprocess.run(['echo', error_msg, '|', 'nc', 'localhost', '5555'], 
                          shell=True)
-            print_status("Error: wlan0 interface not found", Fore.RED)
+            print_status(f"Error: {interface} interface not found", Fore.RED)
             return False
 
         # Setup monitor mode
         print_status("Setting up monitor mode...", Fore.CYAN)
-        subprocess.run(['sudo', 'airmon-ng', 'start', 'wlan0'], check=True)
+        subprocess.run(['sudo', 'airmon-ng', 'start', interface], check=True)
         time.sleep(2)
 
         if custom_mac:
-            subprocess.run(['sudo', 'ifconfig', 'wlan0', 'down'], check=True)
-            subprocess.run(['sudo', 'macchanger', '-m', custom_mac, 'wlan0'], check=True)
+            subprocess.run(['sudo', 'ifconfig', interface, 'down'], check=True)
+            subprocess.run(['sudo', 'macchanger', '-m', custom_mac, interface], check=True)
         
-        subprocess.run(['sudo', 'ifconfig', 'wlan0', 'up'], check=True)
+        subprocess.run(['sudo', 'ifconfig', interface, 'up'], check=True)
         print_status("Monitor mode setup complete", Fore.GREEN)
         return True
 
     except subprocess.CalledProcessError as e:
-        error_msg = "4|Wireless Monitor Mode Failed on wlan0... |red|0.1||1"
+        error_msg = f"4|Wireless Monitor Mode Failed on {interface}... |red|0.1||1"
         subprocess.run(['echo', error_msg, '|', 'nc', 'localhost', '5555'], 
                      shell=True)
         print_status(f"Error setting up wireless interface: {e}", Fore.RED)
         return False
 
-# Configure Flask logging
-dictConfig({
-    'version': 1,
-    'formatters': {
-        'default': {
-            'format': '[%(asctime)s] %(message)s',
-            'datefmt': '%Y-%m-%d %H:%M:%S'
-        }
-    },
-    'handlers': {
-        'wsgi': {
-            'class': 'logging.StreamHandler',
-            'stream': 'ext://sys.stdout',
-            'formatter': 'default'
-        }
-    },
-    'root': {
-        'level': 'INFO',
-        'handlers': ['wsgi']
-    },
-    'loggers': {
-        'werkzeug': {
-            'level': 'ERROR',  # Only show Flask errors
-            'handlers': ['wsgi']
-        }
-    }
-})
-
-
 def get_all_available_lists():
     """Get all available list files from the directory"""
-    lists_dir = '/home/pi/oui/list'
+    lists_dir = LISTS_DIR
     return [f for f in os.listdir(lists_dir) if os.path.isfile(os.path.join(lists_dir, f))]
 
 def initialize_lists_config():
     """Initialize lists config based on command line arguments"""
     global args
-    lists_dir = '/home/pi/oui/list'
+    lists_dir = LISTS_DIR
     
     # Get all list files from directory
     all_lists = get_all_available_lists()
@@ -667,9 +3328,67 @@ def initialize_lists_config():
     print_status(f"Active lists: {active_lists}", Fore.GREEN)
     return config
 
+def load_web_stack():
+    """Import Flask and friends on first use and bind the names the routes use"""
+    global request, jsonify, send_from_directory, make_response
+    import flask
+    request = flask.request
+    jsonify = flask.jsonify
+    send_from_directory = flask.send_from_directory
+    make_response = flask.make_response
+    return flask
+
+def create_app():
+    """Build the Flask app and register every @route handler"""
+    global app
+    if app is not None:
+        return app
+
+    flask = load_web_stack()
+    from flask_cors import CORS
+    import logging
+    from logging.config import dictConfig
+
+    # Configure Flask logging
+    dictConfig({
+        'version': 1,
+        'formatters': {
+            'default': {
+                'format': '[%(asctime)s] %(message)s',
+                'datefmt': '%Y-%m-%d %H:%M:%S'
+            }
+        },
+        'handlers': {
+            'wsgi': {
+                'class': 'logging.StreamHandler',
+                'stream': 'ext://sys.stdout',
+                'formatter': 'default'
+            }
+        },
+        'root': {
+            'level': 'INFO',
+            'handlers': ['wsgi']
+        },
+        'loggers': {
+            'werkzeug': {
+                'level': 'ERROR',  # Only show Flask errors
+                'handlers': ['wsgi']
+            }
+        }
+    })
+
+    app = flask.Flask(__name__, static_folder='static')
+    CORS(app)
+    for rule, options, func in ROUTES:
+        app.add_url_rule(rule, view_func=func, **options)
+
+    # Set Flask logging level
+    app.logger.setLevel(logging.ERROR)
+    return app
+
 # Flask routes
 
-@app.route('/api/debug/lists', methods=['GET'])
+@route('/api/debug/lists', methods=['GET'])
 def debug_lists():
     """Debug endpoint to check current list state"""
     try:
@@ -685,11 +3404,49 @@ def debug_lists():
     except Exception as e:
         return jsonify({'error': str(e)})
 
-@app.route('/')
+@route('/api/debug/runtime')
+def debug_runtime():
+    """Sizes of in-memory structures, for spotting unbounded growth"""
+    return jsonify({
+        'queues': {name: stage.queue.qsize() for name, stage in pipeline.items()},
+        'last_alerts': len(last_alerts),
+        'ignored_devices': len(ignored_devices),
+        'proximity_state': len(proximity_state),
+        'latency_groups': len(latency_samples),
+        'threads': threading.active_count(),
+        'cycle_count': cycle_count
+    })
+
+@route('/api/pipeline')
+def get_pipeline():
+    """Queue depth, overflow policy and counters of each detection pipeline stage"""
+    return jsonify({name: stage.info() for name, stage in pipeline.items()})
+
+@route('/api/debug/log', methods=['GET'])
+def get_debug_log():
+    """Recent debug events; ?since=seq for newer ones only, ?kind= and ?limit="""
+    return jsonify({
+        'enabled': debug_log.enabled,
+        'events': debug_log.events(request.args.get('since', 0, type=int), request.args.get('kind'),
+                                   request.args.get('limit', DEBUG_RING_SIZE, type=int)),
+        'kinds': debug_log.counters(),
+        'console': console.info()
+    })
+
+@route('/api/debug/log', methods=['POST'])
+def set_debug_log():
+    """Turn recording of debug events on or off ({"enabled": true})"""
+    data = request.json or {}
+    if not isinstance(data.get('enabled'), bool):
+        return jsonify({'status': 'error', 'message': 'enabled must be true or false'}), 400
+    debug_log.enabled = data['enabled']
+    return jsonify({'status': 'success', 'enabled': debug_log.enabled})
+
+@route('/')
 def index():
     return send_from_directory('static', 'index.html')
 
-@app.route('/api/apply-interface', methods=['POST'])
+@route('/api/apply-interface', methods=['POST'])
 def apply_interface():
     """Apply interface settings only"""
     try:
@@ -709,10 +3466,10 @@ def apply_interface():
         print_status(f"Error applying interface settings: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/apply-scan', methods=['POST'])
+@route('/api/apply-scan', methods=['POST'])
 def apply_scan():
     """Apply scan settings only"""
-    global stop_flag, args
+    global args
     try:
         new_settings = request.json
         print_status(f"Received scan settings: {new_settings}", Fore.CYAN)
@@ -738,31 +3495,23 @@ def apply_scan():
             args.capture_time = current_settings['capture_time']
             args.band_2 = current_settings['band2G']
             args.band_5 = current_settings['band5G']
+            bump_state('settings')
             
-            # Stop current monitoring
-            stop_flag = True
-            time.sleep(2)
-            
-            # Cleanup any running processes
-            subprocess.run(['sudo', 'pkill', '-f', 'airodump-ng'], check=False)
-            cleanup_files()
-            
-            # Restart monitoring
-            stop_flag = False
+            # End the running capture; the next one uses the new settings
+            restart_capture()
             print_status("Scan settings applied successfully", Fore.GREEN)
             return jsonify({'status': 'success'})
         
         return jsonify({'status': 'error', 'message': 'Failed to save settings'})
         
     except Exception as e:
-        stop_flag = False
         print_status(f"Error applying scan settings: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/initial-config')
+@route('/api/initial-config')
 def get_initial_config():
     try:
-        lists_dir = '/home/pi/oui/list'
+        lists_dir = LISTS_DIR
         all_lists = [f for f in os.listdir(lists_dir) if os.path.isfile(os.path.join(lists_dir, f))]
         
         # Get the basenames of the currently loaded lists from args
@@ -789,11 +3538,12 @@ def get_initial_config():
         print_status(f"Error getting initial config: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/<path:path>')
+@route('/<path:path>')
 def static_files(path):
     return send_from_directory('static', path)
 
-@app.route('/api/status')
+@route('/api/status')
+@conditional('status', 'settings')
 def get_status():
     global cycle_count, interface_status
     current_settings = load_settings()
@@ -804,38 +3554,107 @@ def get_status():
         '5GHz': current_settings['channels5G'] if current_settings['band5G'] else []
     }
     
+    auto_capture = current_settings.get('auto_capture') or getattr(args, 'auto_capture', False)
+    capture_time = current_settings['capture_time']
+    if auto_capture and autotune_state['capture_time']:
+        capture_time = autotune_state['capture_time']
+    
     return jsonify({
         'cycle_count': cycle_count,
         'interface_status': interface_status,
         'channels': channels,
-        'capture_time': current_settings['capture_time']
+        'capture_time': capture_time,
+        'auto_capture': bool(auto_capture)
     })
 
-@app.route('/api/devices')
+DEVICES_CHUNK_BYTES = 1024 * 1024
+log_generation = 0
+
+@route('/api/devices')
+@conditional('devices')
 def get_devices():
+    """Detection log lines.
+
+    Without parameters the whole log is returned as a list. With
+    ?since=<cursor> ('' or '0' for the start) only lines appended after the
+    cursor are returned, at most DEVICES_CHUNK_BYTES per call, together with
+    the next cursor. 'reset' tells the client to drop what it has (the log
+    was cleared or the server restarted); 'more' means another chunk is ready.
+    """
+    since = request.args.get('since')
+    if since is None:
+        try:
+            devices = []
+            with open(LOG_FILE, 'r') as f:
+                devices = [line.strip() for line in f.readlines()]
+            return jsonify(devices)
+        except Exception as e:
+            return jsonify([])
+
+    generation, _, offset = since.partition(':')
     try:
-        devices = []
-        with open(LOG_FILE, 'r') as f:
-            devices = [line.strip() for line in f.readlines()]
-        return jsonify(devices)
-    except Exception as e:
-        return jsonify([])
+        offset = int(offset) if generation == str(log_generation) else 0
+    except ValueError:
+        offset = 0
+    reset = offset == 0
+
+    try:
+        size = os.path.getsize(LOG_FILE)
+    except OSError:
+        size = 0
+    if offset > size:
+        offset, reset = 0, True
+
+    entries = []
+    more = False
+    if offset < size:
+        with open(LOG_FILE, 'rb') as f:
+            f.seek(offset)
+            chunk = f.read(DEVICES_CHUNK_BYTES)
+        # Only hand out complete lines; a partial last line is sent next time
+        end = chunk.rfind(b'\n') + 1
+        if end == 0 and len(chunk) == DEVICES_CHUNK_BYTES:
+            end = len(chunk)
+        entries = [line for line in chunk[:end].decode(errors='replace').split('\n') if line.strip()]
+        offset += end
+        more = len(chunk) == DEVICES_CHUNK_BYTES and offset < size
+
+    return jsonify({
+        'cursor': f"{log_generation}:{offset}",
+        'reset': reset,
+        'more': more,
+        'entries': entries
+    })
 
-@app.route('/api/clear-log', methods=['POST'])
+@route('/api/clear-log', methods=['POST'])
 def clear_log():
+    global log_generation
     try:
         open(LOG_FILE, 'w').close()
+        log_generation += 1
+        bump_state('devices')
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/pause', methods=['POST'])
+@route('/api/pause', methods=['POST'])
 def toggle_pause():
     global is_paused
     is_paused = not is_paused
     return jsonify({'paused': is_paused})
 
-@app.route('/api/ignore', methods=['POST'])
+@route('/api/restart', methods=['POST'])
+def restart_script():
+    """Re-exec the daemon; state carries over through the snapshot"""
+    def restart():
+        time.sleep(0.5)  # let the response go out first
+        cleanup_on_exit()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+    print_status("Restart requested from the web interface", Fore.YELLOW)
+    threading.Thread(target=restart, daemon=True).start()
+    return jsonify({'status': 'success'})
+
+@route('/api/ignore', methods=['POST'])
 def ignore_device():
     try:
         data = request.json
@@ -872,7 +3691,7 @@ def ignore_device():
             'message': str(e)
         }), 500
 
-@app.route('/api/ignored')
+@route('/api/ignored')
 def get_ignored():
     clean_expired_ignores()
     return jsonify({
@@ -883,29 +3702,29 @@ def get_ignored():
         for mac, data in ignored_devices.items()
     })
 
-@app.route('/api/lists')
+@route('/api/lists')
 def get_lists():
     try:
-        lists_dir = '/home/pi/oui/list'
+        lists_dir = LISTS_DIR
         lists = [f for f in os.listdir(lists_dir) if os.path.isfile(os.path.join(lists_dir, f))]
         return jsonify(lists)
     except Exception as e:
         return jsonify([])
 
-@app.route('/api/add-device', methods=['POST'])
+@route('/api/add-device', methods=['POST'])
 def add_device():
     global mac_entries, args
     try:
         data = request.json
         mac = data['mac']
-        name = data['name'].strip()
+        name = check_entry_name(data['name'])
         list_name = data['list']
         
-        lists_dir = '/home/pi/oui/list'
+        lists_dir = LISTS_DIR
         list_path = os.path.join(lists_dir, list_name)
         
         # Create the command
-        msg_command = f'echo "2|0| {name} Detected |red|black|0.07||0" | nc -U /mnt/ram/message_socket'
+        msg_command = DEFAULT_COMMAND
         
         # Create the entry
         entry = f'{mac} "{name}" {msg_command}\n'
@@ -939,12 +3758,12 @@ def add_device():
         print_status(f"Error adding device: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/create-list', methods=['POST'])
+@route('/api/create-list', methods=['POST'])
 def create_list():
     try:
         data = request.json
         list_name = data['name']
-        list_path = os.path.join('/home/pi/oui/list', list_name)
+        list_path = os.path.join(LISTS_DIR, list_name)
         
         if os.path.exists(list_path):
             return jsonify({'status': 'error', 'message': 'List already exists'})
@@ -957,12 +3776,14 @@ def create_list():
         if list_path not in args.mac_list:
             args.mac_list.append(list_path)
             mac_entries = read_mac_list(args.mac_list)
+        bump_state('lists')
             
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/config')
+@route('/api/config')
+@conditional('settings')
 def get_config():
     """Return the current configuration including actual capture time from args"""
     band_mode, channels = get_band_and_channels(args)
@@ -978,7 +3799,8 @@ def get_config():
     }
     return jsonify(config)
 
-@app.route('/api/current-settings', methods=['GET'])
+@route('/api/current-settings', methods=['GET'])
+@conditional('settings')
 def get_current_settings():
     """Get current settings"""
     try:
@@ -993,7 +3815,7 @@ def get_current_settings():
             'message': str(e)
         })
 
-@app.route('/api/remove-device', methods=['POST'])
+@route('/api/remove-device', methods=['POST'])
 def remove_device():
     try:
         data = request.json
@@ -1047,10 +3869,11 @@ def remove_device():
         print_status(f"Error removing device: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/lists-status')
+@route('/api/lists-status')
+@conditional('lists', mtime=lambda: path_mtime(LISTS_DIR))
 def get_lists_status():
     try:
-        lists_dir = '/home/pi/oui/list'
+        lists_dir = LISTS_DIR
         all_lists = get_all_available_lists()
         
         # Get the current list paths from args
@@ -1072,7 +3895,7 @@ def get_lists_status():
         print_status(f"Error getting lists status: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/toggle-list', methods=['POST'])
+@route('/api/toggle-list', methods=['POST'])
 def toggle_list():
     try:
         data = request.json
@@ -1082,7 +3905,7 @@ def toggle_list():
         if not list_name:
             return jsonify({'status': 'error', 'message': 'List name required'})
             
-        lists_dir = '/home/pi/oui/list'
+        lists_dir = LISTS_DIR
         list_path = os.path.join(lists_dir, list_name)
         
         # Verify the list file exists
@@ -1128,7 +3951,320 @@ def toggle_list():
         print_status(f"Error toggling list: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/settings', methods=['GET'])
+# Bulk list management
+#
+# ListTransaction collects add/remove/move operations across list files,
+# validates all of them, then writes each touched list once (via a temp file
+# and os.replace) and reloads the matcher once. /api/lists/batch and the
+# streaming import endpoint are built on it. Entries written through the API
+# may only name built-in actions as their command, unless settings.json has
+# "allow_shell_commands": true (list files edited by hand are not limited).
+
+lists_lock = threading.Lock()
+
+
+# Command used for list entries added without one ({name} is filled in per detection)
+DEFAULT_COMMAND = 'unix:/mnt/ram/message_socket 2|0| {name} Detected |red|black|0.07||0'
+
+CONTROL_CHARS = re.compile(r'[\x00-\x1f\x7f]')
+
+def check_entry_name(name: str) -> str:
+    """A device name that fits between the quotes of a list line"""
+    name = (name or '').strip()
+    if not name:
+        raise ValueError("Name required")
+    if '"' in name or CONTROL_CHARS.search(name):
+        raise ValueError(f"Name may not contain quotes or control characters: {name!r}")
+    return name
+
+def valid_list_name(list_name) -> bool:
+    return (isinstance(list_name, str) and list_name and list_name == os.path.basename(list_name)
+            and not list_name.startswith('.'))
+
+
+class ListTransaction:
+    """Pending edits to list files, applied with one rewrite per list"""
+
+    def __init__(self):
+        self.lists = {}
+        self.activate = set()
+        self.allow_shell = bool(load_settings().get('allow_shell_commands', False))
+        self.errors = []
+        self.counts = {'added': 0, 'updated': 0, 'removed': 0, 'moved': 0}
+        self.op_count = 0
+
+    def _entries(self, list_name: str, create: bool = False) -> dict:
+        """Lines of a list keyed by upper-case pattern (comments keep their position)"""
+        if list_name in self.lists:
+            return self.lists[list_name]
+        path = os.path.join(LISTS_DIR, list_name)
+        entries = {}
+        if os.path.isfile(path):
+            with open(path, 'r') as f:
+                for index, line in enumerate(f):
+                    parsed = parse_list_line(line)
+                    key = parsed[0].upper() if parsed else ('#', index)
+                    entries[key] = line if line.endswith('\n') else line + '\n'
+        elif not create:
+            raise ValueError(f"List {list_name} not found")
+        self.lists[list_name] = entries
+        return entries
+
+    def clear(self, list_name: str):
+        """Remove every entry of a list, keeping its comments and '#!' rules line"""
+        entries = self._entries(list_name, create=True)
+        for key in [key for key in entries if isinstance(key, str)]:
+            del entries[key]
+            self.counts['removed'] += 1
+
+    def add(self, list_name: str, mac: str, name: str, command: str = None):
+        if not valid_list_name(list_name):
+            raise ValueError(f"Invalid list name: {list_name}")
+        mac = mac.strip()
+        if not (name or '').strip():
+            raise ValueError(f"Name required for {mac}")
+        name = check_entry_name(name)
+        if not mac or CONTROL_CHARS.search(mac) or ' ' in mac:
+            raise ValueError(f"Invalid pattern: {mac!r}")
+        parse_pattern(mac)
+        command = (command or '').strip() or DEFAULT_COMMAND
+        if CONTROL_CHARS.search(command):
+            raise ValueError(f"Command may not contain control characters: {command!r}")
+        if parse_action(command) is None and not self.allow_shell:
+            raise ValueError(f"Shell commands are disabled (allow_shell_commands): {command}")
+        if mac[:5].lower() != 'ssid:':
+            mac = mac.upper()
+        entries = self._entries(list_name, create=True)
+        key = mac.upper()
+        self.counts['updated' if key in entries else 'added'] += 1
+        entries[key] = f'{mac} "{name}" {command}\n'
+        self.activate.add(list_name)
+
+    def remove(self, mac: str, list_name: str = None) -> int:
+        key = mac.strip().upper()
+        names = [list_name] if list_name else [os.path.basename(path) for path in args.mac_list]
+        removed = 0
+        for name in names:
+            if self._entries(name).pop(key, None) is not None:
+                removed += 1
+        if not removed:
+            raise ValueError(f"{mac} not found")
+        self.counts['removed'] += removed
+        return removed
+
+    def move(self, mac: str, from_list: str, to_list: str):
+        key = mac.strip().upper()
+        line = self._entries(from_list).pop(key, None)
+        if line is None:
+            raise ValueError(f"{mac} not found in {from_list}")
+        if not valid_list_name(to_list):
+            raise ValueError(f"Invalid list name: {to_list}")
+        self._entries(to_list, create=True)[key] = line
+        self.activate.add(to_list)
+        self.counts['moved'] += 1
+
+    def set_rules(self, list_name: str, rules: dict):
+        """Replace the list's '#!' proximity rules line (none if rules is empty)"""
+        entries = self._entries(list_name)
+        kept = {key: line for key, line in entries.items() if not line.startswith('#!')}
+        entries.clear()
+        if rules:
+            entries[('#!',)] = format_rules_line(rules)
+        entries.update(kept)
+
+    def apply(self, op: dict):
+        """Apply one operation dict, recording (not raising) validation errors"""
+        self.op_count += 1
+        try:
+            kind = op.get('op')
+            if kind == 'add':
+                self.add(op['list'], op['mac'], op.get('name'), op.get('command'))
+            elif kind == 'remove':
+                self.remove(op['mac'], op.get('list'))
+            elif kind == 'move':
+                self.move(op['mac'], op['from'], op['to'])
+            else:
+                raise ValueError(f"Unknown op: {kind}")
+        except (KeyError, ValueError, OSError) as e:
+            self.errors.append({'index': self.op_count - 1, 'op': op, 'error': str(e)})
+
+    def commit(self):
+        """Write every touched list, then update the config and reload once"""
+        global mac_entries
+        tmp_files = []
+        try:
+            for list_name, entries in self.lists.items():
+                path = os.path.join(LISTS_DIR, list_name)
+                tmp_path = f"{path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    f.writelines(entries.values())
+                tmp_files.append((tmp_path, path))
+        except Exception:
+            for tmp_path, _ in tmp_files:
+                os.remove(tmp_path)
+            raise
+        for tmp_path, path in tmp_files:
+            os.replace(tmp_path, path)
+
+        active_lists = [os.path.basename(path) for path in args.mac_list]
+        active_lists += [name for name in sorted(self.activate) if name not in active_lists]
+        args.mac_list = [os.path.join(LISTS_DIR, name) for name in active_lists]
+        all_lists = set(get_all_available_lists())
+        save_lists_config({
+            'active': active_lists,
+            'inactive': list(all_lists - set(active_lists))
+        })
+        mac_entries = read_mac_list(args.mac_list)
+        bump_state('lists')
+
+@route('/api/lists/batch', methods=['POST'])
+def batch_lists():
+    """Apply many add/remove/move operations at once.
+
+    Body: {"operations": [{"op": "add", "list": ..., "mac": ..., "name": ..., "command": ...},
+                          {"op": "remove", "mac": ..., "list": ...},
+                          {"op": "move", "mac": ..., "from": ..., "to": ...}]}
+    Nothing is written unless every operation is valid.
+    """
+    try:
+        operations = (request.json or {}).get('operations')
+        if not isinstance(operations, list):
+            return jsonify({'status': 'error', 'message': 'operations list required'}), 400
+
+        with lists_lock:
+            tx = ListTransaction()
+            for op in operations:
+                tx.apply(op if isinstance(op, dict) else {})
+            if tx.errors:
+                return jsonify({'status': 'error', 'message': 'No changes made', 'errors': tx.errors[:100]}), 400
+            tx.commit()
+
+        print_status(f"Batch list update: {tx.counts}", Fore.GREEN)
+        return jsonify({'status': 'success', 'lists': sorted(tx.lists), **tx.counts})
+    except Exception as e:
+        print_status(f"Error in batch list update: {e}", Fore.RED)
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
+@route('/api/lists/<list_name>/rules', methods=['GET', 'POST'])
+def list_rules(list_name):
+    """Read or replace a list's proximity rules (min_rssi, rising, dwell)"""
+    path = os.path.join(LISTS_DIR, list_name)
+    if not valid_list_name(list_name) or not os.path.isfile(path):
+        return jsonify({'status': 'error', 'message': f'List {list_name} not found'}), 404
+
+    if request.method == 'GET':
+        rules = {}
+        with open(path, 'r') as f:
+            for line in f:
+                if line.startswith('#!'):
+                    try:
+                        rules.update(parse_rules_line(line))
+                    except ValueError:
+                        pass
+        return jsonify({'status': 'success', 'rules': rules})
+
+    try:
+        rules = {}
+        for key, value in (request.json or {}).items():
+            if key not in LIST_RULES:
+                raise ValueError(f"unknown rule: {key}")
+            if value is not None:
+                rules[key] = LIST_RULES[key](value)
+        with lists_lock:
+            tx = ListTransaction()
+            tx.set_rules(list_name, rules)
+            tx.commit()
+        print_status(f"Rules for {list_name}: {rules or 'none'}", Fore.GREEN)
+        return jsonify({'status': 'success', 'rules': rules})
+    except (TypeError, ValueError) as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@route('/api/lists/<list_name>/import', methods=['POST'])
+def import_list(list_name):
+    """Stream CSV (mac,name[,command]) or NDJSON / JSON array entries into a list.
+
+    ?mode=replace removes the existing entries first (comments and the
+    #! rules line stay). The import is all-or-nothing.
+    """
+    import csv
+    import io
+    if not valid_list_name(list_name):
+        return jsonify({'status': 'error', 'message': 'Invalid list name'}), 400
+
+    fmt = request.args.get('format') or ('json' if 'json' in (request.mimetype or '') else 'csv')
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8', errors='replace')
+    try:
+        with lists_lock:
+            tx = ListTransaction()
+            if request.args.get('mode') == 'replace':
+                tx.clear(list_name)
+
+            if fmt == 'csv':
+                for row in csv.reader(stream):
+                    if not row or row[0].strip().startswith('#') or row[0].strip().lower() == 'mac':
+                        continue
+                    tx.apply({'op': 'add', 'list': list_name, 'mac': row[0],
+                              'name': row[1] if len(row) > 1 else '',
+                              'command': row[2] if len(row) > 2 else None})
+            else:
+                first = stream.read(1)
+                while first and first.isspace():
+                    first = stream.read(1)
+                if first == '[':
+                    # A JSON array has to be parsed whole
+                    items = json.loads(first + stream.read())
+                else:
+                    # NDJSON: one object per line, parsed as it arrives
+                    items = (json.loads(line) for line in itertools.chain([first + stream.readline()], stream)
+                             if line.strip())
+                for item in items:
+                    tx.apply(dict(item, op='add', list=list_name) if isinstance(item, dict) else {})
+
+            if tx.errors:
+                return jsonify({'status': 'error', 'message': 'No changes made', 'errors': tx.errors[:100]}), 400
+            tx.commit()
+
+        print_status(f"Imported into {list_name}: {tx.counts}", Fore.GREEN)
+        return jsonify({'status': 'success', **tx.counts})
+    except Exception as e:
+        print_status(f"Error importing list: {e}", Fore.RED)
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@route('/api/lists/<list_name>/export')
+def export_list(list_name):
+    """Stream a list as CSV (default) or NDJSON (?format=json)"""
+    import csv
+    import io
+    path = os.path.join(LISTS_DIR, list_name)
+    if not valid_list_name(list_name) or not os.path.isfile(path):
+        return jsonify({'status': 'error', 'message': f'List {list_name} not found'}), 404
+    fmt = request.args.get('format', 'csv')
+
+    def generate():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == 'csv':
+            yield 'mac,name,command\r\n'
+        with open(path, 'r') as f:
+            for line in f:
+                parsed = parse_list_line(line)
+                if parsed is None:
+                    continue
+                mac, name, command = parsed
+                if fmt == 'csv':
+                    writer.writerow([mac, name, command])
+                    yield buffer.getvalue()
+                    buffer.seek(0)
+                    buffer.truncate()
+                else:
+                    yield json.dumps({'mac': mac, 'name': name, 'command': command}) + '\n'
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'application/x-ndjson'
+    response = app.response_class(generate(), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename="{list_name}.{"csv" if fmt == "csv" else "ndjson"}"'
+    return response
+
+@route('/api/settings', methods=['GET'])
 def get_settings():
     """Get current settings"""
     settings = load_settings()
@@ -1138,10 +4274,9 @@ def get_settings():
         'interfaces': interfaces
     })
 
-@app.route('/api/apply-settings', methods=['POST'])
+@route('/api/apply-settings', methods=['POST'])
 def apply_settings():
     """Apply new settings"""
-    global stop_flag
     try:
         new_settings = request.json
         print_status(f"Received settings: {new_settings}", Fore.CYAN)
@@ -1151,14 +4286,20 @@ def apply_settings():
             return jsonify({'status': 'error', 'message': 'Capture time must be at least 1 second'})
         
         # Convert settings to the correct format
-        settings_to_save = {
+        settings_to_save = load_settings()
+        settings_to_save.update({
             'interface': new_settings['interface'],
             'capture_time': new_settings['captureTime'],
             'band2G': new_settings['band2G'],
             'band5G': new_settings['band5G'],
             'channels2G': [int(ch) for ch in new_settings['channels2G']],
             'channels5G': [int(ch) for ch in new_settings['channels5G']]
-        }
+        })
+        
+        if 'captureBudgetMb' in new_settings:
+            if new_settings['captureBudgetMb'] < 1:
+                return jsonify({'status': 'error', 'message': 'Capture budget must be at least 1 MB'})
+            settings_to_save['capture_budget_mb'] = new_settings['captureBudgetMb']
         
         if not settings_to_save['band2G'] and not settings_to_save['band5G']:
             return jsonify({'status': 'error', 'message': 'At least one band must be enabled'})
@@ -1178,26 +4319,23 @@ def apply_settings():
         args.capture_time = settings_to_save['capture_time']
         args.band_2 = settings_to_save['band2G']
         args.band_5 = settings_to_save['band5G']
+        bump_state('settings')
         
-        # Pause monitoring temporarily
-        stop_flag = True
-        time.sleep(1)
-        
-        # Restart wireless interface with new settings
-        if restart_wireless_interface():
-            stop_flag = False
+        # Stop the capture and hold the next one back while the interface restarts
+        with capture_hold:
+            restart_capture(timeout=5)
+            restarted = restart_wireless_interface()
+        if restarted:
             print_status("Settings applied successfully", Fore.GREEN)
             return jsonify({'status': 'success'})
         else:
-            stop_flag = False
             return jsonify({'status': 'error', 'message': 'Failed to restart wireless interface'})
             
     except Exception as e:
         print_status(f"Error applying settings: {e}", Fore.RED)
-        stop_flag = False
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/reset-settings', methods=['GET'])
+@route('/api/reset-settings', methods=['GET'])
 def reset_settings():
     """Reset settings to defaults"""
     try:
@@ -1206,12 +4344,11 @@ def reset_settings():
             args.capture_time = DEFAULT_SETTINGS['capture_time']
             args.band_2 = DEFAULT_SETTINGS['band2G']
             args.band_5 = DEFAULT_SETTINGS['band5G']
+            bump_state('settings')
             
-            stop_flag = True
-            time.sleep(1)
-            restart_wireless_interface()
-            time.sleep(2)
-            stop_flag = False
+            with capture_hold:
+                restart_capture(timeout=5)
+                restart_wireless_interface()
             
             return jsonify({'status': 'success'})
         else:
@@ -1220,7 +4357,7 @@ def reset_settings():
         print_status(f"Error resetting settings: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/toggle-interface', methods=['POST'])
+@route('/api/toggle-interface', methods=['POST'])
 def toggle_interface():
     """Toggle interface up/down"""
     try:
@@ -1244,29 +4381,597 @@ def toggle_interface():
         print_status(f"Error toggling interface: {e}", Fore.RED)
         return jsonify({'status': 'error', 'message': str(e)})
 
-@app.route('/api/interface-status', methods=['GET'])
+@route('/api/interface-status', methods=['GET'])
 def get_interface_status():
     """Get current interface status"""
     settings = load_settings()
     interface = settings.get('interface', 'wlan0')
     return jsonify(check_interface_status(interface))
 
-# Set Flask logging level
-app.logger.setLevel(logging.ERROR)
+@route('/api/stats')
+@conditional('devices')
+def get_stats():
+    """Detection counts over time. ?resolution=minute|hour (default hour),
+    ?by=list|oui|channel with optional ?key=, ?since=epoch seconds and
+    ?format=heatmap for a weekday x hour matrix of the hourly buckets"""
+    resolution = request.args.get('resolution', 'hour')
+    dimension = request.args.get('by')
+    key = request.args.get('key')
+    if resolution not in STATS_RESOLUTIONS:
+        return jsonify({'status': 'error', 'message': f"resolution must be one of {', '.join(STATS_RESOLUTIONS)}"}), 400
+    if dimension is not None and dimension not in STATS_DIMENSIONS:
+        return jsonify({'status': 'error', 'message': f"by must be one of {', '.join(STATS_DIMENSIONS)}"}), 400
+    if key is not None and dimension is None:
+        return jsonify({'status': 'error', 'message': 'key needs by'}), 400
+    if dimension == 'oui' and key:
+        key = key.upper()
+    series = detection_stats.query(resolution, dimension, key, request.args.get('since', type=float))
+    result = {
+        'resolution': resolution,
+        'bucket_seconds': STATS_RESOLUTIONS[resolution][0],
+        'by': dimension,
+        'key': key,
+        'buckets': series
+    }
+    if request.args.get('format') == 'heatmap':
+        if resolution != 'hour' or (dimension and not key):
+            return jsonify({'status': 'error', 'message': 'heatmap needs hourly buckets and a key when by is set'}), 400
+        result['heatmap'] = stats_heatmap(series)
+    return jsonify(result)
+
+@route('/api/cooccurrence')
+def get_cooccurrence():
+    """Devices seen together. ?window=hour|day|week (default day); ?mac= for
+    that device's strongest partners, plus ?with= for one pair's count;
+    without mac the window's strongest pairs"""
+    window = request.args.get('window', 'day')
+    mac = request.args.get('mac', '').strip().upper()
+    other = request.args.get('with', '').strip().upper()
+    if window not in COOCCUR_WINDOWS:
+        return jsonify({'status': 'error', 'message': f"window must be one of {', '.join(COOCCUR_WINDOWS)}"}), 400
+    for value in filter(None, (mac, other)):
+        if not MAC_REGEX.fullmatch(value):
+            return jsonify({'status': 'error', 'message': f"not a MAC address: {value}"}), 400
+    if other and not mac:
+        return jsonify({'status': 'error', 'message': 'with needs mac'}), 400
+    if other:
+        result = cooccurrence.pair(window, mac.replace('-', ':'), other.replace('-', ':'))
+    elif mac:
+        result = cooccurrence.partners(window, mac.replace('-', ':'))
+    else:
+        result = cooccurrence.summary(window)
+    result['window'] = window
+    result['window_seconds'] = COOCCUR_WINDOWS[window][0] * COOCCUR_WINDOWS[window][1]
+    return jsonify(result)
+
+@route('/api/watchlists')
+def get_watchlists():
+    """Loaded exact-MAC watchlists and their lookup counters"""
+    return jsonify({'watchlists': [watchlist.info() for watchlist in watchlists]})
+
+@route('/api/capture')
+def get_capture():
+    """Capture output size against its RAM disk budget"""
+    usage = capture.usage()
+    usage['running'] = capture.running()
+    usage['cycles'] = list(cycle_times)
+    return jsonify(usage)
+
+@route('/api/evidence')
+def get_evidence():
+    """Evidence sidecar state, capture filter and pcap files"""
+    return jsonify(evidence.info())
+
+@route('/api/autotune')
+def get_autotune():
+    """Recent capture autotuning decisions, newest last"""
+    return jsonify({
+        'capture_time': autotune_state['capture_time'],
+        'gap': autotune_state['gap'],
+        'decisions': list(autotune_decisions)
+    })
+
+@route('/api/supervisor')
+def get_supervisor():
+    """Capture failures, circuit breaker state and seconds spent not capturing"""
+    return jsonify(supervisor.info())
+
+@route('/api/supervisor/reset', methods=['POST'])
+def reset_supervisor():
+    """Close the circuit breaker and retry the capture now"""
+    supervisor.reset()
+    return jsonify({'status': 'success'})
+
+@route('/api/latency')
+def get_latency():
+    """Detection latency percentiles (seconds after first packet) per list and
+    capture setting; ?sla=N adds the share of alerts whose command started
+    within N seconds"""
+    sla = request.args.get('sla', type=float)
+    groups = []
+    for (list_name, capture_time, channel_count), samples in list(latency_samples.items()):
+        samples = list(samples)
+        group = {
+            'list': list_name,
+            'capture_time': capture_time,
+            'channels': channel_count,
+            'count': len(samples),
+            'stages': {stage: percentiles([s[stage] for s in samples if stage in s]) for stage in TRACE_STAGES}
+        }
+        if sla is not None:
+            fired = [s['command_start'] for s in samples if 'command_start' in s]
+            group['sla'] = {
+                'target': sla,
+                'met': round(sum(1 for t in fired if t <= sla) / len(fired), 3) if fired else None
+            }
+        groups.append(group)
+    return jsonify({'stages': TRACE_STAGES, 'groups': groups})
+
+# Multi-sensor aggregation
+#
+# Sensors started with --aggregator URL push their detections to a central
+# instance started with "oui-detect.py aggregate". Detections are sent as
+# gzip'd JSON batches; batches that cannot be delivered are spooled to disk
+# and retried. The aggregator merges detections of the same MAC seen within
+# --window seconds into one log line and serves the normal dashboard.
+
+UPLINK_BATCH_MAX = 200
+UPLINK_INTERVAL = 5
+UPLINK_TIMEOUT = 10
+UPLINK_MAX_BACKOFF = 300
+SPOOL_FILE = os.path.join(SCRIPT_DIR, 'uplink_spool.jsonl')
+SPOOL_MAX_BYTES = 5 * 1024 * 1024
+
+aggregate_lock = threading.Lock()
+aggregate_batch_lock = threading.Lock()  # one batch at a time, so a resend waits for the original
+aggregate_window = ALERT_COOLDOWN
+aggregate_devices = {}
+aggregate_sensors = {}
+aggregate_batch_ids = {}
+
+
+def make_batch(sensor_id: str, detections: list) -> dict:
+    """Wrap detections in a batch with an id the aggregator uses to drop resends"""
+    return {
+        'batch_id': f"{sensor_id}-{time.time_ns()}",
+        'sensor': sensor_id,
+        'detections': detections
+    }
+
+def send_batch(url: str, batch: dict) -> bool:
+    """POST one gzip'd batch to the aggregator, returns True if it was accepted"""
+    import gzip
+    import urllib.request
+    body = gzip.compress(json.dumps(batch).encode())
+    req = urllib.request.Request(url.rstrip('/') + '/api/ingest', data=body, method='POST', headers={
+        'Content-Type': 'application/json',
+        'Content-Encoding': 'gzip'
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=UPLINK_TIMEOUT) as response:
+            return json.load(response).get('status') == 'success'
+    except Exception as e:
+        print_status(f"Aggregator unreachable: {e}", Fore.YELLOW)
+        return False
+
+def spool_batch(batch: dict):
+    """Keep an undelivered batch on disk for a later retry"""
+    try:
+        if os.path.exists(SPOOL_FILE) and os.path.getsize(SPOOL_FILE) > SPOOL_MAX_BYTES:
+            print_status(f"Spool full, dropping {len(batch['detections'])} detections", Fore.RED)
+            return
+        with open(SPOOL_FILE, 'a') as f:
+            f.write(json.dumps(batch) + "\n")
+    except Exception as e:
+        print_status(f"Error spooling batch: {e}", Fore.RED)
+
+def flush_spool(url: str) -> bool:
+    """Resend spooled batches in order, returns True once the spool is empty"""
+    if not os.path.exists(SPOOL_FILE):
+        return True
+    with open(SPOOL_FILE, 'r') as f:
+        pending = [line for line in f if line.strip()]
+
+    sent = 0
+    for line in pending:
+        try:
+            batch = json.loads(line)
+        except json.JSONDecodeError:
+            sent += 1
+            continue
+        if not send_batch(url, batch):
+            break
+        sent += 1
+
+    if sent == len(pending):
+        os.remove(SPOOL_FILE)
+        return True
+    tmp_file = SPOOL_FILE + '.tmp'
+    with open(tmp_file, 'w') as f:
+        f.writelines(pending[sent:])
+    os.replace(tmp_file, SPOOL_FILE)
+    return False
+
+def push_detections(url: str, sensor_id: str, detections: list) -> bool:
+    """Deliver detections, spooling them if the aggregator cannot be reached"""
+    batch = make_batch(sensor_id, detections)
+    if flush_spool(url) and send_batch(url, batch):
+        return True
+    spool_batch(batch)
+    return False
+
+def uplink_loop(url: str, sensor_id: str):
+    """Drain the uplink stage into batches for the aggregator"""
+    backoff = UPLINK_INTERVAL
+    while not shutdown.is_set():
+        detections = []
+        deadline = time.time() + UPLINK_INTERVAL
+        while len(detections) < UPLINK_BATCH_MAX:
+            try:
+                detections.append(pipeline['uplink'].get(timeout=max(deadline - time.time(), 0.01)))
+            except queue.Empty:
+                break
+
+        if detections:
+            delivered = push_detections(url, sensor_id, detections)
+        elif os.path.exists(SPOOL_FILE):
+            delivered = flush_spool(url)
+        else:
+            continue
+
+        if delivered:
+            backoff = UPLINK_INTERVAL
+        else:
+            shutdown.wait(backoff)
+            backoff = min(backoff * 2, UPLINK_MAX_BACKOFF)
+
+def ingest_detections(sensor_id: str, detections: list) -> int:
+    """Merge a sensor's detections into the aggregate view.
+
+    A MAC seen again within aggregate_window seconds (by any sensor) updates
+    the existing record; otherwise a new line goes to the log. Returns the
+    number of new log lines.
+    """
+    new_lines = []
+    with aggregate_lock:
+        for d in detections:
+            mac = d['mac'].upper()
+            seen_at = float(d.get('time', time.time()))
+            record = aggregate_devices.get(mac)
+            if record and seen_at - record['last'] < aggregate_window:
+                record['last'] = max(record['last'], seen_at)
+                record['count'] += 1
+                record['sensors'].add(sensor_id)
+                continue
+            aggregate_devices[mac] = {
+                'first': seen_at,
+                'last': seen_at,
+                'count': 1,
+                'sensors': {sensor_id}
+            }
+            timestamp = datetime.fromtimestamp(seen_at).strftime('%Y-%m-%d %H:%M')
+            detection_stats.add(seen_at, d.get('list', ''), mac, d.get('channel', 'unknown'))
+            new_lines.append(f"[{timestamp}] | {mac} | {d.get('name', '')} | "
+                             f"Ch: {d.get('channel', 'unknown')} | List: {d.get('list', '')} @ {sensor_id}")
+
+        # Forget devices that left the window so memory stays bounded
+        cutoff = time.time() - aggregate_window
+        for mac in [mac for mac, record in aggregate_devices.items() if record['last'] < cutoff]:
+            del aggregate_devices[mac]
+
+        if new_lines:
+            with open(LOG_FILE, 'a') as f:
+                f.write("\n".join(new_lines) + "\n")
+            bump_state('devices')
+
+    for line in new_lines:
+        print_status(line, Fore.GREEN)
+    return len(new_lines)
+
+@route('/api/ingest', methods=['POST'])
+def ingest():
+    """Accept a batch of detections from a sensor"""
+    try:
+        body = request.get_data()
+        if request.headers.get('Content-Encoding') == 'gzip':
+            import gzip
+            body = gzip.decompress(body)
+        batch = json.loads(body)
+        sensor_id = str(batch['sensor'])
+        detections = batch['detections']
+
+        with aggregate_batch_lock:
+            with aggregate_lock:
+                sensor = aggregate_sensors.setdefault(sensor_id, {'batches': 0, 'detections': 0, 'last_seen': None})
+                sensor['last_seen'] = datetime.now().isoformat()
+                # Resent batches (e.g. after a timeout) are acknowledged but not counted twice
+                if batch.get('batch_id') in aggregate_batch_ids:
+                    return jsonify({'status': 'success', 'accepted': 0, 'duplicate': True})
+
+            accepted = ingest_detections(sensor_id, detections)
+
+            # Only a batch that went in is a duplicate when resent
+            with aggregate_lock:
+                aggregate_batch_ids[batch.get('batch_id')] = time.time()
+                if len(aggregate_batch_ids) > 10000:
+                    for batch_id in list(aggregate_batch_ids)[:5000]:
+                        del aggregate_batch_ids[batch_id]
+                sensor['batches'] += 1
+                sensor['detections'] += len(detections)
+        return jsonify({'status': 'success', 'accepted': accepted})
+    except Exception as e:
+        print_status(f"Error ingesting batch: {e}", Fore.RED)
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+@route('/api/sensors')
+def get_sensors():
+    """Per-sensor delivery counters on the aggregator"""
+    with aggregate_lock:
+        return jsonify({
+            'window': aggregate_window,
+            'tracked_devices': len(aggregate_devices),
+            'sensors': aggregate_sensors
+        })
+
+def run_aggregator(argv: list):
+    """Run a central instance that only ingests and serves sensor detections"""
+    global args, LOG_FILE, aggregate_window
+    console.start()
+
+    parser = argparse.ArgumentParser(prog='oui-detect.py aggregate',
+                                     description='Aggregate detections pushed by several sensors')
+    parser.add_argument('-p', '--port', type=int, default=5000, help='Web interface / ingest port')
+    parser.add_argument('-w', '--window', type=int, default=ALERT_COOLDOWN,
+                        help='Seconds within which repeat detections of a MAC are merged')
+    parser.add_argument('-l', '--log-file', default=os.path.join(SCRIPT_DIR, 'aggregated_macs.log'),
+                        help='Combined detection log')
+    agg_args = parser.parse_args(argv)
+
+    LOG_FILE = agg_args.log_file
+    aggregate_window = agg_args.window
+    # The dashboard routes read these; an aggregator has no lists or radio of its own
+    args = argparse.Namespace(mac_list=[], capture_time=0, custom_mac=None, verbose=False,
+                              band_2=True, band_5=True, port=agg_args.port)
+    if not os.path.exists(LOG_FILE):
+        open(LOG_FILE, 'w').close()
+
+    from colorama import init
+    init(autoreset=True)
+    create_app()
+    detection_stats.load_log(LOG_FILE)
+    print_status("=== OUI Detector Aggregator Starting ===", Fore.GREEN)
+    print_status(f"Log file: {LOG_FILE}", Fore.CYAN)
+    print_status(f"Starting web interface on port {agg_args.port}...", Fore.CYAN)
+    app.run(host='0.0.0.0', port=agg_args.port, threaded=True, debug=False)
+
+def validate_list_file(filename: str) -> list:
+    """Return a list of problems found in a MAC list file"""
+    problems = []
+    seen = {}
+    with open(filename, 'r') as f:
+        for lineno, line in enumerate(f, 1):
+            stripped = line.strip()
+            if stripped.startswith('#!'):
+                try:
+                    parse_rules_line(stripped)
+                except ValueError as e:
+                    problems.append(f"{filename}:{lineno}: {e}")
+                continue
+            if not stripped or stripped.startswith('#'):
+                continue
+            parsed = parse_list_line(stripped)
+            if parsed is None:
+                problems.append(f"{filename}:{lineno}: malformed entry: {stripped}")
+                continue
+            mac, name, command = parsed
+            try:
+                parse_pattern(mac)
+                if command:
+                    parse_action(command)
+            except ValueError as e:
+                problems.append(f"{filename}:{lineno}: {e}")
+            if mac in seen:
+                problems.append(f"{filename}:{lineno}: duplicate of line {seen[mac]}: {mac}")
+            seen[mac] = lineno
+    return problems
+
+def cmd_validate_lists(sub_args) -> int:
+    """validate-lists: check list files for malformed or duplicate entries"""
+    failed = False
+    for filename in sub_args.mac_list:
+        try:
+            problems = validate_list_file(filename)
+        except OSError as e:
+            print_status(f"{filename}: {e}", Fore.RED)
+            failed = True
+            continue
+        for problem in problems:
+            print_status(problem, Fore.RED)
+        if problems:
+            failed = True
+        else:
+            print_status(f"{filename}: OK", Fore.GREEN)
+    return 1 if failed else 0
+
+def cmd_compile_lists(sub_args) -> int:
+    """compile-lists: merge list files into one normalized JSON file"""
+    entries = read_mac_list(sub_args.mac_list)
+    compiled = {
+        'sources': sub_args.mac_list,
+        'entries': entries
+    }
+    if sub_args.output == '-':
+        json.dump(compiled, sys.stdout, indent=4)
+        print()
+    else:
+        with open(sub_args.output, 'w') as f:
+            json.dump(compiled, f, indent=4)
+        print_status(f"Compiled {len(entries)} entries to {sub_args.output}", Fore.GREEN)
+    return 0
+
+def cmd_lookup(sub_args) -> int:
+    """lookup: show which list entries match the given MAC addresses"""
+    global watchlists
+    if not sub_args.mac_list and not sub_args.watchlist:
+        print_status("lookup needs -m and/or -W", Fore.RED)
+        return 2
+    entries = read_mac_list(sub_args.mac_list)
+    watchlists = load_watchlists(sub_args.watchlist)
+    found = False
+    for mac in sub_args.mac:
+        mac = mac.upper()
+        last_alerts.pop(mac, None)
+        matches = check_mac_match(f"{mac}, ", entries, [], apply_rules=False)
+        for name, full_mac, command, source_file in matches:
+            found = True
+            print_status(f"{full_mac} | {name} | List: {os.path.basename(source_file)}", Fore.GREEN)
+        if not matches:
+            print_status(f"{mac} | no match", Fore.YELLOW)
+    return 0 if found else 1
+
+def cmd_replay(sub_args) -> int:
+    """replay: run matching over saved airodump-ng CSV files"""
+    global verbose_mode, watchlists
+    verbose_mode = sub_args.verbose
+    debug_log.enabled = debug_log.echo = verbose_mode
+    entries = read_mac_list(sub_args.mac_list)
+    watchlists = load_watchlists(sub_args.watchlist)
+    total = 0
+    pushed = []
+    for csv_file in sub_args.csv:
+        with open(csv_file, 'r', errors='ignore') as f:
+            csv_content = f.readlines()
+        for line in csv_content:
+            for name, full_mac, command, source_file in check_mac_match(line, entries, csv_content):
+                total += 1
+                channel = extract_channel(line, csv_content)
+                if sub_args.log:
+                    log_detection(full_mac, name, source_file, channel)
+                else:
+                    print_status(f"{full_mac} | {name} | Ch: {channel} | List: {os.path.basename(source_file)}", Fore.GREEN)
+                if sub_args.aggregator:
+                    pushed.append({
+                        'time': time.time(),
+                        'mac': full_mac,
+                        'name': name,
+                        'channel': channel,
+                        'list': os.path.basename(source_file)
+                    })
+    print_status(f"{total} matches", Fore.CYAN)
+    if sub_args.aggregator and (pushed or os.path.exists(SPOOL_FILE)):
+        if not push_detections(sub_args.aggregator, sub_args.sensor_id, pushed):
+            print_status(f"Matches spooled to {SPOOL_FILE}", Fore.YELLOW)
+            return 1
+    return 0
+
+def cmd_compile_watchlist(sub_args) -> int:
+    """compile-watchlist: build an mmap-able Bloom filter watchlist of exact MACs"""
+    if not 0 < sub_args.fp_rate < 1:
+        print_status("--fp-rate must be between 0 and 1", Fore.RED)
+        return 1
+    macs = set()
+    skipped = 0
+    for filename in sub_args.mac_list:
+        with open(filename, 'r', errors='ignore') as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith('#'):
+                    continue
+                key = mac_bytes(re.split(r'[\s,]+', line, maxsplit=1)[0])
+                if key is None:
+                    skipped += 1
+                else:
+                    macs.add(key)
+    if skipped:
+        print_status(f"Skipped {skipped} lines without an exact MAC (use a normal list for patterns)", Fore.YELLOW)
+    name = sub_args.name or os.path.basename(sub_args.output)
+    write_watchlist(sub_args.output, macs, sub_args.fp_rate, name, sub_args.match_command or '')
+    watchlist = Watchlist(sub_args.output)
+    print_status(f"Compiled {watchlist.count} MACs to {sub_args.output}: {watchlist.bits // 8} byte filter, "
+                 f"{watchlist.hashes} hashes, {os.path.getsize(sub_args.output)} bytes total", Fore.GREEN)
+    return 0
+
+SUBCOMMANDS = {
+    'validate-lists': cmd_validate_lists,
+    'compile-lists': cmd_compile_lists,
+    'lookup': cmd_lookup,
+    'replay': cmd_replay,
+    'compile-watchlist': cmd_compile_watchlist,
+}
+
+def run_subcommand(argv: list) -> int:
+    """Run one of the offline sub-commands; none of them touch the web stack"""
+    parser = argparse.ArgumentParser(prog='oui-detect.py', description='OUI/MAC Address Monitor tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    p = subparsers.add_parser('validate-lists', help='Check list files for errors')
+    p.add_argument('mac_list', nargs='+', help='MAC list files')
+
+    p = subparsers.add_parser('compile-lists', help='Merge list files into one JSON file')
+    p.add_argument('mac_list', nargs='+', help='MAC list files')
+    p.add_argument('-o', '--output', default='-', help='Output file (default: stdout)')
+
+    p = subparsers.add_parser('lookup', help='Look up MAC addresses in list files')
+    p.add_argument('mac', nargs='+', help='MAC addresses to look up')
+    p.add_argument('-m', '--mac-list', default=[], nargs='+', help='MAC list files')
+    p.add_argument('-W', '--watchlist', nargs='+', help='Compiled watchlists')
+
+    p = subparsers.add_parser('replay', help='Match saved airodump-ng CSV files against lists')
+    p.add_argument('csv', nargs='+', help='airodump-ng CSV files')
+    p.add_argument('-m', '--mac-list', required=True, nargs='+', help='MAC list files')
+    p.add_argument('-W', '--watchlist', nargs='+', help='Compiled watchlists')
+    p.add_argument('-l', '--log', action='store_true', help='Write matches to the detection log')
+    p.add_argument('-v', '--verbose', action='store_true', help='Enable verbose debug output')
+    p.add_argument('--aggregator', help='Push matches to this aggregator URL')
+    p.add_argument('--sensor-id', default=socket.gethostname(), help='Sensor name reported to the aggregator')
+
+    p = subparsers.add_parser('compile-watchlist', help='Compile exact MACs into a Bloom filter watchlist')
+    p.add_argument('mac_list', nargs='+', help='Files with one exact MAC per line (extra columns ignored)')
+    p.add_argument('-o', '--output', required=True, help='Watchlist file to write')
+    p.add_argument('--fp-rate', type=float, default=0.001, help='Bloom filter false-positive rate')
+    p.add_argument('--name', help='Name reported on a match (default: output file name)')
+    p.add_argument('--command', dest='match_command', help='Command or built-in action run on a match')
+
+    sub_args = parser.parse_args(argv)
+    return SUBCOMMANDS[sub_args.command](sub_args)
 
 def main():
-    global args, mac_entries, verbose_mode
-    # Force unbuffered output
-    sys.stdout.reconfigure(line_buffering=True)
+    if len(sys.argv) > 1 and sys.argv[1] in SUBCOMMANDS:
+        sys.exit(run_subcommand(sys.argv[1:]))
+    if len(sys.argv) > 1 and sys.argv[1] == 'aggregate':
+        run_aggregator(sys.argv[2:])
+        return
+    run_daemon()
+
+def run_daemon():
+    global args, mac_entries, verbose_mode, watchlists
+    # Console output is written and flushed per batch by the writer thread
+    console.start()
     
-    parser = argparse.ArgumentParser(description='OUI/MAC Address Monitor')
+    parser = argparse.ArgumentParser(
+        description='OUI/MAC Address Monitor',
+        epilog=f"Offline tools: {', '.join(SUBCOMMANDS)} (run 'oui-detect.py <tool> -h'). "
+               "Central node: oui-detect.py aggregate")
     parser.add_argument('-m', '--mac-list', required=True, nargs='+', help='MAC list files')
     parser.add_argument('-t', '--capture-time', type=int, default=13, help='Capture time in seconds')
     parser.add_argument('-c', '--custom-mac', help='Custom MAC address for wireless interface')
     parser.add_argument('-v', '--verbose', action='store_true', help='Enable verbose debug output')
     parser.add_argument('-2', '--band-2', action='store_true', help='Enable 2.4GHz band (channels 1,6,11)')
     parser.add_argument('-5', '--band-5', action='store_true', help='Enable 5GHz band (channels 44,52,100,149,157,161)')
+    parser.add_argument('-a', '--auto-capture', action='store_true',
+                        help='Tune capture time per cycle between capture_min and capture_max')
+    parser.add_argument('-p', '--port', type=int, default=5000, help='Web interface port')
+    parser.add_argument('-W', '--watchlist', nargs='+', help='Compiled exact-MAC watchlists (see compile-watchlist)')
+    parser.add_argument('--capture-command',
+                        help='Run this instead of airodump-ng (e.g. bench/fake_airodump.py); skips interface setup')
+    parser.add_argument('--aggregator', help='Push detections to the aggregator at this URL')
+    parser.add_argument('--sensor-id', default=socket.gethostname(), help='Sensor name reported to the aggregator')
+    parser.add_argument('--evidence', metavar='DIR', help='Keep frames of watched devices in rolling pcaps here (tcpdump)')
+    parser.add_argument('--evidence-mb', type=int, default=32, help='Size of all evidence pcaps together in MB')
     args = parser.parse_args()
+
+    # Make sure the config directory exists
+    os.makedirs(os.path.dirname(LISTS_CONFIG_FILE), exist_ok=True)
     initialize_lists_config()
 
     if not args.band_2 and not args.band_5:
@@ -1275,12 +4980,13 @@ def main():
     config = load_lists_config()
     active_lists = config.get('active', [])
     if active_lists:
-        args.mac_list = [os.path.join('/home/pi/oui/list', name) for name in active_lists]
+        args.mac_list = [os.path.join(LISTS_DIR, name) for name in active_lists]
 
     # Initialize mac_entries globally
     mac_entries = read_mac_list(args.mac_list)
 
-    verbose_mode = args.verbose    
+    verbose_mode = args.verbose
+    debug_log.enabled = debug_log.echo = verbose_mode
     clear_line()
     print_status("=== OUI Detector Starting ===", Fore.GREEN)
     print_status(f"Log file: {LOG_FILE}", Fore.CYAN)
@@ -1291,31 +4997,67 @@ def main():
     # Initialize mac_entries globally
     mac_entries = read_mac_list(args.mac_list)
     
+    if args.capture_command:
+        import shlex
+        capture.command = shlex.split(args.capture_command)
+        print_status(f"Simulated capture: {args.capture_command}", Fore.YELLOW)
+
+    watchlists = load_watchlists(args.watchlist)
+    for watchlist in watchlists:
+        print_status(f"Watchlist {watchlist.name}: {watchlist.count} MACs", Fore.CYAN)
+
+    if args.evidence:
+        evidence.directory = os.path.abspath(args.evidence)
+        evidence.budget_mb = max(1, args.evidence_mb)
+        if capture.simulated:
+            print_status("Evidence capture needs a real interface, not started", Fore.YELLOW)
+    
     # Create log file if it doesn't exist
     if not os.path.exists(LOG_FILE):
         open(LOG_FILE, 'w').close()
         print_status("Created new log file", Fore.GREEN)
     
+    from colorama import init
+    init(autoreset=True)
+    create_app()
+    atexit.register(cleanup_on_exit)
+    detection_stats.load_log(LOG_FILE)
+    restore_snapshot()
+    capture.remove_stale()
+    try:
+        start_pipeline(load_settings(), uplink=bool(args.aggregator))
+    except (TypeError, ValueError) as e:
+        print_status(f"Bad pipeline settings: {e}", Fore.RED)
+        sys.exit(1)
+    interface_monitor.start()
+    threading.Thread(target=snapshot_loop, daemon=True).start()
+
     # Start monitoring thread
     monitor_thread = threading.Thread(target=monitoring_loop, args=(args,))
     monitor_thread.daemon = True
     monitor_thread.start()
+
+    if args.aggregator:
+        print_status(f"Pushing detections to {args.aggregator} as {args.sensor_id}", Fore.CYAN)
+        uplink_thread = threading.Thread(target=uplink_loop, args=(args.aggregator, args.sensor_id))
+        uplink_thread.daemon = True
+        uplink_thread.start()
     
     try:
         # Start Flask server with reduced logging
-        print_status("Starting web interface on port 5000...", Fore.CYAN)
-        app.run(host='0.0.0.0', port=5000, threaded=True, debug=False)
+        print_status(f"Starting web interface on port {args.port}...", Fore.CYAN)
+        app.run(host='0.0.0.0', port=args.port, threaded=True, debug=False)
     except KeyboardInterrupt:
         print_status("\nShutting down...", Fore.YELLOW)
-        stop_flag = True
+        shutdown.set()
         monitor_thread.join(timeout=2)
-        cleanup_files()
+        capture.close()
         sys.exit(0)
     except Exception as e:
         print_status(f"Error: {e}", Fore.RED)
-        stop_flag = True
+        shutdown.set()
         monitor_thread.join(timeout=2)
-        cleanup_files()
+        capture.close()
         sys.exit(1)
 
 if __name__ == "__main__":
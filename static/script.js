@@ -1,9 +1,15 @@
 // Global variables
 let isPaused = false;
 let cycleCount = 0;
-let currentLogs = new Set();
-let lastScrollPosition = 0;
+let deviceEntries = [];      // raw log lines, oldest first
+let deviceCursor = '';       // /api/devices cursor of the last line we have
+let deviceFetchInFlight = false;
+let renderedRange = null;    // [start, end, total] of rows currently in the DOM
+let rowPitch = 0;            // row height + gap in px, measured on first render
+let renderScheduled = false;
 let isScrolledToBottom = true;
+let pollingStarted = false;
+const RENDER_OVERSCAN = 10;
 let serverCycleCount = 0;
 let currentLists = [];
 const MAC_PATTERN = /^([0-9A-Fa-f]{2}[:-]){5}([0-9A-Fa-f]{2})$/;
@@ -45,6 +51,11 @@ function switchTab(tabName) {
     document.querySelectorAll('.tab-content').forEach(content => {
         content.classList.toggle('active', content.id === `${tabName}-tab`);
     });
+
+    if (tabName === 'devices') {
+        renderedRange = null;
+        scheduleDeviceRender();
+    }
 }
 
 // List Management
@@ -764,62 +775,120 @@ async function ignoreDevice(mac) {
 }
 
 // List Management
-function updateDeviceList() {
-    if (isPaused) return;
-    
-    fetch('/api/devices')
-        .then(response => response.json())
-        .then(devices => {
-            const newLogs = new Set(devices);
-            
-            if (hasChanges(newLogs)) {
-                checkScrollPosition();
-                
-                const fragment = document.createDocumentFragment();
-                devices.forEach(device => {
-                    const entryElement = createDeviceEntry(device);
-                    if (entryElement) {
-                        fragment.appendChild(entryElement);
-                    }
-                });
-                
-                deviceList.innerHTML = '';
-                deviceList.appendChild(fragment);
-                
-                restoreScrollPosition();
-                currentLogs = newLogs;
+// The log can hold tens of thousands of lines, so only new lines are fetched
+// (via the /api/devices cursor) and only the rows in view are in the DOM.
+async function updateDeviceList() {
+    if (isPaused || document.hidden || deviceFetchInFlight) return;
+    deviceFetchInFlight = true;
+
+    try {
+        let more = true;
+        let changed = false;
+        while (more) {
+            const response = await fetch(`/api/devices?since=${encodeURIComponent(deviceCursor)}`);
+            const data = await response.json();
+            if (data.reset && deviceEntries.length) {
+                deviceEntries = [];
+                changed = true;
             }
-        })
-        .catch(error => {
-            console.error('Error fetching devices:', error);
-            showNotification('Failed to update device list', 'error');
-        });
+            if (data.entries.length) {
+                deviceEntries.push(...data.entries);
+                changed = true;
+            }
+            deviceCursor = data.cursor;
+            more = data.more;
+        }
+
+        if (changed) {
+            checkScrollPosition();
+            renderedRange = null;
+            renderDeviceWindow();
+            restoreScrollPosition();
+        }
+    } catch (error) {
+        console.error('Error fetching devices:', error);
+        showNotification('Failed to update device list', 'error');
+    } finally {
+        deviceFetchInFlight = false;
+    }
+}
+
+function resetDeviceList() {
+    deviceEntries = [];
+    deviceCursor = '';
+    renderedRange = null;
+    renderDeviceWindow();
+}
+
+function deviceScroller() {
+    return deviceList.parentElement;
+}
+
+// Render only the rows visible in the scroll container, plus some overscan
+function renderDeviceWindow() {
+    const scroller = deviceScroller();
+    const total = deviceEntries.length;
+
+    if (!rowPitch && total) {
+        const probe = createDeviceEntry(deviceEntries[total - 1]) || document.createElement('div');
+        probe.classList.add('device-entry');
+        deviceList.innerHTML = '';
+        deviceList.appendChild(probe);
+        rowPitch = probe.offsetHeight ? probe.offsetHeight + 5 : 0;  // 0 while the tab is hidden
+    }
+    const pitch = rowPitch || 40;
+
+    const visibleRows = Math.ceil(scroller.clientHeight / pitch) + 1;
+    const start = Math.max(0, Math.floor(scroller.scrollTop / pitch) - RENDER_OVERSCAN);
+    const end = Math.min(total, start + visibleRows + 2 * RENDER_OVERSCAN);
+
+    if (renderedRange && renderedRange[0] === start && renderedRange[1] === end && renderedRange[2] === total) {
+        return;
+    }
+    renderedRange = [start, end, total];
+
+    const fragment = document.createDocumentFragment();
+    for (let i = start; i < end; i++) {
+        const entryElement = createDeviceEntry(deviceEntries[i]);
+        if (entryElement) {
+            fragment.appendChild(entryElement);
+        }
+    }
+
+    // box-sizing is border-box, so the height includes the top padding
+    deviceList.style.height = `${total * pitch}px`;
+    deviceList.style.paddingTop = `${start * pitch}px`;
+    deviceList.innerHTML = '';
+    deviceList.appendChild(fragment);
+}
+
+function scheduleDeviceRender() {
+    if (renderScheduled) return;
+    renderScheduled = true;
+    requestAnimationFrame(() => {
+        renderScheduled = false;
+        checkScrollPosition();
+        renderDeviceWindow();
+    });
 }
 
 // Scroll Management
 function checkScrollPosition() {
-    isScrolledToBottom = deviceList.scrollHeight - deviceList.clientHeight <= deviceList.scrollTop + 1;
-    lastScrollPosition = deviceList.scrollTop;
+    const scroller = deviceScroller();
+    isScrolledToBottom = scroller.scrollHeight - scroller.clientHeight <= scroller.scrollTop + 1;
 }
 
 function restoreScrollPosition() {
+    const scroller = deviceScroller();
     if (isScrolledToBottom) {
-        deviceList.scrollTop = deviceList.scrollHeight;
-    } else {
-        deviceList.scrollTop = lastScrollPosition;
+        scroller.scrollTop = scroller.scrollHeight;
+        renderDeviceWindow();
     }
 }
 
-function hasChanges(newLogs) {
-    if (newLogs.size !== currentLogs.size) return true;
-    for (let log of newLogs) {
-        if (!currentLogs.has(log)) return true;
-    }
-    return false;
-}
-
 // Status Management
 async function updateStatus() {
+    if (document.hidden) return;
     try {
         const response = await fetch('/api/status');
         if (!response.ok) return;
@@ -887,8 +956,7 @@ async function clearLogs() {
         const data = await response.json();
         
         if (data.status === 'success') {
-            deviceList.innerHTML = '';
-            currentLogs.clear();
+            resetDeviceList();
             showNotification('Logs cleared');
         } else {
             showNotification('Failed to clear logs', 'error');
@@ -1064,22 +1132,26 @@ document.addEventListener('DOMContentLoaded', () => {
     updateStatusIndicators();
     updateConfigInfo();
     
-    const deviceList = document.getElementById('device-list');
-    if (deviceList) {
-        deviceList.addEventListener('scroll', checkScrollPosition);
-    }
+    deviceScroller().addEventListener('scroll', scheduleDeviceRender, { passive: true });
+    window.addEventListener('resize', scheduleDeviceRender);
 
     initializeTabs();
     initializeSettings(); // Add this line
     fetchListStatus();
     loadInitialConfig();
 
-    // Add periodic updates
+    startPolling();
+});
+
+// Periodic updates; registered exactly once
+function startPolling() {
+    if (pollingStarted) return;
+    pollingStarted = true;
     setInterval(fetchListStatus, 30000);
     setInterval(updateStatus, 2000);
     setInterval(updateDeviceList, 2000);
     setInterval(updateConfigInfo, 30000);
-});
+}
 
 
 async function applySettings() {
@@ -1206,38 +1278,12 @@ function updateConfigDisplay(config) {
     }
 }
 
-document.addEventListener('DOMContentLoaded', () => {
-    const controlGroup = document.querySelector('.control-group');
-    controlGroup.innerHTML = '';
-    
-    addControlButtons();
-    setupContextMenu();
-    updateDeviceList();
-    updateStatusIndicators();
-    updateConfigInfo(); // Add this line
-    
-    deviceList.addEventListener('scroll', checkScrollPosition);
-
-    initializeTabs();
-    fetchListStatus();
-    loadInitialConfig();
-
-    // Add periodic updates
-    setInterval(fetchListStatus, 30000);
-    
-});
-
 function updateChannelDisplay(channels) {
     const channelInfo = document.getElementById('channel-info');
     const channelText = `2.4GHz: ${channels['2.4GHz'].join(',')} | 5GHz: ${channels['5GHz'].join(',')}`;
     channelInfo.textContent = channelText;
 }
 
-// Regular Updates
-setInterval(updateStatus, 2000);
-setInterval(updateDeviceList, 2000);
-setInterval(updateConfigInfo, 30000); 
-
 // Window Event Handlers
 window.addEventListener('focus', () => {
     updateDeviceList();
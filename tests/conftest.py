@@ -0,0 +1,39 @@
+"""Shared fixtures: oui-detect.py loaded as a module, pointed at a temporary directory."""
+
+import argparse
+import importlib.util
+import json
+import os
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'oui-detect.py')
+
+
+@pytest.fixture
+def oui(tmp_path):
+    """A fresh copy of the script's module with its files under tmp_path"""
+    spec = importlib.util.spec_from_file_location('oui_detect', SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.LISTS_DIR = str(tmp_path / 'list')
+    module.LISTS_CONFIG_FILE = str(tmp_path / 'lists_config.json')
+    module.SETTINGS_FILE = str(tmp_path / 'settings.json')
+    module.LOG_FILE = str(tmp_path / 'detected_macs.log')
+    module.SNAPSHOT_FILE = str(tmp_path / 'state.snapshot')
+    os.makedirs(module.LISTS_DIR)
+    with open(os.path.join(module.LISTS_DIR, 'drones'), 'w') as f:
+        f.write('60:3E:CA "DJI" \n')
+    with open(module.SETTINGS_FILE, 'w') as f:
+        json.dump(module.DEFAULT_SETTINGS, f)
+    module.args = argparse.Namespace(mac_list=[os.path.join(module.LISTS_DIR, 'drones')], capture_time=13,
+                                     band_2=True, band_5=True, watchlist=None)
+    module.mac_entries = module.read_mac_list(module.args.mac_list)
+    return module
+
+
+@pytest.fixture
+def client(oui):
+    pytest.importorskip('flask')
+    pytest.importorskip('flask_cors')
+    return oui.create_app().test_client()
@@ -0,0 +1,36 @@
+"""Built-in notification actions."""
+
+import socket
+import threading
+import time
+
+
+def test_queue_does_not_wait_for_slow_delivery(oui, tmp_path):
+    path = str(tmp_path / 'alerts.sock')
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    dispatcher = oui.ActionDispatcher()
+    delivering = threading.Event()
+    send_unix = dispatcher._send_unix
+
+    def slow_send(target, data):
+        delivering.set()
+        time.sleep(1)
+        send_unix(target, data)
+
+    dispatcher._send_unix = slow_send
+    detection = {'mac': '60:3E:CA:12:34:56', 'name': 'DJI', 'channel': '6', 'list': 'drones'}
+    dispatcher.queue(f'unix:{path} {{name}}', detection)
+    flusher = threading.Thread(target=dispatcher.flush)
+    flusher.start()
+    assert delivering.wait(2)
+    start = time.monotonic()
+    dispatcher.queue(f'unix:{path} {{mac}}', detection)
+    assert time.monotonic() - start < 0.5
+    flusher.join()
+    conn, _ = server.accept()
+    assert conn.recv(100) == b'DJI\n'
+    dispatcher.close()
+    conn.close()
+    server.close()
@@ -0,0 +1,17 @@
+"""Aggregator ingest: resent batches."""
+
+
+def test_failed_batch_is_not_a_duplicate_when_resent(oui, client, monkeypatch):
+    batch = oui.make_batch('sensor-1', [{'mac': '60:3E:CA:12:34:56', 'name': 'DJI', 'list': 'drones',
+                                         'time': 1_700_000_000}])
+    ingest_detections = oui.ingest_detections
+
+    def failing(sensor_id, detections):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(oui, 'ingest_detections', failing)
+    assert client.post('/api/ingest', json=batch).status_code == 400
+    monkeypatch.setattr(oui, 'ingest_detections', ingest_detections)
+    assert client.post('/api/ingest', json=batch).get_json() == {'status': 'success', 'accepted': 1}
+    assert client.post('/api/ingest', json=batch).get_json()['duplicate']
+    assert oui.aggregate_sensors['sensor-1']['batches'] == 1
@@ -0,0 +1,58 @@
+"""Web API endpoints, through Flask's test client."""
+
+
+def test_config_endpoints(client):
+    for url in ('/api/config', '/api/initial-config'):
+        response = client.get(url)
+        assert response.status_code == 200, url
+        config = response.get_json()
+        if 'config' in config:
+            config = config['config']
+        assert config['band_mode'] == 'abg'
+        assert config['channels']['2.4GHz'] == [1, 6, 11]
+
+
+def test_replace_import_keeps_rules_line(oui, client):
+    path = f"{oui.LISTS_DIR}/drones"
+    with open(path, 'w') as f:
+        f.write('#! min_rssi=-70 dwell=2\n# fleet\n60:3E:CA "DJI" \n')
+    response = client.post('/api/lists/drones/import?mode=replace', data='4C:FC:AA,Tesla\n',
+                           content_type='text/csv')
+    assert response.status_code == 200
+    assert response.get_json()['removed'] == 1
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert lines[0] == '#! min_rssi=-70 dwell=2'
+    assert '# fleet' in lines
+    assert not any(line.startswith('60:3E:CA') for line in lines)
+    assert any(line.startswith('4C:FC:AA') for line in lines)
+
+
+def test_batch_rejects_injected_lines_and_shell_commands(oui, client):
+    def add(**fields):
+        op = dict({'op': 'add', 'list': 'drones', 'mac': '4C:FC:AA'}, **fields)
+        return client.post('/api/lists/batch', json={'operations': [op]})
+
+    assert add(name='Tesla" reboot').status_code == 400
+    assert add(name='Tesla\n00:11:22 "x" reboot').status_code == 400
+    assert add(name='Tesla', command='fifo:/tmp/alerts {mac}\nreboot').status_code == 400
+    assert add(name='Tesla', command='touch /tmp/pwned').status_code == 400
+    assert add(name='Tesla', command='fifo:/tmp/alerts {mac}').status_code == 200
+
+    oui.save_settings(dict(oui.load_settings(), allow_shell_commands=True))
+    assert add(name='Tesla', command='logger {mac}').status_code == 200
+    with open(f"{oui.LISTS_DIR}/drones") as f:
+        assert '4C:FC:AA "Tesla" logger {mac}\n' in f.read()
+
+
+def test_lists_status_etag_follows_the_list_directory(oui, client):
+    client.get('/api/lists-status')  # the first poll saves the lists config
+    first = client.get('/api/lists-status')
+    assert client.get('/api/lists-status', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+    with open(f"{oui.LISTS_DIR}/tesla", 'w') as f:
+        f.write('4C:FC:AA "Tesla" \n')
+    stat = oui.os.stat(oui.LISTS_DIR)
+    oui.os.utime(oui.LISTS_DIR, (stat.st_atime, stat.st_mtime + 1))  # coarse filesystem clocks
+    response = client.get('/api/lists-status', headers={'If-None-Match': first.headers['ETag']})
+    assert response.status_code == 200
+    assert 'tesla' in response.get_json()['inactive']
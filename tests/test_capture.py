@@ -0,0 +1,18 @@
+"""Capture manager: RAM disk budget."""
+
+import os
+
+
+def test_budget_counts_allocated_blocks_and_rotates_without_truncating(oui, tmp_path):
+    capture = oui.CaptureManager(str(tmp_path))
+    os.makedirs(capture.window_dir())
+    with open(capture.csv_path, 'wb') as f:
+        f.truncate(8 * 1024 * 1024)  # sparse: large, but nothing allocated
+    assert not capture.enforce_budget(1024 * 1024)
+
+    cap = capture.prefix + '-01.cap'
+    with open(cap, 'wb') as f:
+        f.write(os.urandom(2 * 1024 * 1024))
+    assert capture.enforce_budget(1024 * 1024)
+    assert capture.rotations == 1
+    assert os.path.getsize(cap) == 2 * 1024 * 1024
@@ -0,0 +1,54 @@
+"""Co-occurrence windows: bucket expiry, top lists and the crowd cutoff."""
+
+A, B, C = '60:3E:CA:00:00:01', '60:3E:CA:00:00:02', '60:3E:CA:00:00:03'
+ROW = '{mac}, 2026-01-01 00:00:00, 2026-01-01 00:00:05, -60, 12, (not associated), '
+
+
+def add(oui, window, when, *devices):
+    pairs = [(pair, oui.pair_cells(pair)) for pair in oui.itertools.combinations(sorted(devices), 2)]
+    window.add(when, sorted(devices), pairs)
+
+
+def test_expired_bucket_is_subtracted(oui):
+    window = oui.CoOccurrenceWindow(10, 3)
+    add(oui, window, 0, A, B)
+    add(oui, window, 25, A, C)
+    window.expire(35)
+    assert window.cycles == 1
+    assert window.pair_total == 1
+    assert window.devices == {A: 1, C: 1}
+    assert window.estimate(oui.pair_cells((A, B))) == 0
+    assert sum(window.sketch) == oui.COOCCUR_DEPTH
+
+
+def test_top_lists_are_re_estimated_on_expiry(oui):
+    window = oui.CoOccurrenceWindow(10, 3)
+    add(oui, window, 0, A, B)
+    add(oui, window, 1, A, B)
+    add(oui, window, 0, A, C)
+    add(oui, window, 25, A, B)
+    assert window.top[A] == {B: 3, C: 1}
+    window.expire(35)
+    assert window.top[A] == {B: 1}
+    assert C not in window.top
+    assert window.top_pairs == {(A, B): 1}
+
+
+def test_crowded_cycles_count_devices_but_no_pairs(oui, monkeypatch):
+    monkeypatch.setattr(oui, 'COOCCUR_MAX_SET', 2)
+    cooccurrence = oui.CoOccurrence()
+    cooccurrence.add_cycle(oui.time.time(), [A, B, C])
+    cooccurrence.add_cycle(oui.time.time(), [A, B, B])
+    summary = cooccurrence.summary('hour')
+    assert summary['cycles'] == 2
+    assert summary['devices'] == 3
+    assert summary['pair_counts'] == 1
+    assert summary['top_pairs'] == [{'macs': [A, B], 'together': 1}]
+
+
+def test_matches_are_seen_during_cooldown(oui):
+    row = ROW.format(mac=A)
+    seen = set()
+    assert oui.check_mac_match(row, oui.mac_entries, [row], seen=seen)
+    assert not oui.check_mac_match(row, oui.mac_entries, [row], seen=seen)
+    assert seen == {A}
@@ -0,0 +1,23 @@
+"""Reading airodump-ng CSV rows."""
+
+CSV = [
+    '\r\n',
+    'BSSID, First time seen, Last time seen, channel, Speed, Privacy, Cipher, Authentication, Power, '
+    '# beacons, # IV, LAN IP, ID-length, ESSID, Key\r\n',
+    '60:3E:CA:00:00:01, 2026-01-01 00:00:00, 2026-01-01 00:00:05,  6, 54, WPA2, CCMP, PSK, -50, '
+    '10, 0, 0.  0.  0.  0, 5, drone, \r\n',
+    '\r\n',
+    'Station MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs\r\n',
+    '60:3E:CA:12:34:56, 2026-01-01 00:00:00, 2026-01-01 00:00:05, -88, 12, 60:3E:CA:00:00:01, \r\n',
+    '60:3E:CA:12:34:57, 2026-01-01 00:00:00, 2026-01-01 00:00:05, -70, 3, (not associated), \r\n',
+]
+
+
+def test_channel_of_ap_row(oui):
+    assert oui.extract_channel(CSV[2], CSV) == '6'
+
+
+def test_station_channel_comes_from_its_ap(oui):
+    assert oui.extract_channel(CSV[5], CSV) == '6'
+    assert oui.extract_channel(CSV[6], CSV) == 'unknown'
+    assert oui.extract_channel(CSV[5]) == 'unknown'
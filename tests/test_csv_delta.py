@@ -0,0 +1,40 @@
+"""Row fingerprints of CsvDelta."""
+
+HEADER = 'Station MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs\r\n'
+
+
+def station(mac, last='00:00:05', packets=12):
+    return f'{mac}, 2026-01-01 00:00:00, 2026-01-01 {last}, -60, {packets:>8}, (not associated), \r\n'
+
+
+def test_only_new_or_changed_rows(oui):
+    delta = oui.CsvDelta()
+    first = [HEADER, station('60:3E:CA:00:00:01'), station('60:3E:CA:00:00:02')]
+    # Header rows come through once too; check_mac_match finds no MAC in them
+    assert delta.changed(first) == first
+    assert delta.changed(first) == []
+
+    second = [HEADER, station('60:3E:CA:00:00:01', last='00:00:09'), station('60:3E:CA:00:00:02'),
+              station('60:3E:CA:00:00:03')]
+    assert delta.changed(second) == [second[1], second[3]]
+
+
+def test_packet_count_change_is_a_change(oui):
+    delta = oui.CsvDelta()
+    delta.changed([station('60:3E:CA:00:00:01')])
+    assert delta.changed([station('60:3E:CA:00:00:01', packets=13)]) == [station('60:3E:CA:00:00:01', packets=13)]
+
+
+def test_partial_row_waits_for_the_next_read(oui):
+    delta = oui.CsvDelta()
+    row = station('60:3E:CA:00:00:01')
+    assert delta.changed([row.rstrip('\r\n')]) == []
+    assert delta.changed([row]) == [row]
+
+
+def test_reset_forgets_rows(oui):
+    delta = oui.CsvDelta()
+    rows = [station('60:3E:CA:00:00:01')]
+    delta.changed(rows)
+    delta.reset()
+    assert delta.changed(rows) == rows
@@ -0,0 +1,47 @@
+"""Evidence capture filter generated from list patterns."""
+
+OUI = ((0xFF, 0x60), (0xFF, 0x3E), (0xFF, 0xCA))
+
+
+def terms(oui, *patterns):
+    return oui.evidence_terms({pattern: ('x', 'list', None) for pattern in patterns})
+
+
+def test_exact_mac(oui):
+    found, widened = terms(oui, '60:3E:CA:12:34:56')
+    assert not widened
+    assert oui.bpf_filter(found) == ('(wlan[4:4] = 0x603eca12 and wlan[8:2] = 0x3456) or '
+                                     '(wlan[10:4] = 0x603eca12 and wlan[14:2] = 0x3456)')
+
+
+def test_partial_nibbles_are_masked(oui):
+    found, _ = terms(oui, '70:B3:D5:1')
+    assert oui.bpf_address_test(found[0], 4) == 'wlan[4:4] & 0xfffffff0 = 0x70b3d510'
+    found, _ = terms(oui, '4C:FC:?A:*')
+    assert oui.bpf_address_test(found[0], 4) == 'wlan[4:4] & 0xffff0f00 = 0x4cfc0a00'
+    found, _ = terms(oui, '70:B3:D5:12:3')
+    assert oui.bpf_address_test(found[0], 10) == 'wlan[10:4] = 0x70b3d512 and wlan[14] & 0xf0 = 0x30'
+
+
+def test_patterns_covered_by_shorter_ones_are_dropped(oui):
+    found, _ = terms(oui, '60:3E:CA', '60:3E:CA:12:34:56', '70:B3:D5:1', '70:B3:D5:12:3')
+    assert found == sorted([OUI, ((0xFF, 0x70), (0xFF, 0xB3), (0xFF, 0xD5), (0xF0, 0x10))])
+
+
+def test_many_patterns_are_widened_to_their_oui(oui, monkeypatch):
+    monkeypatch.setattr(oui, 'EVIDENCE_MAX_TERMS', 2)
+    found, widened = terms(oui, '60:3E:CA:00:00:01', '60:3E:CA:00:00:02', '4C:FC:AA:00:00:01')
+    assert widened
+    assert found == [((0xFF, 0x4C), (0xFF, 0xFC), (0xFF, 0xAA)), OUI]
+
+
+def test_wildcard_only_patterns_are_dropped(oui):
+    found, _ = terms(oui, '??:*', '00:00:00:00:00:00/00:00:00:00:00:00', '60:3E:CA')
+    assert found == [OUI]
+    assert terms(oui, '??:*')[0] == []
+
+
+def test_addr1_tests_come_before_addr2(oui):
+    expression = oui.bpf_filter(terms(oui, '60:3E:CA', '4C:FC:AA')[0])
+    tests = expression.split(' or ')
+    assert [test.startswith('(wlan[4:') for test in tests] == [True, True, False, False]
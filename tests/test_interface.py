@@ -0,0 +1,15 @@
+"""Interface monitor: cached state and its sysfs fallback."""
+
+import threading
+
+
+def test_status_reads_sysfs_when_monitor_thread_died(oui, monkeypatch):
+    states = iter([{'isUp': True, 'isMonitor': True}, {'isUp': True, 'isMonitor': False}])
+    monkeypatch.setattr(oui, 'read_interface_state', lambda interface: next(states))
+    monitor = oui.InterfaceMonitor()
+    monitor.thread = threading.Thread(target=lambda: None)
+    monitor.thread.start()
+    monitor.thread.join()
+    assert monitor.status('wlan0')['isMonitor']
+    # Nothing refreshes the cache any more, so every query goes to sysfs
+    assert not monitor.status('wlan0')['isMonitor']
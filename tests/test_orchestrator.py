@@ -0,0 +1,39 @@
+"""Orchestrator: capture restarts on settings changes."""
+
+import os
+import sys
+import threading
+import time
+
+FAKE_AIRODUMP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                             'bench', 'fake_airodump.py')
+
+
+def wait_for(condition, timeout=20):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, 'timed out'
+        time.sleep(0.05)
+
+
+def test_apply_scan_keeps_cycles_going(oui, client, tmp_path):
+    oui.capture = oui.CaptureManager(str(tmp_path / 'ram'))
+    oui.capture.command = [sys.executable, FAKE_AIRODUMP, '--interval', '0.2']
+    settings = dict(oui.DEFAULT_SETTINGS, capture_time=1)
+    oui.save_settings(settings)
+    thread = threading.Thread(target=oui.monitoring_loop, args=(oui.args,), daemon=True)
+    thread.start()
+    try:
+        wait_for(lambda: oui.cycle_count >= 2)
+        response = client.post('/api/apply-scan', json={
+            'captureTime': 2, 'band2G': True, 'band5G': False,
+            'channels2G': [1, 6], 'channels5G': []})
+        assert response.get_json()['status'] == 'success'
+        applied = oui.cycle_count
+        wait_for(lambda: oui.cycle_count >= applied + 2)
+        assert thread.is_alive()
+    finally:
+        oui.shutdown.set()
+        thread.join(timeout=10)
+        oui.capture.close()
+    assert not thread.is_alive()
@@ -0,0 +1,59 @@
+"""List patterns compiled into the nibble trie."""
+
+import pytest
+
+PATTERNS = {
+    '60:3E:CA': 'oui',
+    '60:3E:CA:12:34:56': 'exact',
+    '70:B3:D5:1': 'ma-m',
+    '70:B3:D5:12:3': 'ma-s',
+    '00:11:22:00:00:00/FF:FF:F0:00:00:00': 'mask',
+    '4C:FC:?A:*': 'wildcard',
+    '90:3A:E6:00:00:00/28': 'prefix',
+}
+
+MATCHES = [
+    ('60:3E:CA:12:34:56', ['60:3E:CA:12:34:56', '60:3E:CA']),
+    ('60-3e-ca-ff-ff-ff', ['60:3E:CA']),
+    ('70:B3:D5:1F:00:00', ['70:B3:D5:1']),
+    ('70:B3:D5:12:3A:BC', ['70:B3:D5:12:3', '70:B3:D5:1']),
+    ('70:B3:D5:20:00:00', []),
+    ('00:11:2F:FF:FF:FF', ['00:11:22:00:00:00/FF:FF:F0:00:00:00']),
+    ('00:11:32:00:00:00', []),
+    ('4C:FC:5A:00:00:01', ['4C:FC:?A:*']),
+    ('4C:FC:5B:00:00:01', []),
+    ('90:3A:E6:0F:00:00', ['90:3A:E6:00:00:00/28']),
+    ('90:3A:E6:10:00:00', []),
+]
+
+
+def entries(oui):
+    return {key: {'name': name, 'command': '', 'source_file': 'test'} for key, name in PATTERNS.items()}
+
+
+@pytest.mark.parametrize('mac,expected', MATCHES)
+def test_match_mac(oui, mac, expected):
+    assert oui.PatternMatcher(entries(oui)).match_mac(mac) == expected
+
+
+def test_ssid_patterns(oui):
+    matcher = oui.PatternMatcher({'ssid:DJI-*': {}, 'ssid:Tesla*': {}})
+    assert matcher.match_ssid('dji-mavic') == 'ssid:DJI-*'
+    assert matcher.match_ssid('Tesla Model 3') == 'ssid:Tesla*'
+    assert matcher.match_ssid('home') is None
+
+
+@pytest.mark.parametrize('pattern', ['60:3E', 'ZZ:00:00', '60:3E:CA:00:00:00/49', '*', 'ssid:',
+                                     '00:00:00:00:00:00/00:00:00:00:00:00'])
+def test_parse_pattern_rejects(oui, pattern):
+    if pattern == '60:3E':
+        # Any prefix works, even short ones
+        assert oui.parse_pattern(pattern)[0] == 'mac'
+        return
+    with pytest.raises(ValueError):
+        oui.parse_pattern(pattern)
+
+
+def test_invalid_patterns_are_reported(oui):
+    matcher = oui.PatternMatcher({'60:3E:CA': {}, 'not-a-mac': {}})
+    assert matcher.invalid == ['not-a-mac']
@@ -0,0 +1,48 @@
+"""Per-list proximity rules on the airodump-ng power column."""
+
+import pytest
+
+
+def station(power):
+    row = f'60:3E:CA:12:34:56, 2026-01-01 00:00:00, 2026-01-01 00:00:05, {power}, 12, (not associated), '
+    return [part.strip() for part in row.split(',')]
+
+
+def test_parse_rules_line(oui):
+    assert oui.parse_rules_line('#! min_rssi=-70 rising=3 dwell=2\n') == {'min_rssi': -70, 'rising': 3, 'dwell': 2}
+    assert oui.format_rules_line({'dwell': 2, 'min_rssi': -70}) == '#! min_rssi=-70 dwell=2\n'
+    for line in ('#! near=1', '#! dwell=x'):
+        with pytest.raises(ValueError):
+            oui.parse_rules_line(line)
+
+
+def test_no_rules_always_pass(oui):
+    assert oui.proximity_ok('60:3E:CA:12:34:56', {}, station(-95))
+
+
+def test_min_rssi(oui):
+    rules = {'min_rssi': -70}
+    assert oui.proximity_ok('60:3E:CA:12:34:56', rules, station(-60))
+    assert not oui.proximity_ok('60:3E:CA:12:34:56', rules, station(-80))
+    # -1 is airodump's "unknown"
+    assert not oui.proximity_ok('60:3E:CA:12:34:56', rules, station(-1))
+
+
+def test_dwell_counts_sightings(oui):
+    rules = {'dwell': 3}
+    results = [oui.proximity_ok('60:3E:CA:12:34:56', rules, station(-60)) for _ in range(3)]
+    assert results == [False, False, True]
+
+
+def test_rising_power(oui):
+    rules = {'rising': 5}
+    mac = '60:3E:CA:12:34:56'
+    assert not oui.proximity_ok(mac, rules, station(-80))
+    assert not oui.proximity_ok(mac, rules, station(-78))
+    assert oui.proximity_ok(mac, rules, station(-74))
+
+
+def test_rules_line_applies_to_list_entries(oui, tmp_path):
+    path = tmp_path / 'near'
+    path.write_text('#! min_rssi=-70\n60:3E:CA "DJI" \n')
+    assert oui.read_mac_list([str(path)])['60:3E:CA']['rules'] == {'min_rssi': -70}
@@ -0,0 +1,44 @@
+"""Warm-restart snapshot."""
+
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+
+def test_round_trip_drops_expired_entries(oui):
+    now = datetime.now()
+    oui.ignored_devices['60:3E:CA:12:34:56'] = {'until': now + timedelta(minutes=5), 'oui': '60:3E:CA'}
+    oui.ignored_devices['60:3E:CA:00:00:01'] = {'until': now - timedelta(minutes=5), 'oui': '60:3E:CA'}
+    oui.last_alerts['4C:FC:AA:00:00:01'] = now - timedelta(seconds=10)
+    oui.last_alerts['4C:FC:AA:00:00:02'] = now - timedelta(seconds=oui.ALERT_COOLDOWN + 10)
+    oui.proximity_state['90:3A:E6:00:00:01'] = {'seen': 3, 'last': time.time(),
+                                                'powers': deque([-70, -65], maxlen=oui.PROXIMITY_READINGS)}
+    oui.cycle_count = 42
+    oui.write_snapshot()
+
+    for state in (oui.ignored_devices, oui.last_alerts, oui.proximity_state):
+        state.clear()
+    oui.cycle_count = 0
+    assert oui.restore_snapshot()
+    assert list(oui.ignored_devices) == ['60:3E:CA:12:34:56']
+    assert oui.ignored_devices['60:3E:CA:12:34:56']['oui'] == '60:3E:CA'
+    assert list(oui.last_alerts) == ['4C:FC:AA:00:00:01']
+    assert list(oui.proximity_state['90:3A:E6:00:00:01']['powers']) == [-70, -65]
+    assert oui.cycle_count == 42
+
+
+def test_other_format_is_ignored(oui, tmp_path):
+    oui.cycle_count = 7
+    oui.write_snapshot()
+    with open(oui.SNAPSHOT_FILE, 'r+b') as f:
+        f.write(b'OUISNAP0')
+    oui.cycle_count = 0
+    assert not oui.restore_snapshot()
+    assert oui.cycle_count == 0
+
+
+def test_missing_or_truncated_snapshot(oui):
+    assert not oui.restore_snapshot()
+    with open(oui.SNAPSHOT_FILE, 'wb') as f:
+        f.write(b'OUISNAP1\x00')
+    assert not oui.restore_snapshot()
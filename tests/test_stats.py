@@ -0,0 +1,22 @@
+"""Detection statistics: bucketed counts."""
+
+DJI = '60:3E:CA:12:34:56'
+
+
+def test_out_of_order_detection_gets_its_own_bucket(oui):
+    stats = oui.DetectionStats()
+    stats.add(600, 'drones', DJI, 6)
+    stats.add(120, 'drones', DJI, 6)   # missing bucket, inserted in order
+    stats.add(130, 'drones', DJI, 1)   # existing bucket
+    assert stats.query('minute') == [{'start': 120, 'count': 2}, {'start': 600, 'count': 1}]
+    assert stats.query('minute', 'channel', '1') == [{'start': 120, 'count': 1}]
+
+
+def test_out_of_order_detection_beyond_horizon_is_dropped(oui, monkeypatch):
+    monkeypatch.setattr(oui, 'STATS_RESOLUTIONS', {'minute': (60, 3)})
+    stats = oui.DetectionStats()
+    for when in (120, 180, 300):
+        stats.add(when, 'drones', DJI, 6)
+    stats.add(60, 'drones', DJI, 6)    # before the 3-minute horizon
+    stats.add(240, 'drones', DJI, 6)   # inside it: evicts the oldest bucket
+    assert [bucket['start'] for bucket in stats.query('minute')] == [180, 240, 300]
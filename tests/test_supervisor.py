@@ -0,0 +1,28 @@
+"""Capture supervision: failure reporting from CSV passes."""
+
+import pytest
+
+
+def test_parse_error_reaches_supervisor(oui, tmp_path, monkeypatch):
+    csv_path = tmp_path / 'capture-01.csv'
+    csv_path.write_text('Station MAC, First time seen, Last time seen, Power, # packets, BSSID, Probed ESSIDs\n'
+                        '60:3E:CA:12:34:56, 2026-01-01 00:00:00, 2026-01-01 00:00:05, -60, 12, (not associated), \n')
+
+    def broken(*args, **kwargs):
+        raise ValueError('bad row')
+
+    monkeypatch.setattr(oui, 'check_mac_match', broken)
+    with pytest.raises(oui.CaptureFailure) as failure:
+        oui.process_csv(oui.mac_entries, oui.load_settings(), quiet=True, csv_path=str(csv_path))
+    assert oui.failure_kind(failure.value) == 'parse'
+
+
+def test_late_success_does_not_hide_newer_failure(oui):
+    supervisor = oui.CaptureSupervisor()
+    supervisor.failed('capture', RuntimeError('exited'), 5)
+    # Cycle 4's final pass finishes after cycle 5 failed
+    supervisor.succeeded(4)
+    assert supervisor.info()['failures']['capture']['streak'] == 1
+    assert supervisor.info()['outage']['cycle'] == 5
+    supervisor.succeeded(6)
+    assert supervisor.info()['outage'] is None
@@ -0,0 +1,40 @@
+"""Compiled exact-MAC watchlists."""
+
+import random
+
+import pytest
+
+
+def random_macs(count, seed):
+    rng = random.Random(seed)
+    return {bytes(rng.randrange(256) for _ in range(6)) for _ in range(count)}
+
+
+def test_no_false_negatives(oui, tmp_path):
+    macs = random_macs(5000, 1)
+    path = str(tmp_path / 'bad.wl')
+    oui.write_watchlist(path, macs, 0.01, 'bad', 'fifo:/tmp/alerts {mac}')
+    watchlist = oui.Watchlist(path)
+    assert (watchlist.count, watchlist.name, watchlist.command) == (5000, 'bad', 'fifo:/tmp/alerts {mac}')
+    for mac in macs:
+        assert ':'.join(f'{b:02X}' for b in mac) in watchlist
+    assert watchlist.confirmed == len(macs)
+
+
+def test_misses_and_false_positive_rate(oui, tmp_path):
+    path = str(tmp_path / 'bad.wl')
+    oui.write_watchlist(path, random_macs(5000, 1), 0.01, 'bad')
+    watchlist = oui.Watchlist(path)
+    others = random_macs(5000, 2) - random_macs(5000, 1)
+    hits = sum(':'.join(f'{b:02X}' for b in mac) in watchlist for mac in others)
+    assert hits == 0
+    assert watchlist.bloom_hits < len(others) * 0.03
+    assert 'not-a-mac' not in watchlist
+
+
+def test_rejects_other_files(oui, tmp_path):
+    path = tmp_path / 'list.txt'
+    path.write_bytes(b'60:3E:CA "DJI"\n' * 10)
+    with pytest.raises(ValueError):
+        oui.Watchlist(str(path))
+    assert oui.load_watchlists([str(path), str(tmp_path / 'missing.wl')]) == []